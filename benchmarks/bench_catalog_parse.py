@@ -0,0 +1,87 @@
+"""Per-page parse time of the catalog extraction backends over saved pages.
+
+Any directory of *.html files works, including a catalog_scraper page cache:
+
+    python catalog_scraper/main.py --skip-scrape   # or any run that fills the cache
+    python benchmarks/bench_catalog_parse.py catalog_scraper/.http_cache
+"""
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "catalog_scraper"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data" / "helpers"))
+
+from bs4 import BeautifulSoup
+
+from tools.course_scraper import PARSER_BACKENDS, extract_descriptions, parse_course_page, parse_prereqs
+
+
+def legacy_parse_course_page(code, response_html):
+    """The original extraction: a full soup, a sibling walk per name and repeated get_text calls."""
+    soup = BeautifulSoup(response_html, "html.parser")
+    course_names = soup.find_all(class_="course-name")
+    course_desc = extract_descriptions(course_names)
+    codes = [name.get_text(strip=True).split(".")[0] for name in course_names]
+    titles = [
+        name.get_text(strip=True).split(".")[1].split(" (")[0].strip()
+        if len(name.get_text(strip=True).split(".")) > 1 else ""
+        for name in course_names
+    ]
+    course_prereq = parse_prereqs(course_desc)
+    return [
+        {"Subject": code, "Code": codes[i], "Title": titles[i], "Prerequisites": course_prereq[i]}
+        for i in range(len(codes))
+        if titles[i]
+    ]
+
+
+def time_pages(parse, pages, repeat):
+    """Best-of-repeat total seconds for parsing every page, plus the rows of the last pass."""
+    best = float("inf")
+    rows = []
+    for _ in range(repeat):
+        rows = []
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for code, response_html in pages:
+                rows.append(parse(code, response_html))
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages_dir", type=Path, help="Directory of saved catalog pages (*.html).")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes per backend; the best is reported.")
+    args = parser.parse_args()
+
+    pages = [(path.stem, path.read_text(encoding="utf-8")) for path in sorted(args.pages_dir.glob("*.html"))]
+    if not pages:
+        parser.error(f"no *.html files in {args.pages_dir}")
+    total_bytes = sum(len(html) for _, html in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1e6:.1f} MB")
+
+    baseline, expected = time_pages(legacy_parse_course_page, pages, args.repeat)
+    print(f"{'legacy':<12} {baseline / len(pages) * 1e3:8.2f} ms/page")
+
+    for backend in PARSER_BACKENDS:
+        try:
+            elapsed, rows = time_pages(
+                lambda code, html: parse_course_page(code, html, backend), pages, args.repeat
+            )
+        except (AttributeError, ImportError):
+            print(f"{backend:<12} unavailable")
+            continue
+        status = "identical" if rows == expected else "MISMATCH"
+        print(
+            f"{backend:<12} {elapsed / len(pages) * 1e3:8.2f} ms/page  "
+            f"{baseline / elapsed:5.1f}x  {status}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Throughput of cross_check.merge_courses on synthetic catalogs.
+
+    python benchmarks/bench_combine_courses.py --sizes 10000 100000 500000
+"""
+from pathlib import Path
+import argparse
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "data" / "helpers"))
+
+from cross_check import merge_courses
+from synthetic import CatalogSpec, combine_sources
+
+
+def synthetic_sources(num_courses, num_sources=2, seed=0):
+    return combine_sources(CatalogSpec(num_courses, seed=seed), num_sources)
+
+
+def legacy_combine(sources):
+    """The original two-source merge: a linear scan per remote course and list.remove inside the loop."""
+    data1_dict, data2_dict = ({item["course"]["code"]: item for item in source} for source in sources[:2])
+    combined = [data1_dict[code] for code in data1_dict]
+    combined += [data2_dict[code] for code in data2_dict if code not in data1_dict]
+    combined.sort(key=lambda x: x["course"]["code"])
+    rm = [item["course"]["code"] for item in combined if item["course"]["code"].endswith("R")]
+    for item in combined:
+        code = item["course"]["code"]
+        if code in rm:
+            reg_item = next((i for i in combined if i["course"]["code"] == code[:-1]), None)
+            reg_notes = reg_item["course"].get("notes", []) if reg_item else []
+            reg_notes.append("Remote course also offered")
+            item["course"]["notes"] = reg_notes
+            combined.remove(item)
+    return combined
+
+
+def timed(func, sources):
+    start = time.perf_counter()
+    result = func(sources)
+    return time.perf_counter() - start, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000, 500_000])
+    parser.add_argument("--sources", type=int, default=2, help="Number of input sources to merge.")
+    parser.add_argument(
+        "--legacy-max",
+        type=int,
+        default=20_000,
+        help="Also time the original quadratic merge up to this many courses.",
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        sources = synthetic_sources(size, args.sources)
+        elapsed, merged = timed(merge_courses, sources)
+        line = f"{size:>9,} courses  {elapsed:8.3f} s  {size / elapsed:12,.0f} courses/s  -> {merged:,}"
+        if size <= args.legacy_max and args.sources == 2:
+            legacy_elapsed, _ = timed(legacy_combine, synthetic_sources(size, 2))
+            line += f"  (legacy {legacy_elapsed:.3f} s)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
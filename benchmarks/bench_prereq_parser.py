@@ -0,0 +1,63 @@
+"""Prerequisite strings parsed per second over the full catalog CSV.
+
+    python benchmarks/bench_prereq_parser.py [catalog_scraper/all_courses.csv]
+"""
+from pathlib import Path
+import argparse
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "catalog_scraper"))
+sys.path.append(str(ROOT / "data" / "helpers"))
+
+import pandas as pd
+
+from tools.json_parser import load_courses_csv, parse_prereq_groups, parse_prereqs, tokenize
+
+
+def load_prereq_strings(path):
+    """Prerequisite strings exactly as generate_webreg_json sees them."""
+    df = load_courses_csv(path)
+    return ["" if pd.isna(raw) else str(raw) for raw in df["Prerequisites"]]
+
+
+def best_rate(func, strings, repeat, setup=None):
+    """Best-of-repeat strings per second."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for raw in strings:
+            func(raw)
+        best = min(best, time.perf_counter() - start)
+    return len(strings) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "csv_path",
+        nargs="?",
+        type=Path,
+        default=ROOT / "catalog_scraper" / "all_courses.csv",
+        help="Catalog CSV produced by the scraper.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Passes per measurement; the best is reported.")
+    args = parser.parse_args()
+
+    strings = load_prereq_strings(args.csv_path)
+    print(f"{len(strings)} strings, {len(set(strings))} distinct")
+
+    results = [
+        ("tokenize", best_rate(tokenize, strings, args.repeat)),
+        ("parse_prereqs (cold)", best_rate(parse_prereqs, strings, args.repeat, parse_prereq_groups.cache_clear)),
+        ("parse_prereqs (warm)", best_rate(parse_prereqs, strings, args.repeat)),
+    ]
+    for name, rate in results:
+        print(f"{name:<22} {rate:12,.0f} strings/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Pipeline benchmark suite over synthetic catalogs, checked against a stored baseline.
+
+Every stage runs in its own process, so peak memory is not inflated by the stages
+before it and the catalog_scraper and data/helpers import paths never meet. Each
+stage is timed (best of --repeat) and then run once more under tracemalloc for
+its peak allocation; setup, including generating the catalog, is not counted.
+
+    python benchmarks/run_suite.py --sizes 1000 10000 100000 --save-baseline
+    python benchmarks/run_suite.py --sizes 1000 10000 100000   # exits 1 on a regression
+
+Timings only compare on the machine that recorded them, so no baseline is
+committed: record one with --save-baseline first. benchmarks/baseline.json is
+ignored by git.
+
+The major plan filters need the major_scraper interpreter (Python 3.14 with
+pydantic); point --major-python at it, otherwise that stage is reported as skipped.
+"""
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import add_spec_arguments, catalog_rows, combine_sources, combined_records, major_plans, spec_from_args
+
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+# plans are far fewer than courses; one plan per this many courses
+COURSES_PER_PLAN = 50
+# major_scraper's requires-python
+MAJOR_PYTHON = (3, 14)
+
+
+def tokenize_case(spec):
+    sys.path.insert(0, str(ROOT / "catalog_scraper"))
+    sys.path.append(str(ROOT / "data" / "helpers"))
+    from tools.json_parser import tokenize
+
+    strings = [raw for _, _, raw in catalog_rows(spec)]
+    return lambda: strings, lambda strings: sum(1 for raw in strings if tokenize(raw) is not None), "strings"
+
+
+def parse_prereqs_case(spec):
+    sys.path.insert(0, str(ROOT / "catalog_scraper"))
+    sys.path.append(str(ROOT / "data" / "helpers"))
+    from tools.json_parser import parse_prereq_groups, parse_prereqs
+
+    strings = [raw for _, _, raw in catalog_rows(spec)]
+
+    def prepare():
+        # cold: the group cache would otherwise answer every pass after the first
+        parse_prereq_groups.cache_clear()
+        return strings
+
+    def run(strings):
+        for raw in strings:
+            parse_prereqs(raw)
+        return len(strings)
+
+    return prepare, run, "strings"
+
+
+def generate_webreg_json_case(spec):
+    sys.path.insert(0, str(ROOT / "catalog_scraper"))
+    sys.path.append(str(ROOT / "data" / "helpers"))
+    import pandas as pd
+    from tools.json_parser import generate_webreg_json
+
+    df = pd.DataFrame(catalog_rows(spec), columns=["Code", "Title", "Prerequisites"])
+    df.insert(0, "Subject", df["Code"].str.split(" ").str[0])
+    output = Path(tempfile.mkdtemp()) / "catalog_data.json"
+    return lambda: df, lambda df: generate_webreg_json(df, output), "courses"
+
+
+def combine_courses_case(spec):
+    sys.path.insert(0, str(ROOT / "data" / "helpers"))
+    from cross_check import merge_courses
+
+    # merging folds remote notes into the entries, so every pass gets fresh sources
+    return lambda: combine_sources(spec), lambda sources: len(merge_courses(sources)), "courses"
+
+
+def find_children_case(spec):
+    sys.path.insert(0, str(ROOT / "data" / "helpers"))
+    from course_ast import build, build_global_course_dict
+
+    course_dict = build_global_course_dict(combined_records(spec))
+    courses = list(course_dict.values())
+    return lambda: courses, lambda courses: len(build(courses, course_dict)), "roots"
+
+
+def process_all_departments_case(spec):
+    sys.path.insert(0, str(ROOT / "data" / "helpers"))
+    from course_ast import process_all_departments
+
+    records = combined_records(spec)
+    output_dir = tempfile.mkdtemp()
+
+    def run(records):
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, total, _ = process_all_departments(records, output_dir, artifact_format="minified")
+        return total
+
+    return lambda: records, run, "courses"
+
+
+def major_filters_case(spec):
+    sys.path.insert(0, str(ROOT / "major_scraper"))
+    from main import handle_plan
+
+    plans = major_plans(spec, max(1, spec.num_courses // COURSES_PER_PLAN))
+    return lambda: plans, lambda plans: sum(1 for plan in plans if handle_plan(plan)), "plans"
+
+
+# name -> (setup, runs under --major-python). setup builds the inputs for a catalog
+# spec and returns (prepare, run, unit): prepare gives the input of one pass,
+# untimed, and run processes it and returns how many units it handled.
+CASES = {
+    "tokenize": (tokenize_case, False),
+    "parse_prereqs": (parse_prereqs_case, False),
+    "generate_webreg_json": (generate_webreg_json_case, False),
+    "combine_courses": (combine_courses_case, False),
+    "find_children": (find_children_case, False),
+    "process_all_departments": (process_all_departments_case, False),
+    "major_filters": (major_filters_case, True),
+}
+
+
+def measure(name, spec, repeat):
+    """Time and trace one case in this process; returns its result record."""
+    setup, _ = CASES[name]
+    prepare, run, unit = setup(spec)
+    best = float("inf")
+    for _ in range(repeat):
+        data = prepare()
+        start = time.perf_counter()
+        items = run(data)
+        best = min(best, time.perf_counter() - start)
+
+    data = prepare()
+    tracemalloc.start()
+    run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"items": items, "unit": unit, "seconds": best, "rate": items / best, "peak_mb": peak / 1e6}
+
+
+def run_worker(name, size, args):
+    """Run one case in a fresh interpreter; returns its record, or {"skipped": reason}."""
+    _, major = CASES[name]
+    python = args.major_python if major else sys.executable
+    cmd = [python, __file__, "--worker", name, "--sizes", str(size), "--repeat", str(args.repeat)]
+    cmd += ["--fanout", str(args.fanout), "--depth", str(args.depth), "--or-density", str(args.or_density)]
+    cmd += ["--or-width", str(args.or_width), "--cycle-rate", str(args.cycle_rate), "--seed", str(args.seed)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+    except OSError as e:
+        return {"skipped": str(e)}
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"]
+        if major and lines[-1].startswith(("ImportError", "ModuleNotFoundError")):
+            return {"skipped": lines[-1]}
+        raise RuntimeError(f"{name} at {size} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(result, baseline, threshold):
+    """Regression messages for one result against its baseline record."""
+    problems = []
+    if result["rate"] < baseline["rate"] * (1 - threshold):
+        problems.append(f"throughput {result['rate']:,.0f} < baseline {baseline['rate']:,.0f} {result['unit']}/s")
+    if result["peak_mb"] > baseline["peak_mb"] * (1 + threshold):
+        problems.append(f"peak {result['peak_mb']:.1f} MB > baseline {baseline['peak_mb']:.1f} MB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Catalog sizes in courses.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Stages to run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per stage; the best is reported.")
+    parser.add_argument("--major-python", default=sys.executable, help="Interpreter for the major_scraper stage.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Stored results to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run's results as the baseline.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown or memory growth over the baseline, as a fraction (default: 0.2).",
+    )
+    parser.add_argument("--output", type=Path, help="Also write this run's results as JSON.")
+    parser.add_argument("--worker", choices=list(CASES), help=argparse.SUPPRESS)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    if args.worker:
+        if CASES[args.worker][1] and sys.version_info < MAJOR_PYTHON:
+            needed = ".".join(map(str, MAJOR_PYTHON))
+            print(json.dumps({"skipped": f"needs Python {needed}+, {sys.executable} is {platform.python_version()}"}))
+            return
+        print(json.dumps(measure(args.worker, spec_from_args(args.sizes[0], args), args.repeat)))
+        return
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() and not args.save_baseline else {}
+    if not baseline and not args.save_baseline:
+        print(f"No baseline at {args.baseline}; nothing to compare against. Record one with --save-baseline.")
+    results = {}
+    regressions = 0
+    for name in args.cases:
+        for size in args.sizes:
+            result = run_worker(name, size, args)
+            label = f"{name:<24} {size:>9,}"
+            if "skipped" in result:
+                print(f"{label}  skipped: {result['skipped']}")
+                continue
+            results.setdefault(name, {})[str(size)] = result
+            line = f"{label}  {result['seconds']:8.3f} s  {result['rate']:12,.0f} {result['unit']}/s  {result['peak_mb']:8.1f} MB"
+            reference = baseline.get(name, {}).get(str(size))
+            if reference:
+                problems = compare(result, reference, args.threshold)
+                regressions += bool(problems)
+                line += "  REGRESSION: " + "; ".join(problems) if problems else "  ok"
+            print(line, flush=True)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"{regressions} regression(s) over the {args.threshold:.0%} threshold")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
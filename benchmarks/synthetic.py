@@ -0,0 +1,217 @@
+"""Deterministic synthetic catalogs for the benchmarks.
+
+Courses are spread over departments and over `depth` levels; a course's
+prerequisites are drawn from lower levels, so depth bounds the longest
+prerequisite chain. Every course gets about `fanout` requirement items, each an
+OR group with probability `or_density`, and with probability `cycle_rate` one
+extra item points at a course on the same or a higher level, which can close a
+cycle. The same seed always gives the same catalog.
+
+    python benchmarks/synthetic.py 100000 --output /tmp/combined.json
+"""
+from collections import namedtuple
+from pathlib import Path
+import argparse
+import json
+import random
+import string
+import sys
+
+COURSES_PER_DEPARTMENT = 400
+SUFFIXES = ["", "A", "B", "C", "D", "E", "F", "L", "H", "AH", "BH", "CH"]
+
+
+CatalogSpec = namedtuple(
+    "CatalogSpec",
+    ["num_courses", "fanout", "depth", "or_density", "or_width", "cycle_rate", "seed"],
+    defaults=[10_000, 2.0, 6, 0.3, 2, 0.01, 0],
+)
+
+
+def add_spec_arguments(parser):
+    """The generator knobs, shared by every benchmark that builds a catalog."""
+    defaults = CatalogSpec()
+    parser.add_argument("--fanout", type=float, default=defaults.fanout, help="Mean requirement items per course.")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="Levels, i.e. longest prerequisite chain.")
+    parser.add_argument("--or-density", type=float, default=defaults.or_density, help="Share of items that are OR groups.")
+    parser.add_argument("--or-width", type=int, default=defaults.or_width, help="Maximum options in an OR group.")
+    parser.add_argument("--cycle-rate", type=float, default=defaults.cycle_rate, help="Share of courses with a back edge.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(num_courses, args):
+    return CatalogSpec(num_courses, args.fanout, args.depth, args.or_density, args.or_width, args.cycle_rate, args.seed)
+
+
+def department_name(index):
+    """AAAA, AAAB, ... valid department codes for any catalog size."""
+    letters = []
+    for _ in range(4):
+        index, digit = divmod(index, 26)
+        letters.append(string.ascii_uppercase[digit])
+    return "".join(reversed(letters))
+
+
+def course_codes(num_courses):
+    codes = []
+    for i in range(num_courses):
+        dept, slot = divmod(i, COURSES_PER_DEPARTMENT)
+        number, suffix = divmod(slot, len(SUFFIXES))
+        codes.append(f"{department_name(dept)} {number + 1}{SUFFIXES[suffix]}")
+    return codes
+
+
+def generate_prereqs(spec):
+    """Per course, a list of requirement items; an item is a code or a tuple of OR alternatives."""
+    rng = random.Random(spec.seed)
+    codes = course_codes(spec.num_courses)
+    levels = [[] for _ in range(spec.depth)]
+    for idx in range(spec.num_courses):
+        levels[rng.randrange(spec.depth)].append(idx)
+    level_of = {idx: level for level, members in enumerate(levels) for idx in members}
+    # prerequisites come from the two levels below; back edges from anywhere at or above
+    below = [[member for members in levels[max(0, level - 2):level] for member in members] for level in range(spec.depth)]
+    above = [[member for members in levels[level:] for member in members] for level in range(spec.depth)]
+
+    def pick(pool):
+        return codes[pool[rng.randrange(len(pool))]]
+
+    prereqs = []
+    for idx in range(spec.num_courses):
+        level = level_of[idx]
+        lower = below[level]
+        items = []
+        if lower:
+            for _ in range(rng.randint(0, round(2 * spec.fanout))):
+                if rng.random() < spec.or_density:
+                    items.append(tuple(dict.fromkeys(pick(lower) for _ in range(rng.randint(2, max(2, spec.or_width))))))
+                else:
+                    items.append(pick(lower))
+        if rng.random() < spec.cycle_rate:
+            items.append(pick(above[level]))
+        prereqs.append(items)
+    return codes, prereqs
+
+
+def prereq_text(items):
+    """Catalog-style text, e.g. "AAAA 3 or AAAA 4B, and AAAB 1"."""
+    parts = [" or ".join(item) if isinstance(item, tuple) else item for item in items]
+    return ", and ".join(parts)
+
+
+def prereq_ast(items):
+    """The prereq object json_parser.ast_to_dict would produce for the same text."""
+    def course(code):
+        return {"type": "COURSE", "course_id": code.replace(" ", "")}
+
+    return {
+        "type": "AND",
+        "items": [
+            {"type": "OR", "items": [course(code) for code in item]} if isinstance(item, tuple) else course(item)
+            for item in items
+        ],
+    }
+
+
+def catalog_rows(spec):
+    """(code, title, raw_prereq) rows, as the scraper CSV holds them."""
+    codes, prereqs = generate_prereqs(spec)
+    return [(code, f"Synthetic Course {i}", prereq_text(items)) for i, (code, items) in enumerate(zip(codes, prereqs))]
+
+
+def combined_records(spec):
+    """combined.json-shaped records."""
+    codes, prereqs = generate_prereqs(spec)
+    meta = {"version": "2026-01-01", "generated_at": "2026-01-01T00:00:00Z"}
+    records = []
+    for i, (code, items) in enumerate(zip(codes, prereqs)):
+        course = {
+            "code": code,
+            "title": f"Synthetic Course {i}",
+            "raw_prereq": prereq_text(items),
+            "parseable": bool(items),
+            "notes": [],
+        }
+        if items:
+            course["prereq"] = prereq_ast(items)
+        records.append({"meta": dict(meta), "course": course})
+    return records
+
+
+def combine_sources(spec, num_sources=2, remote_ratio=0.05, overlap=0.4):
+    """num_sources course lists sharing `overlap` of their codes, with R (remote) variants mixed in."""
+    rng = random.Random(spec.seed)
+    codes = course_codes(spec.num_courses)
+    codes += [code + "R" for code in rng.sample(codes, int(spec.num_courses * remote_ratio))]
+
+    sources = [[] for _ in range(num_sources)]
+    for code in codes:
+        owners = range(num_sources) if rng.random() < overlap else [rng.randrange(num_sources)]
+        for owner in owners:
+            sources[owner].append({
+                "meta": {"version": "2026-01-01", "generated_at": "2026-01-01T00:00:00Z"},
+                "course": {"code": code, "title": "", "raw_prereq": "", "parseable": False, "notes": []},
+            })
+    for source in sources:
+        rng.shuffle(source)
+    return sources
+
+
+PLAN_REQUIREMENTS = [
+    "GE/DEI", "TE elective", "Major Elective", "Programming requirement", "Language", "AHI", "CCER",
+]
+
+
+def major_plans(spec, num_plans, courses_per_quarter=4):
+    """intermediate.json-shaped plans over the synthetic course codes, with college and filler rows."""
+    rng = random.Random(spec.seed)
+    codes = course_codes(spec.num_courses)
+    plans = []
+    for plan_id in range(num_plans):
+        courses = []
+        for year in range(4):
+            quarters = []
+            for quarter in range(3):
+                rows = []
+                for _ in range(courses_per_quarter):
+                    roll = rng.random()
+                    if roll < 0.15:
+                        name, ctype = rng.choice(PLAN_REQUIREMENTS), "DEPARTMENT"
+                    elif roll < 0.3:
+                        name, ctype = "College requirement", "COLLEGE"
+                    elif roll < 0.45:
+                        name, ctype = f"{rng.choice(codes)} or {rng.choice(codes)}", "DEPARTMENT"
+                    else:
+                        name, ctype = rng.choice(codes) + rng.choice(["", "*", " (note)"]), "DEPARTMENT"
+                    rows.append({
+                        "course_id": len(rows), "plan_id": plan_id, "course_name": name, "units": "4",
+                        "course_type": ctype, "year_taken": year + 1, "quarter_taken": quarter + 1,
+                        "ge_major_overlap": False,
+                    })
+                quarters.append(rows)
+            courses.append(quarters)
+        plans.append({
+            "planId": plan_id, "courses": courses, "college_code": "RE", "college_name": "Revelle",
+            "major_code": f"SY{plan_id:05d}", "department": "SYN", "start_year": 2024,
+            "major_title": f"Synthetic Major {plan_id}", "plan_length": 4,
+        })
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("num_courses", type=int, help="Number of courses to generate.")
+    parser.add_argument("--output", type=Path, help="Write combined.json-shaped records here (default: stdout).")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    records = combined_records(spec_from_args(args.num_courses, args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+    else:
+        json.dump(records, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,90 @@
+from contextlib import nullcontext
 from pathlib import Path
 import argparse
+import sys
 
-from tools.course_scraper import read_subject_codes, build_courses_dataframe, save_courses_csv
+# The artifact, store and metrics modules, used here and by the tools, are shared with the data/helpers stages
+sys.path.append(str(Path(__file__).resolve().parents[1] / "data" / "helpers"))
 
-from tools.json_parser import load_courses_csv, generate_webreg_json
+from tools.course_scraper import (
+    PARSER_BACKENDS,
+    read_subject_codes,
+    build_courses_dataframe,
+    build_courses_dataframe_async,
+    save_courses_csv,
+)
 
+from tools.json_parser import (
+    iter_courses_csv,
+    iter_dataframe_rows,
+    iter_webreg_records,
+    parse_prereq_groups,
+    write_webreg_json,
+)
+from artifacts import SizeManifest, add_artifact_arguments, artifact_path, compress_file
+from coursestore import CourseStore, add_store_argument
+import metrics
+from metrics import RunMetrics, add_metrics_arguments
+from tools.http_cache import PageCache
 
-def run(codes_path, courses_csv_path, webreg_json_path, skip_scrape=False):
+
+def run(
+    codes_path,
+    courses_csv_path,
+    webreg_json_path,
+    skip_scrape=False,
+    concurrency=1,
+    rate_limit=None,
+    cache=None,
+    parser="html.parser",
+    artifact_format="pretty",
+    compress=(),
+    size_manifest=None,
+    store=None,
+):
     if not skip_scrape:
-        subject_codes = read_subject_codes(codes_path)
-        df = build_courses_dataframe(subject_codes)
-        save_courses_csv(df, courses_csv_path)
+        with metrics.stage("scrape"):
+            subject_codes = read_subject_codes(codes_path)
+            if concurrency > 1:
+                df = build_courses_dataframe_async(
+                    subject_codes, concurrency=concurrency, rate_limit=rate_limit, cache=cache, parser=parser
+                )
+            else:
+                df = build_courses_dataframe(subject_codes, cache=cache, parser=parser)
+            metrics.count("subjects", len(subject_codes))
+            metrics.count("courses", len(df))
+            if cache is not None:
+                metrics.count("cache_hits", cache.hits)
+                metrics.count("cache_misses", cache.misses)
+                print(f"Page cache: {cache.hits} hits, {cache.misses} misses")
+        with metrics.stage("save_csv"):
+            save_courses_csv(df, courses_csv_path)
     else:
+        df = None
         print("Skipping scrape step.")
 
-    df = load_courses_csv(courses_csv_path)
-    generate_webreg_json(df, webreg_json_path)
-    print(f"Saved {webreg_json_path}")
+    with metrics.stage("parse"):
+        # a fresh scrape is parsed from memory; the CSV is only read back when skipping it
+        rows = iter_dataframe_rows(df) if df is not None else iter_courses_csv(courses_csv_path)
+        records = iter_webreg_records(rows)
+        if store is not None:
+            # the catalog is scraped whole, so courses it no longer lists are marked removed
+            with store.ingest("courses", "catalog", prune=True) as batch:
+                count = write_webreg_json(batch.tap(records), webreg_json_path, artifact_format)
+        else:
+            count = write_webreg_json(records, webreg_json_path, artifact_format)
+        written = artifact_path(str(webreg_json_path), artifact_format)
+        sizes = {"bytes": Path(written).stat().st_size, **compress_file(written, compress)}
+        parse_cache = parse_prereq_groups.cache_info()
+        metrics.count("records", count)
+        # every record with a prerequisite string goes through the memoized parser once
+        metrics.count("prereq_strings_parsed", parse_cache.hits + parse_cache.misses)
+        metrics.count("parse_cache_hits", parse_cache.hits)
+        metrics.count("parse_cache_misses", parse_cache.misses)
+        if size_manifest is not None:
+            size_manifest.record(written, sizes)
+            size_manifest.save()
+    print(f"Saved {count} courses to {written}")
 
 
 def main():
@@ -29,14 +97,64 @@ def main():
         action="store_true",
         help="Skip scraping and only regenerate JSON from existing CSV.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Number of catalog pages to fetch at once (1 fetches sequentially).",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=10.0,
+        help="Maximum requests per second to the catalog host (0 disables).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path("catalog_scraper/.http_cache"),
+        help="Directory of the on-disk page cache.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always download pages in full and leave the cache untouched.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve pages only from the cache; fail on any page that is not cached.",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=sorted(PARSER_BACKENDS),
+        default="html.parser",
+        help="HTML extraction backend (lxml must be installed for 'lxml').",
+    )
+    add_store_argument(parser, "parsed courses")
+    add_artifact_arguments(parser)
+    add_metrics_arguments(parser, "catalog_scraper")
     args = parser.parse_args()
+    cache = None if args.no_cache else PageCache(args.cache_dir, offline=args.offline)
 
-    run(
-        codes_path=Path('catalog_scraper/valid_codes.txt'),
-        courses_csv_path=Path('catalog_scraper/all_courses.csv'),
-        webreg_json_path=Path('data/catalog_data.json'),
-        skip_scrape=args.skip_scrape,
-    )
+    with (
+        RunMetrics.from_args("catalog_scraper", args),
+        (CourseStore(args.store) if args.store else nullcontext()) as store,
+    ):
+        run(
+            codes_path=Path('catalog_scraper/valid_codes.txt'),
+            courses_csv_path=Path('catalog_scraper/all_courses.csv'),
+            webreg_json_path=Path('data/catalog_data.json'),
+            skip_scrape=args.skip_scrape,
+            concurrency=args.concurrency,
+            rate_limit=args.rate_limit or None,
+            cache=cache,
+            parser=args.parser,
+            artifact_format=args.artifact_format,
+            compress=args.compress,
+            size_manifest=SizeManifest(args.size_manifest),
+            store=store,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+import threading
+import time
+
+import pytest
+
+# the scraper modules are imported as main.py imports them, with data/helpers on the path as main.py puts it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "data" / "helpers"))
+
+
+class StubServer:
+    """Local HTTP server answering each path from a script of (status, headers, body, delay) responses.
+
+    Each request to a path takes the next scripted response; the last one keeps
+    answering. Every request is recorded as (path, headers, arrival time).
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append((self.path, dict(self.headers), time.monotonic()))
+                    script = stub.routes.get(self.path.split("?")[0], [(404, {}, b"", 0)])
+                    status, headers, body, delay = script.pop(0) if len(script) > 1 else script[0]
+                time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def route(self, path, *responses):
+        """Script the responses of path; each is (status, headers, body[, delay seconds])."""
+        self.routes[path] = [tuple(response) + (0,) * (4 - len(response)) for response in responses]
+
+    def paths(self):
+        return [path for path, _, _ in self.requests]
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
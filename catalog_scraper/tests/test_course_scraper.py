@@ -0,0 +1,128 @@
+import asyncio
+
+from tools.course_scraper import build_courses_dataframe, fetch_html, fetch_html_async, scrape_courses_async
+from tools.http_cache import PageCache
+
+import httpx
+
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+
+
+def subject_page(subject, number, prereq):
+    return (
+        f'<div><p class="course-name">{subject} {number}. Topics in {subject} (4)</p>'
+        f'<p class="course-descriptions">Prerequisites: {prereq}.</p></div>'
+    ).encode("utf-8")
+
+
+def fetch_async(stub_server, code, **kwargs):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await fetch_html_async(client, code, blank_url=stub_server.base_url + "/{}.html", **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_async_scrape_keeps_subject_order(stub_server):
+    subjects = ["AAA", "BBB", "CCC", "DDD"]
+    # earlier subjects answer last, so completion order is the reverse of subject order
+    for idx, subject in enumerate(subjects):
+        delay = 0.05 * (len(subjects) - idx)
+        stub_server.route(f"/{subject}.html", (200, HTML, subject_page(subject, 10 + idx, "MATH 20A"), delay))
+
+    rows = asyncio.run(
+        scrape_courses_async(subjects, blank_url=stub_server.base_url + "/{}.html", concurrency=4)
+    )
+    assert [row["Subject"] for row in rows] == subjects
+    assert [row["Code"] for row in rows] == ["AAA 10", "BBB 11", "CCC 12", "DDD 13"]
+    assert all(row["Prerequisites"] == "MATH 20A" for row in rows)
+
+
+def test_async_scrape_matches_sequential(stub_server):
+    subjects = ["AAA", "BBB"]
+    for idx, subject in enumerate(subjects):
+        stub_server.route(f"/{subject}.html", (200, HTML, subject_page(subject, idx, "none")))
+    blank_url = stub_server.base_url + "/{}.html"
+
+    rows = asyncio.run(scrape_courses_async(subjects, blank_url=blank_url, concurrency=2))
+    assert rows == build_courses_dataframe(subjects, blank_url=blank_url).to_dict("records")
+
+
+def test_retries_503_with_exponential_backoff(stub_server):
+    body = subject_page("AAA", 1, "none")
+    stub_server.route("/AAA.html", (503, {}, b"busy"), (503, {}, b"busy"), (200, HTML, body))
+
+    assert fetch_async(stub_server, "AAA", retries=3, backoff=0.05) == body.decode("utf-8")
+    times = [arrived for _, _, arrived in stub_server.requests]
+    assert len(times) == 3
+    # waits of backoff * 2 ** attempt between attempts
+    assert times[1] - times[0] >= 0.05
+    assert times[2] - times[1] >= 0.1
+
+
+def test_gives_up_after_retries(stub_server):
+    stub_server.route("/AAA.html", (503, {}, b"busy"))
+
+    assert fetch_async(stub_server, "AAA", retries=2, backoff=0.01) == "busy"
+    assert len(stub_server.requests) == 3
+
+
+def test_client_errors_are_not_retried(stub_server):
+    stub_server.route("/AAA.html", (404, {}, b"missing"))
+
+    assert fetch_async(stub_server, "AAA", retries=3, backoff=0.01) == "missing"
+    assert len(stub_server.requests) == 1
+
+
+def test_cache_replays_conditional_and_offline(stub_server, tmp_path):
+    # the body keeps bytes a text round trip would change
+    body = subject_page("AAA", 1, "none").replace(b"</p>", b"</p>\r\n") + "café".encode("utf-8")
+    stub_server.route(
+        "/AAA.html",
+        (200, {**HTML, "ETag": '"v1"', "Last-Modified": "Mon, 02 Mar 2026 00:00:00 GMT"}, body),
+        (304, {"ETag": '"v1"'}, b""),
+    )
+    blank_url = stub_server.base_url + "/{}.html"
+    cache = PageCache(tmp_path)
+
+    first = fetch_html("AAA", blank_url=blank_url, cache=cache)
+    assert fetch_async(stub_server, "AAA", cache=cache) == first
+    offline = PageCache(tmp_path, offline=True)
+    assert fetch_html("AAA", blank_url=blank_url, cache=offline) == first
+
+    assert first == body.decode("utf-8")
+    assert len(stub_server.requests) == 2
+    _, headers, _ = stub_server.requests[1]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Mon, 02 Mar 2026 00:00:00 GMT"
+    assert (cache.hits, cache.misses, offline.hits) == (1, 1, 1)
+    assert cache.load(blank_url.format("AAA"))[1] == body
+
+
+def test_not_modified_without_cached_body_fetches_again(stub_server, tmp_path):
+    old, new = subject_page("AAA", 1, "none"), subject_page("AAA", 1, "MATH 20A")
+    stub_server.route(
+        "/AAA.html",
+        (200, {**HTML, "ETag": '"v1"'}, old),
+        (304, {"ETag": '"v1"'}, b""),
+        (200, {**HTML, "ETag": '"v2"'}, new),
+    )
+    blank_url = stub_server.base_url + "/{}.html"
+    cache = PageCache(tmp_path)
+    assert fetch_html("AAA", blank_url=blank_url, cache=cache) == old.decode("utf-8")
+
+    # the body disappears after the validators are read, so the 304 has nothing to replay
+    conditional_headers = cache.conditional_headers
+
+    def lose_body(url):
+        headers = conditional_headers(url)
+        for path in tmp_path.glob("*.html"):
+            path.unlink()
+        return headers
+
+    cache.conditional_headers = lose_body
+    assert fetch_async(stub_server, "AAA", cache=cache) == new.decode("utf-8")
+    assert len(stub_server.requests) == 3
+    _, headers, _ = stub_server.requests[2]
+    assert "If-None-Match" not in headers
+    assert cache.load(blank_url.format("AAA"))[1] == new
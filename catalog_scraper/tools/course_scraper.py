@@ -1,9 +1,20 @@
 from pathlib import Path
+from urllib.parse import urlsplit
+import asyncio
+import time
 
 import httpx
 from bs4 import BeautifulSoup
 import pandas as pd
 
+# shared with the data/helpers stages; the entry points put data/helpers on sys.path
+import metrics
+
+try:
+    import lxml.html
+except ImportError:  # optional, only needed for the "lxml" parser backend
+    lxml = None
+
 BLANK_URL = "https://catalog.ucsd.edu/courses/{}.html"
 DEFAULT_HEADERS = {
     "User-Agent": (
@@ -19,38 +30,194 @@ def read_subject_codes(path):
         return [line.strip() for line in f if line.strip()]
 
 
-def scrape_courses(subject_codes, blank_url=BLANK_URL, headers=DEFAULT_HEADERS):
+# Responses worth retrying in the async scraper
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+NO_DESCRIPTION = "No description available"
+COURSE_CLASSES = ("course-name", "course-descriptions")
+COURSE_CLASS_XPATH = " or ".join(
+    f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')" for cls in COURSE_CLASSES
+)
+
+
+def pair_course_elements(elements):
+    """Pair each course-name with its description in one pass over the matching elements.
+
+    elements yields (classes, text, parent) in document order. A description belongs
+    to the closest preceding course-name sibling with no other course-name in between,
+    which is the same rule extract_descriptions applies by walking siblings.
+    """
+    names = []
+    descriptions = []
+    pending = {}
+    for classes, text, parent in elements:
+        if "course-descriptions" in classes:
+            # pending keeps the parent alive so its id can't be reused (lxml proxies are transient)
+            _, idx = pending.pop(id(parent), (None, None))
+            if idx is not None:
+                descriptions[idx] = text
+        if "course-name" in classes:
+            pending[id(parent)] = (parent, len(names))
+            names.append(text)
+            descriptions.append(NO_DESCRIPTION)
+    return names, descriptions
+
+
+def extract_courses_bs4(response_html, features="html.parser"):
+    soup = BeautifulSoup(response_html, features)
+    return pair_course_elements(
+        (el.get("class", []), el.get_text(strip=True), el.parent)
+        for el in soup.find_all(class_=list(COURSE_CLASSES))
+    )
+
+
+def extract_courses_lxml(response_html):
+    if not response_html.strip():
+        return [], []
+    doc = lxml.html.fromstring(response_html)
+    return pair_course_elements(
+        (
+            el.get("class", "").split(),
+            "".join(text.strip() for text in el.itertext()),
+            el.getparent(),
+        )
+        for el in doc.xpath(f"//*[{COURSE_CLASS_XPATH}]")
+    )
+
+
+# Page extraction backends; "lxml" only visits the course elements and skips building a soup
+PARSER_BACKENDS = {
+    "html.parser": extract_courses_bs4,
+    "lxml": extract_courses_lxml,
+}
+
+
+def parse_course_page(code, response_html, parser="html.parser"):
+    """Extract the course rows for one subject page."""
+    page_data = []
+    print(f"Scraping {code}...")
+    names, course_desc = PARSER_BACKENDS[parser](response_html)
+    course_prereq = parse_prereqs(course_desc)
+
+    for name, prereq in zip(names, course_prereq):
+        parts = name.split(".")
+        title = parts[1].split(" (")[0].strip() if len(parts) > 1 else ""
+#        print(f"Processing {parts[0]}...")
+        if not title:
+            continue
+        page_data.append({
+            "Subject": code,
+            "Code": parts[0],
+            "Title": title,
+            "Prerequisites": prereq,
+        })
+    return page_data
+
+
+def scrape_courses(subject_codes, blank_url=BLANK_URL, headers=DEFAULT_HEADERS, cache=None, parser="html.parser"):
     all_data = []
     for code in subject_codes:
-        response_html = fetch_html(code, blank_url=blank_url, headers=headers)
-        soup = BeautifulSoup(response_html, "html.parser")
-        print(f"Scraping {code}...")
-        course_names = soup.find_all(class_="course-name")
-        course_desc = extract_descriptions(course_names)
-
-        codes = [name.get_text(strip=True).split(".")[0] for name in course_names]
-        titles = [
-            name.get_text(strip=True).split(".")[1].split(" (")[0].strip()
-            if len(name.get_text(strip=True).split(".")) > 1 else ""
-            for name in course_names
-        ]
-        course_prereq = parse_prereqs(course_desc)
-
-        for i in range(len(codes)):
-#            print(f"Processing {codes[i]}...")
-            if not titles[i]:
-                continue
-            all_data.append({
-                "Subject": code,
-                "Code": codes[i],
-                "Title": titles[i],
-                "Prerequisites": course_prereq[i],
-            })
+        response_html = fetch_html(code, blank_url=blank_url, headers=headers, cache=cache)
+        all_data.extend(parse_course_page(code, response_html, parser))
+    return all_data
+
+
+def build_courses_dataframe(subject_codes, blank_url=BLANK_URL, headers=DEFAULT_HEADERS, cache=None, parser="html.parser"):
+    all_data = scrape_courses(subject_codes, blank_url=blank_url, headers=headers, cache=cache, parser=parser)
+    return pd.DataFrame(all_data)
+
+
+class HostRateLimiter:
+    """Spaces out request starts so no host sees more than `rate` requests per second."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = {}
+        self.lock = asyncio.Lock()
+
+    async def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def get_with_retries(client, url, headers, limiter=None, retries=3, backoff=0.5):
+    """GET url on a shared client, retrying transport errors and 429/5xx with exponential backoff."""
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.wait(url)
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                count_response(response)
+                return response
+        await asyncio.sleep(backoff * 2 ** attempt)
+
+
+async def fetch_html_async(client, code, blank_url=BLANK_URL, limiter=None, retries=3, backoff=0.5, cache=None):
+    """Fetch one subject page on a shared client with get_with_retries, conditionally when cache holds it."""
+    url = blank_url.format(code)
+    if cache is not None and cache.offline:
+        return page_text(*cache.offline_body(url))
+    conditional = cache.conditional_headers(url) if cache is not None else {}
+    response = await get_with_retries(client, url, conditional, limiter, retries, backoff)
+    if cache is None:
+        return page_text(response.content, response.encoding)
+    try:
+        return page_text(*cache.resolve(url, response))
+    except FileNotFoundError:
+        if not conditional:
+            raise
+    # the cached body went missing after the conditional request was sent
+    response = await get_with_retries(client, url, {}, limiter, retries, backoff)
+    return page_text(*cache.resolve(url, response))
+
+
+async def scrape_courses_async(
+    subject_codes,
+    blank_url=BLANK_URL,
+    headers=DEFAULT_HEADERS,
+    concurrency=8,
+    rate_limit=None,
+    retries=3,
+    backoff=0.5,
+    cache=None,
+    parser="html.parser",
+):
+    """Concurrent scrape_courses: pages are fetched over one pooled AsyncClient, rows come back in subject order."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    limiter = HostRateLimiter(rate_limit)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(client, code):
+        async with semaphore:
+            return await fetch_html_async(
+                client, code, blank_url=blank_url, limiter=limiter, retries=retries, backoff=backoff, cache=cache
+            )
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30.0) as client:
+        pages = await asyncio.gather(*(fetch(client, code) for code in subject_codes))
+
+    all_data = []
+    for code, response_html in zip(subject_codes, pages):
+        all_data.extend(parse_course_page(code, response_html, parser))
     return all_data
 
 
-def build_courses_dataframe(subject_codes, blank_url=BLANK_URL, headers=DEFAULT_HEADERS):
-    all_data = scrape_courses(subject_codes, blank_url=blank_url, headers=headers)
+def build_courses_dataframe_async(subject_codes, blank_url=BLANK_URL, headers=DEFAULT_HEADERS, **kwargs):
+    """Same DataFrame as build_courses_dataframe, scraped with scrape_courses_async."""
+    all_data = asyncio.run(scrape_courses_async(subject_codes, blank_url=blank_url, headers=headers, **kwargs))
     return pd.DataFrame(all_data)
 
 
@@ -60,10 +227,38 @@ def save_courses_csv(df, path):
     df.to_csv(path, index=False)
     print(f"Saved {path}")
 
-def fetch_html(code, blank_url=BLANK_URL, headers=DEFAULT_HEADERS):
+def count_response(response):
+    metrics.count("pages_fetched")
+    metrics.count("bytes_downloaded", len(response.content))
+    if response.status_code == 304:
+        metrics.count("pages_not_modified")
+
+
+def page_text(body, encoding):
+    """Decode a page body once, the way httpx decodes response.text."""
+    return body.decode(encoding or "utf-8", errors="replace")
+
+
+def fetch_html(code, blank_url=BLANK_URL, headers=DEFAULT_HEADERS, cache=None):
     url = blank_url.format(code)
+    if cache is None:
+        response = httpx.get(url, headers=headers)
+        count_response(response)
+        return page_text(response.content, response.encoding)
+    if cache.offline:
+        return page_text(*cache.offline_body(url))
+    conditional = cache.conditional_headers(url)
+    response = httpx.get(url, headers={**headers, **conditional})
+    count_response(response)
+    try:
+        return page_text(*cache.resolve(url, response))
+    except FileNotFoundError:
+        if not conditional:
+            raise
+    # the cached body went missing after the conditional request was sent
     response = httpx.get(url, headers=headers)
-    return response.text
+    count_response(response)
+    return page_text(*cache.resolve(url, response))
 
 def extract_descriptions(course_names):
     descriptions = []
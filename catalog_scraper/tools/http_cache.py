@@ -0,0 +1,88 @@
+from pathlib import Path
+import hashlib
+import json
+
+
+class PageCache:
+    """Persistent on-disk cache of fetched pages, keyed by URL.
+
+    Each entry is a body file plus a small JSON sidecar holding the URL, the
+    response encoding and the ETag / Last-Modified validators, which are sent
+    back as conditional request headers so an unchanged page costs a 304
+    instead of a full download. Bodies are kept as the exact bytes the server
+    sent; pages come back as (body, encoding) for the caller to decode.
+    """
+
+    def __init__(self, directory, offline=False):
+        self.directory = Path(directory)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.html", self.directory / f"{key}.json"
+
+    def load(self, url):
+        """Return (meta, body bytes) for a cached URL, or None."""
+        body_path, meta_path = self._paths(url)
+        if not body_path.exists() or not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        return meta, body_path.read_bytes()
+
+    def conditional_headers(self, url):
+        cached = self.load(url)
+        if cached is None:
+            return {}
+        meta, _ = cached
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def offline_body(self, url):
+        """Serve a page from the cache without touching the network, as (body, encoding)."""
+        cached = self.load(url)
+        if cached is None:
+            raise FileNotFoundError(f"No cached page for {url} (offline mode)")
+        self.hits += 1
+        meta, body = cached
+        return body, meta.get("encoding")
+
+    def resolve(self, url, response):
+        """Turn a (possibly conditional) response into (body, encoding), updating the cache.
+
+        A 304 for a page whose cached body has gone missing cannot be answered:
+        the entry is dropped, so its validators are not sent again, and
+        FileNotFoundError is raised for the caller to fetch the page unconditionally.
+        """
+        if response.status_code == 304:
+            cached = self.load(url)
+            if cached is None:
+                self.discard(url)
+                raise FileNotFoundError(f"No cached page for {url} to answer a 304")
+            self.hits += 1
+            meta, body = cached
+            return body, meta.get("encoding")
+        self.misses += 1
+        if response.status_code == 200:
+            self.store(url, response.content, response.encoding, response.headers)
+        return response.content, response.encoding
+
+    def discard(self, url):
+        for path in self._paths(url):
+            path.unlink(missing_ok=True)
+
+    def store(self, url, body, encoding, headers):
+        body_path, meta_path = self._paths(url)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        body_path.write_bytes(body)
+        meta_path.write_text(json.dumps({
+            "url": url,
+            "encoding": encoding,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }), encoding="utf-8")
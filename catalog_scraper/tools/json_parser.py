@@ -1,12 +1,16 @@
 from datetime import date, datetime, timezone
 from pathlib import Path
-import json
+import csv
 import re
 from dataclasses import dataclass
-from typing import List, Union
+from functools import lru_cache
+from typing import List, Tuple, Union
 
 import pandas as pd
 
+# shared with the data/helpers stages; the entry points put data/helpers on sys.path
+from artifacts import RecordStream
+
 # Course pattern
 COURSE_RE = re.compile(r"^([A-Z]{2,6})\s*-?\s*(\d{1,3}[A-Z]{0,2})$")
 
@@ -44,179 +48,136 @@ def find_prereq_boundary(raw_str: str) -> str:
     return raw_str.strip()
 
 
-def tokenize(text: str) -> List[str]:
-    # Normalize the text
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # Remove Math Placement Exam references (including "qualifying score")
-    text = re.sub(r'Math\s+Placement\s+Exam(\s+qualifying)?(\s+score)?(\s+of\s+\d+)?', '', text, flags=re.IGNORECASE)
-    
-    # Remove AP exam score clauses (e.g., "AP Calculus BC score of 4 or 5", "AP Calculus AB score (or subscore) of 2")
-    text = re.sub(r'AP\s+[A-Za-z\s]+score\s*(\(or\s+subscore\))?\s*of\s+\d+(\s+or\s+\d+)?', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\b[A-Z]{2}\s+score\s*(\(or\s+subscore\))?\s*of\s+\d+(\s+or\s+\d+)?', '', text, flags=re.IGNORECASE)
-
-    # Remove grade requirements 
-    text = re.sub(r'\s+with\s+a\s+grade\s+of\s+[A-Za-z0-9+-–]+(\s+or\s+(above|better))?', '', text, flags=re.IGNORECASE)
-
-    # Remove GPA requirements (e.g., "GPA of 2", "GPA of 2.5 or higher")
-    text = re.sub(r'\bGPA\s+of\s+\d+(\.\d+)?(\s+or\s+(higher|above|better))?', '', text, flags=re.IGNORECASE)
+# Clauses stripped before tokenizing, as one alternation so the text is scanned once
+NOISE_RE = re.compile("|".join([
+    # Math Placement Exam references (including "qualifying score")
+    r'Math\s+Placement\s+Exam(?:\s+qualifying)?(?:\s+score)?(?:\s+of\s+\d+)?',
+    # AP exam score clauses (e.g., "AP Calculus BC score of 4 or 5", "AP Calculus AB score (or subscore) of 2")
+    r'AP\s+[A-Za-z\s]+score\s*(?:\(or\s+subscore\))?\s*of\s+\d+(?:\s+or\s+\d+)?',
+    r'\b[A-Z]{2}\s+score\s*(?:\(or\s+subscore\))?\s*of\s+\d+(?:\s+or\s+\d+)?',
+    # Grade requirements
+    r'\s+with\s+a\s+grade\s+of\s+[A-Za-z0-9+-–]+(?:\s+or\s+(?:above|better))?',
+    # GPA requirements (e.g., "GPA of 2", "GPA of 2.5 or higher")
+    r'\bGPA\s+of\s+\d+(?:\.\d+)?(?:\s+or\s+(?:higher|above|better))?',
+]), re.IGNORECASE)
+
+# Token shapes
+DEPT_RE = re.compile(r'^[A-Z]{2,6}$')
+NUMBER_RE = re.compile(r'^\d{1,3}[A-Z]{0,2}$')
+NUMBER_RANGE_RE = re.compile(r'^\d{1,3}[A-Z]{0,2}(-[A-Z0-9]+)*$')
+BASE_NUMBER_RE = re.compile(r'^(\d{1,3})([A-Z]{0,2})')
+LETTER_SUFFIX_RE = re.compile(r'^[A-Z]{1,2}$')
+COURSE_BASE_RE = re.compile(r'^([A-Z]{2,6})(\d{1,3})')
+OPERATORS = {'and': 'AND', 'or': 'OR'}
+# Token kind of course codes; operators are their own kind
+COURSE = 'COURSE'
+
+
+def clean_prereq_text(text: str) -> str:
+    """Drop placement exam, AP score, grade and GPA clauses; whitespace runs are left to the tokenizer's split()."""
+    return NOISE_RE.sub('', text)
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """Lex prerequisite text into (kind, text) pairs: ("AND", "and"), ("OR", "or") or ("COURSE", "CSE12").
+
+    Every COURSE token is a complete course code, so the parser never has to
+    re-check token shapes.
+    """
+    raw_tokens = [token.strip(' ,') for token in clean_prereq_text(text).split()]
 
     tokens = []
     prev_dept = None
-    
-    raw_tokens = text.split()
-    
+    n = len(raw_tokens)
+
     i = 0
-    while i < len(raw_tokens):
-        token = raw_tokens[i].strip(' ,')
-        
+    while i < n:
+        token = raw_tokens[i]
+        i += 1
+
         if not token:
-            i += 1
             continue
-            
-        token_lower = token.lower()
-        
+
         # Check for AND/OR keywords
-        if token_lower == 'and':
-            tokens.append('AND')
-            i += 1
-            continue
-        elif token_lower == 'or':
-            tokens.append('OR')
-            i += 1
+        operator = OPERATORS.get(token.lower())
+        if operator:
+            tokens.append((operator, token))
             continue
-        
-        # Try to combine with next token to form course code (e.g., "CSE" + "12")
+
         token_upper = token.upper()
-        
-        # Check if this is a department code followed by a number
-        if re.match(r'^[A-Z]{2,6}$', token_upper) and i + 1 < len(raw_tokens):
-            next_token = raw_tokens[i + 1].strip(' ,').upper()
-            # Check if next token is a course number or number with range
-            if re.match(r'^\d{1,3}[A-Z]{0,2}(-[A-Z0-9]+)*$', next_token):
-                # Combine them
-                combined = token_upper + next_token
-                # Handle ranges like "20A-B-C"
-                if '-' in next_token:
-                    parts = next_token.split('-')
-                    base_num = re.match(r'^(\d{1,3})([A-Z]{0,2})', parts[0])
-                    if base_num:
-                        # First part is complete
-                        first_course = token_upper + parts[0]
-                        tokens.append(first_course)
-                        prev_dept = token_upper
-                        # Rest are letter suffixes
-                        for part in parts[1:]:
-                            part = part.strip()
-                            if re.match(r'^[A-Z]{1,2}$', part):
-                                tokens.append(token_upper + base_num.group(1) + part)
-                            elif re.match(r'^\d{1,3}[A-Z]{0,2}$', part):
-                                tokens.append(token_upper + part)
-                else:
-                    tokens.append(token_upper + next_token)
-                    prev_dept = token_upper
-                i += 2
+
+        # Department code followed by a course number or range (e.g., "CSE" + "12", "MATH" + "20A-B-C")
+        if i < n and DEPT_RE.match(token_upper):
+            next_token = raw_tokens[i].upper()
+            if NUMBER_RANGE_RE.match(next_token):
+                i += 1
+                prev_dept = token_upper
+                if '-' not in next_token:
+                    tokens.append((COURSE, token_upper + next_token))
+                    continue
+                parts = next_token.split('-')
+                base_num = BASE_NUMBER_RE.match(parts[0]).group(1)
+                tokens.append((COURSE, token_upper + parts[0]))
+                # Rest are letter suffixes or full numbers
+                for part in parts[1:]:
+                    if LETTER_SUFFIX_RE.match(part):
+                        tokens.append((COURSE, token_upper + base_num + part))
+                    elif NUMBER_RE.match(part):
+                        tokens.append((COURSE, token_upper + part))
                 continue
-        
+
         # Check if it's already a complete course code
-        if looks_like_course(token_upper):
-            tokens.append(token_upper)
-            prev_dept = extract_dept(token_upper)
-            i += 1
+        course = COURSE_RE.match(token_upper)
+        if course:
+            tokens.append((COURSE, token_upper))
+            prev_dept = course.group(1)
             continue
-        
+
         # Check if it's a number/range that needs department filled in
         if prev_dept:
-            # Handle ranges like "31BH" or "4A-B-C-D"
+            # Handle ranges like "4A-B-C-D"
             if '-' in token_upper:
-                parts = token_upper.split('-')
-                for part in parts:
-                    part = part.strip()
+                for part in token_upper.split('-'):
                     if not part:
                         continue
-                    if re.match(r'^\d{1,3}[A-Z]{0,2}$', part):
-                        tokens.append(prev_dept + part)
-                    elif re.match(r'^[A-Z]{1,2}$', part) and tokens:
+                    if NUMBER_RE.match(part):
+                        tokens.append((COURSE, prev_dept + part))
+                    elif LETTER_SUFFIX_RE.match(part) and tokens:
                         # Letter continuation - get base from last token
-                        last = tokens[-1]
-                        base = re.match(r'^([A-Z]{2,6})(\d{1,3})', last)
+                        base = COURSE_BASE_RE.match(tokens[-1][1])
                         if base:
-                            tokens.append(base.group(1) + base.group(2) + part)
-                i += 1
-                continue
-            elif re.match(r'^\d{1,3}[A-Z]{0,2}$', token_upper):
-                tokens.append(prev_dept + token_upper)
-                i += 1
-                continue
-        
-        # Unknown token - skip it
-        i += 1
-    
+                            tokens.append((COURSE, base.group(1) + base.group(2) + part))
+            elif NUMBER_RE.match(token_upper):
+                tokens.append((COURSE, prev_dept + token_upper))
+
+        # Unknown tokens are skipped
+
     return tokens
 
 
-def parse_to_groups(tokens: List[str]) -> Union[Course, OrExpr, AndExpr, None]:
+def parse_to_groups(tokens: List[Tuple[str, str]]) -> Union[Course, OrExpr, AndExpr, None]:
     """
     Example: A and B or C and D 
     Parses as: A and (B or C) and D -> AndExpr([A, OrExpr([B, C]), D])
+
+    One pass over tokenize's pairs: OR binds tighter, so each AND closes the
+    current OR group. Leading, trailing and repeated operators add nothing.
     """
-    if not tokens:
-        return None
-    
-    # Filter to only course tokens and operators
-    filtered = []
-    for t in tokens:
-        if t in ('AND', 'OR') or looks_like_course(t):
-            filtered.append(t)
-    
-    if not filtered:
-        return None
-    
-    # Remove leading/trailing operators
-    while filtered and filtered[0] in ('AND', 'OR'):
-        filtered.pop(0)
-    while filtered and filtered[-1] in ('AND', 'OR'):
-        filtered.pop()
-    
-    if not filtered:
-        return None
-    
-    # First pass: group by OR (higher precedence)
-    and_groups = []
+    and_items = []
     current_or_group = []
-    
-    i = 0
-    while i < len(filtered):
-        token = filtered[i]
-        
-        if token == 'AND':
-            # Finish current OR group, start new one
-            if current_or_group:
-                and_groups.append(current_or_group)
-                current_or_group = []
-        elif token == 'OR':
-            # Continue building current OR group
-            pass
-        else:
-            # It's a course
-            current_or_group.append(Course(code=token))
-        
-        i += 1
-    
+    for kind, text in tokens:
+        if kind == COURSE:
+            current_or_group.append(Course(code=text))
+        elif kind == 'AND' and current_or_group:
+            and_items.append(current_or_group[0] if len(current_or_group) == 1 else OrExpr(items=current_or_group))
+            current_or_group = []
+
     if current_or_group:
-        and_groups.append(current_or_group)
-    
-    if not and_groups:
+        and_items.append(current_or_group[0] if len(current_or_group) == 1 else OrExpr(items=current_or_group))
+
+    if not and_items:
         return None
-    
-    # Each and_group is a list of courses connected by OR
-    and_items = []
-    for or_group in and_groups:
-        if len(or_group) == 1:
-            and_items.append(or_group[0])
-        elif len(or_group) > 1:
-            and_items.append(OrExpr(items=or_group))
-    
+
     # Always wrap in AndExpr, even if there's only one item
     return AndExpr(items=and_items)
 
@@ -243,6 +204,12 @@ def ast_to_dict(node: Union[Course, OrExpr, AndExpr, None]) -> dict | None:
     return None
 
 
+@lru_cache(maxsize=4096)
+def parse_prereq_groups(prereq_part: str) -> Union[Course, OrExpr, AndExpr, None]:
+    """Memoized tokenize + parse_to_groups. The returned nodes are shared, so treat them as read-only."""
+    return parse_to_groups(tokenize(prereq_part))
+
+
 def parse_prereqs(raw_str: str) -> dict:
     if not raw_str or raw_str.strip().lower() == "none" or raw_str.strip() == "":
         return {
@@ -260,11 +227,8 @@ def parse_prereqs(raw_str: str) -> dict:
     # Get just the prerequisite part
     prereq_part = find_prereq_boundary(raw_str)
     
-    # Tokenize
-    tokens = tokenize(prereq_part)
-    
-    # Parse 
-    groups = parse_to_groups(tokens)
+    # Tokenize and parse (memoized, many courses share the same text)
+    groups = parse_prereq_groups(prereq_part)
     
     return {
         "groups": groups,
@@ -277,26 +241,56 @@ def load_courses_csv(path):
     return pd.read_csv(path, encoding="utf-8")
 
 
-def generate_webreg_json(df, output_path):
-    version = date.today().isoformat()
-    generated_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+# Cell values pandas.read_csv treats as missing by default
+CSV_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+def iter_courses_csv(path):
+    """Lazily yield (code, title, raw_prereq) rows from the scraper CSV, with missing prerequisites as ""."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        code_idx, title_idx, prereq_idx = (header.index(col) for col in ("Code", "Title", "Prerequisites"))
+        for row in reader:
+            raw_prereq = row[prereq_idx]
+            yield row[code_idx], row[title_idx], "" if raw_prereq in CSV_NA_VALUES else raw_prereq
 
-    output = []
 
-    for _, row in df.iterrows():
-        raw_prereq = row["Prerequisites"]
-        if raw_prereq is None or pd.isna(raw_prereq):
+def iter_dataframe_rows(df):
+    """Yield (code, title, raw_prereq) tuples from a scraper DataFrame, with missing prerequisites as "".
+
+    Cells the CSV would read back as missing count as missing here too, so a
+    freshly scraped DataFrame gives the same records as its saved CSV.
+    """
+    for code, title, raw_prereq in df[["Code", "Title", "Prerequisites"]].itertuples(index=False, name=None):
+        if raw_prereq is None or pd.isna(raw_prereq) or raw_prereq in CSV_NA_VALUES:
             raw_prereq = ""
-        raw_prereq = str(raw_prereq)
+        yield code, title, str(raw_prereq)
+
+
+def webreg_records(df, version=None, generated_at=None):
+    """Catalog records for a scraper DataFrame, as a list."""
+    return list(iter_webreg_records(iter_dataframe_rows(df), version, generated_at))
+
+
+def iter_webreg_records(rows, version=None, generated_at=None):
+    """Convert (code, title, raw_prereq) rows into catalog records one at a time."""
+    meta = {
+        "version": version or date.today().isoformat(),
+        "generated_at": generated_at or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
 
+    for code, title, raw_prereq in rows:
         parsed = parse_prereqs(raw_prereq)
         groups = parsed.get("groups") 
         notes = parsed.get("notes", [])
         parseable = parsed.get("parseable", False)
 
         course_obj = {
-            "code": row["Code"],
-            "title": row["Title"],
+            "code": code,
+            "title": title,
             "raw_prereq": raw_prereq,
             "parseable": parseable,
             "notes": notes,
@@ -305,26 +299,36 @@ def generate_webreg_json(df, output_path):
         if groups is not None:
             course_obj["prereq"] = ast_to_dict(groups)  
 
-        output.append({
-            "meta": {
-                "version": version,
-                "generated_at": generated_at
-            },
+        yield {
+            "meta": dict(meta),
             "course": course_obj
-        })
+        }
+
+
+def write_webreg_json(records, output_path, fmt="pretty"):
+    """Stream records to output_path as each one is ready; returns how many were written.
+
+    fmt is any artifact format. "pretty" is byte-identical to json.dump(list, indent=2);
+    ndjson and msgpack swap the .json suffix for their own.
+    """
+    with RecordStream(output_path, fmt) as stream:
+        for record in records:
+            stream.write(record)
+    return stream.count
+
+
+def generate_webreg_json(df, output_path, fmt="pretty"):
+    """Write the catalog JSON for a scraper DataFrame; returns the number of courses written."""
+    return write_webreg_json(iter_webreg_records(iter_dataframe_rows(df)), output_path, fmt)
+
 
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
-    return output
+def generate_webreg_json_from_csv(csv_path, output_path, fmt="pretty"):
+    """Stream the scraper CSV straight to catalog JSON without loading either into memory."""
+    return write_webreg_json(iter_webreg_records(iter_courses_csv(csv_path)), output_path, fmt)
 
 
 def main():
-    df = load_courses_csv("catalog_scraper/all_courses.csv")
-    output_path = Path("data/catalog_data.json")
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    generate_webreg_json(df, output_path)
+    generate_webreg_json_from_csv("catalog_scraper/all_courses.csv", Path("data/catalog_data.json"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+"""The data pipeline as a library: every stage takes and returns Python objects.
+
+The scripts hand their results to each other through files (all_courses.csv,
+catalog_data.json, combined.json); here the same stage functions are chained
+in one process, and writing a stage's result to disk is an optional side
+output:
+
+    import classgraph
+
+    catalog = classgraph.catalog_records(classgraph.scrape_catalog())
+    combined = classgraph.merge_sources([classgraph.load_records("data/SOC_list.json"), catalog])
+    departments, splits = classgraph.build_asts(combined)
+
+    # or all of it, also writing the usual files
+    result = classgraph.rebuild(write=True)
+
+This module lives at the repository root so it can be imported from anywhere;
+catalog_scraper and data/helpers are appended to sys.path for their modules.
+"""
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent
+HELPERS = ROOT / "data" / "helpers"
+sys.path.append(str(ROOT / "catalog_scraper"))
+sys.path.append(str(HELPERS))
+
+import course_ast
+from artifacts import read_artifact, write_artifact
+from manifest import BuildManifest
+from cross_check import merge_courses
+
+
+def load_records(path):
+    """Course records from any artifact a stage wrote (combined.json, SOC_list.json, ...)."""
+    return read_artifact(str(path))
+
+
+def scrape_catalog(subject_codes=None, concurrency=8, rate_limit=10.0, cache=None, parser="html.parser", csv_path=None):
+    """Scrape the catalog into a DataFrame; subject_codes defaults to catalog_scraper/valid_codes.txt.
+
+    With csv_path, the DataFrame is also saved as the scraper CSV.
+    """
+    from tools.course_scraper import (
+        build_courses_dataframe,
+        build_courses_dataframe_async,
+        read_subject_codes,
+        save_courses_csv,
+    )
+
+    if subject_codes is None:
+        subject_codes = read_subject_codes(ROOT / "catalog_scraper" / "valid_codes.txt")
+    if concurrency > 1:
+        df = build_courses_dataframe_async(
+            subject_codes, concurrency=concurrency, rate_limit=rate_limit, cache=cache, parser=parser
+        )
+    else:
+        df = build_courses_dataframe(subject_codes, cache=cache, parser=parser)
+    if csv_path is not None:
+        save_courses_csv(df, csv_path)
+    return df
+
+
+def catalog_records(df, output=None, fmt="pretty", version=None, generated_at=None):
+    """Parse the prerequisites of a scraped DataFrame into catalog records.
+
+    With output, the records are also written there as catalog_data.json would be.
+    """
+    from tools.json_parser import webreg_records
+
+    records = webreg_records(df, version, generated_at)
+    if output is not None:
+        write_artifact(records, str(output), fmt)
+    return records
+
+
+def merge_sources(sources, output=None, fmt="pretty", compress=()):
+    """Merge course record lists in precedence order, as cross_check.py does.
+
+    With output, the merged list is also written there as combined.json would be.
+    """
+    combined = merge_courses(sources)
+    if output is not None:
+        write_artifact(combined, str(output), fmt, compress)
+    return combined
+
+
+def build_asts(records, split_nodes=course_ast.DEFAULT_SPLIT_NODES, output_dir=None, fmt=None, compress=()):
+    """Build the prerequisite trees of merged records: ({dept_code: [RootNode]}, {split code: RootNode}).
+
+    With output_dir, the trees are also written as course_ast.py writes them:
+    ast_index.json, the direct unlocks index and ast_manifest.json go next to
+    output_dir, and files whose inputs are unchanged are left alone. Call
+    .to_dict() on a RootNode for plain data.
+    """
+    departments, splits = course_ast.build_catalog_asts(records, split_nodes)
+    if output_dir is not None:
+        output_dir = str(output_dir)
+        data = Path(output_dir).parent
+        tree_fmt = course_ast.default_artifact_format("nested", fmt)
+        course_dict = course_ast.build_global_course_dict(records)
+        manifest = BuildManifest(str(data / "ast_manifest.json"), course_ast.manifest_salt("nested", fmt, compress))
+        manifest.set_courses(course_dict)
+
+        tasks, dept_files, _ = course_ast.department_tasks(records, output_dir, tree_fmt)
+        more_tasks, split_files = course_ast.split_tasks(course_dict, output_dir, tree_fmt, splits)
+        for task in tasks + more_tasks:
+            name, _, output_file, single = task
+            fingerprint = course_ast.task_fingerprint(manifest, task, course_dict)
+            manifest.record(output_file, fingerprint)
+            if manifest.is_fresh(output_file, fingerprint):
+                continue
+            roots = [splits[name]] if single else departments[name]
+            course_ast.write_ast(roots, output_file, single=single, artifact_format=tree_fmt, compress=compress)
+
+        course_ast.write_unlocks_index(
+            course_dict, str(data / "unlocks"), manifest=manifest, artifact_format=fmt or "minified", compress=compress
+        )
+        manifest.save()
+        course_ast.write_ast_index(str(data / "ast_index.json"), output_dir, dept_files, split_files, split_nodes)
+    return departments, splits
+
+
+def build_unlocks(records, transitive=False):
+    """{code: unlocks entry} for merged records, as written to data/unlocks."""
+    return course_ast.build_unlocks_index(course_ast.build_global_course_dict(records), transitive)
+
+
+def rebuild(soc_records=None, catalog=None, write=False, split_nodes=course_ast.DEFAULT_SPLIT_NODES):
+    """Run the whole build in this process and return every stage's result.
+
+    soc_records defaults to data/SOC_list.json (the SOC scraper is a Go
+    program). catalog may be a scraped DataFrame or catalog records; it
+    defaults to a fresh scrape. With write=True, each result is also written
+    where the scripts write it: the scraper CSV, catalog_data.json,
+    combined.json, and the trees, unlocks index and ast_manifest.json of course_ast.py.
+    """
+    data = ROOT / "data"
+    if soc_records is None:
+        soc_records = load_records(data / "SOC_list.json")
+    if catalog is None:
+        catalog = scrape_catalog(csv_path=ROOT / "catalog_scraper" / "all_courses.csv" if write else None)
+    if not isinstance(catalog, list):
+        catalog = catalog_records(catalog, data / "catalog_data.json" if write else None)
+
+    combined = merge_sources([soc_records, catalog], data / "combined.json" if write else None)
+    departments, splits = build_asts(combined, split_nodes, data / "ast" if write else None)
+    return {
+        "catalog": catalog,
+        "combined": combined,
+        "departments": departments,
+        "splits": splits,
+        "unlocks": build_unlocks(combined),
+    }
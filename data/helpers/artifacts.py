@@ -0,0 +1,234 @@
+"""Shared writers and readers for pipeline artifacts.
+
+Every stage writes its JSON-shaped output through write_artifact (or, for
+streamed lists, RecordStream) so the encoding is chosen by one common
+option instead of a hardcoded json.dump(..., indent=2):
+
+    pretty    indented JSON, the historical format
+    minified  JSON without whitespace
+    fast      minified JSON through orjson when it is installed
+    ndjson    one JSON value per line (lists only)
+    msgpack   MessagePack (needs the msgpack package)
+
+Any artifact can also get precompressed .gz / .br siblings, with their sizes
+recorded in a SizeManifest.
+"""
+import gzip
+import json
+import os
+import struct
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # optional, "fast" falls back to minified json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional, only needed for "msgpack"
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # optional, only needed for brotli siblings
+    brotli = None
+
+ARTIFACT_FORMATS = ("pretty", "minified", "fast", "ndjson", "msgpack")
+COMPRESSIONS = {"gzip": ".gz", "brotli": ".br"}
+DEFAULT_SIZE_MANIFEST = "data/artifact_sizes.json"
+
+
+def artifact_path(path, fmt):
+    """Output path for fmt; ndjson and msgpack swap a .json suffix for their own."""
+    root, ext = os.path.splitext(path)
+    if fmt in ("ndjson", "msgpack") and ext == ".json":
+        return f"{root}.{fmt}"
+    return path
+
+
+def dumps(data, fmt="pretty"):
+    """Encode one value as bytes."""
+    if fmt == "pretty":
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    if fmt == "minified":
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if fmt == "fast":
+        if orjson is not None:
+            return orjson.dumps(data)
+        return dumps(data, "minified")
+    if fmt == "ndjson":
+        if not isinstance(data, list):
+            raise ValueError("ndjson artifacts must be lists")
+        return b"".join(dumps(item, "fast") + b"\n" for item in data)
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise ImportError("the msgpack artifact format needs the msgpack package")
+        return msgpack.packb(data, use_bin_type=True)
+    raise ValueError(f"Unknown artifact format {fmt!r}, expected one of {ARTIFACT_FORMATS}")
+
+
+def loads(raw, fmt):
+    """Decode bytes written by dumps."""
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise ImportError("reading msgpack artifacts needs the msgpack package")
+        return msgpack.unpackb(raw, raw=False)
+    if fmt == "ndjson":
+        return [json.loads(line) for line in raw.splitlines() if line.strip()]
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def compress_file(path, compress=()):
+    """Write precompressed siblings of path; returns {compression: size}."""
+    sizes = {}
+    if not compress:
+        return sizes
+    with open(path, "rb") as f:
+        raw = f.read()
+    for name in compress:
+        if name == "gzip":
+            packed = gzip.compress(raw, compresslevel=9, mtime=0)
+        elif name == "brotli":
+            if brotli is None:
+                raise ImportError("brotli siblings need the brotli package")
+            packed = brotli.compress(raw)
+        else:
+            raise ValueError(f"Unknown compression {name!r}, expected one of {tuple(COMPRESSIONS)}")
+        with open(path + COMPRESSIONS[name], "wb") as f:
+            f.write(packed)
+        sizes[name] = len(packed)
+    return sizes
+
+
+def write_artifact(data, path, fmt="pretty", compress=()):
+    """Write data to path in fmt plus any compressed siblings.
+
+    Returns (written_path, sizes) where sizes maps "bytes" and each compression to a byte count.
+    """
+    path = artifact_path(str(path), fmt)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    raw = dumps(data, fmt)
+    with open(path, "wb") as f:
+        f.write(raw)
+    return path, {"bytes": len(raw), **compress_file(path, compress)}
+
+
+def read_artifact(path):
+    """Read any artifact written by write_artifact, including .gz / .br siblings."""
+    path = str(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".gz"):
+        raw, path = gzip.decompress(raw), path[:-3]
+    elif path.endswith(".br"):
+        if brotli is None:
+            raise ImportError("reading .br artifacts needs the brotli package")
+        raw, path = brotli.decompress(raw), path[:-3]
+    ext = os.path.splitext(path)[1]
+    return loads(raw, {".msgpack": "msgpack", ".ndjson": "ndjson"}.get(ext, "json"))
+
+
+class RecordStream:
+    """Writes a list artifact one element at a time, so the list never has to exist in memory.
+
+    JSON formats are byte-identical to write_artifact(list, path, fmt). msgpack
+    decodes to the same list but always uses a fixed-width array32 header, which
+    is patched with the final count on close.
+    """
+
+    def __init__(self, path, fmt="pretty"):
+        if fmt not in ARTIFACT_FORMATS:
+            raise ValueError(f"Unknown artifact format {fmt!r}, expected one of {ARTIFACT_FORMATS}")
+        if fmt == "msgpack" and msgpack is None:
+            raise ImportError("the msgpack artifact format needs the msgpack package")
+        self.path = artifact_path(str(path), fmt)
+        self.fmt = fmt
+        self.count = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.file = open(self.path, "wb")
+        if fmt == "msgpack":
+            self.file.write(b"\xdd\x00\x00\x00\x00")
+        self.packer = msgpack.Packer(use_bin_type=True) if fmt == "msgpack" else None
+
+    def write(self, record):
+        if self.fmt == "msgpack":
+            self.write_encoded(self.packer.pack(record))
+        else:
+            self.write_encoded(dumps(record, "fast" if self.fmt == "ndjson" else self.fmt))
+
+    def write_encoded(self, encoded):
+        """Append a record already encoded as dumps(record, fmt) would (fast JSON for ndjson)."""
+        if self.fmt == "msgpack":
+            self.file.write(encoded)
+        elif self.fmt == "ndjson":
+            self.file.write(encoded + b"\n")
+        elif self.fmt == "pretty":
+            # Encoded JSON never contains a raw newline, so re-indenting by line is safe
+            self.file.write(b",\n  " if self.count else b"[\n  ")
+            self.file.write(encoded.replace(b"\n", b"\n  "))
+        else:
+            self.file.write(b"," if self.count else b"[")
+            self.file.write(encoded)
+        self.count += 1
+
+    def close(self):
+        if self.fmt == "msgpack":
+            self.file.seek(1)
+            self.file.write(struct.pack(">I", self.count))
+        elif self.fmt == "pretty":
+            self.file.write(b"\n]" if self.count else b"[]")
+        elif self.fmt != "ndjson":
+            self.file.write(b"]" if self.count else b"[]")
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SizeManifest:
+    """Byte sizes of written artifacts and their compressed siblings, merged across runs."""
+
+    def __init__(self, path=DEFAULT_SIZE_MANIFEST):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def record(self, path, sizes):
+        self.entries[os.path.normpath(path)] = sizes
+        metrics.record_file(path, sizes)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(self.entries.items())), f, indent=2, ensure_ascii=False)
+
+
+def add_artifact_arguments(parser, default="pretty"):
+    """The common output options every pipeline script accepts."""
+    parser.add_argument(
+        "--artifact-format",
+        choices=ARTIFACT_FORMATS,
+        default=default,
+        help=f"Encoding for written artifacts (default: {default or 'per stage'}).",
+    )
+    parser.add_argument(
+        "--compress",
+        action="append",
+        choices=tuple(COMPRESSIONS),
+        default=[],
+        help="Also write a precompressed sibling; repeat for several.",
+    )
+    parser.add_argument(
+        "--size-manifest",
+        default=DEFAULT_SIZE_MANIFEST,
+        help=f"Where to record artifact sizes (default: {DEFAULT_SIZE_MANIFEST}).",
+    )
@@ -2,6 +2,8 @@ import json
 
 
 class ASTNode:
+    __slots__ = ("code",)
+
     def __init__(self, code):
         self.code = code
 
@@ -13,29 +15,163 @@ class ASTNode:
 
 
 class ChildNode(ASTNode):
+    # Expansions are shared across trees, so nodes are kept small: type is a
+    # class constant and children is a tuple
+    __slots__ = ("children",)
+    type = "CHILD"
+
     def __init__(self, code, children):
         self.code = code
-        self.type = "CHILD"
-        self.children = children or []
+        self.children = tuple(children or ())
 
     def to_dict(self):
-        return {
-            "code": self.code,
-            "type": self.type,
-            "children": [child.to_dict() for child in self.children],
-        }
+        """Nested dict copy of the tree, built without recursion."""
+        root = {"code": self.code, "type": self.type, "children": []}
+        stack = [(self, root)]
+        while stack:
+            node, out = stack.pop()
+            for child in node.children:
+                if isinstance(child, ChildNode):
+                    entry = {"code": child.code, "type": child.type, "children": []}
+                    stack.append((child, entry))
+                else:
+                    entry = child.to_dict()
+                out["children"].append(entry)
+        return root
 
 
-class RootNode(ASTNode):
-    def __init__(self, code, children):
-        self.code = code
-        self.type = "ROOT"
-        self.children = children or []
+class RootNode(ChildNode):
+    __slots__ = ()
+    type = "ROOT"
 
-    def to_dict(self):
-        return {
-            "code": self.code,
-            "type": self.type,
-            "children": [child.to_dict() for child in self.children],
-        }
 
+def iter_json(roots, indent=None, single=False):
+    """Encode roots as JSON text chunks without building dicts or recursing.
+
+    The text is exactly what json.dumps gives for [root.to_dict() for root in
+    roots] (or roots[0].to_dict() when single) with ensure_ascii=False and,
+    without an indent, compact separators. Shared subtrees are simply encoded
+    each time they appear.
+    """
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    if indent is None:
+        def newline(level):
+            return ""
+        colon = ":"
+    else:
+        pads = {}
+
+        def newline(level):
+            pad = pads.get(level)
+            if pad is None:
+                pad = pads[level] = "\n" + " " * (indent * level)
+            return pad
+        colon = ": "
+
+    # stack of pending chunks (str) and (node, level) pairs, popped from the end
+    if single:
+        stack = [(roots[0], 0)]
+    elif not roots:
+        stack = ["[]"]
+    else:
+        stack = [newline(0) + "]"]
+        for i in range(len(roots) - 1, -1, -1):
+            stack.append((roots[i], 1))
+            stack.append(("[" if i == 0 else ",") + newline(1))
+
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        node, level = item
+        inner = newline(level + 1)
+        if not isinstance(node, ChildNode):
+            yield "{" + inner + '"code"' + colon + encode(node.code) + newline(level) + "}"
+            continue
+        head = (
+            "{" + inner + '"code"' + colon + encode(node.code) + ","
+            + inner + '"type"' + colon + encode(node.type) + ","
+            + inner + '"children"' + colon
+        )
+        children = node.children
+        if not children:
+            yield head + "[]" + newline(level) + "}"
+            continue
+        yield head + "["
+        stack.append(inner + "]" + newline(level) + "}")
+        child_pad = newline(level + 2)
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((children[i], level + 2))
+            stack.append(child_pad if i == 0 else "," + child_pad)
+
+
+def write_json(roots, path, indent=None, single=False, chunk_chars=1 << 16):
+    """Stream iter_json to path in buffered chunks; returns the number of bytes written."""
+    written = 0
+    buffer = []
+    buffered = 0
+    with open(path, "wb") as f:
+        for chunk in iter_json(roots, indent, single):
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= chunk_chars:
+                written += f.write("".join(buffer).encode("utf-8"))
+                buffer = []
+                buffered = 0
+        written += f.write("".join(buffer).encode("utf-8"))
+    return written
+
+
+def roots_to_dag(roots):
+    """Flatten a forest of AST nodes into a node table plus an edge list.
+
+    Structurally identical subtrees collapse into one node. Children always get
+    a lower index than their parent, and a node's edges are listed in child order.
+    """
+    nodes = []
+    edges = []
+    interned = {}
+    seen = {}
+
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in seen:
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children) if id(child) not in seen)
+                continue
+
+            child_ids = tuple(seen[id(child)] for child in node.children)
+            key = (node.code, node.type, child_ids)
+            idx = interned.get(key)
+            if idx is None:
+                idx = len(nodes)
+                interned[key] = idx
+                nodes.append({"code": node.code, "type": node.type})
+                edges.extend([idx, child] for child in child_ids)
+            seen[id(node)] = idx
+
+    return {
+        "format": "dag",
+        "roots": [seen[id(root)] for root in roots],
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+def dag_to_roots(dag):
+    """Rebuild the nested nodes from a roots_to_dag table. Shared subtrees stay shared."""
+    children = [[] for _ in dag["nodes"]]
+    for parent, child in dag["edges"]:
+        children[parent].append(child)
+
+    built = []
+    for idx, entry in enumerate(dag["nodes"]):
+        node_cls = RootNode if entry["type"] == "ROOT" else ChildNode
+        built.append(node_cls(entry["code"], [built[child] for child in children[idx]]))
+
+    return [built[idx] for idx in dag["roots"]]
@@ -0,0 +1,192 @@
+"""Whole-catalog transitive prerequisite closure as a packed bit matrix.
+
+Row b of the matrix has bit a set when course a is upstream of course b, i.e.
+a is reachable from b through any prerequisite branch. The rows are NumPy bit
+rows padded to whole 64-bit words. They are computed by sweeping the strongly
+connected components of the prerequisite graph level by level, prerequisites
+first. All components of a level are filled at once by one bitwise_or.reduceat
+over the rows of their direct prerequisites, so no course is expanded more than
+once.
+
+Like PrereqGraph.transitive_prerequisites, a course is never its own
+prerequisite, even when it sits on a prerequisite cycle; the other members of
+the cycle are.
+
+The matrix can be saved to a flat file and opened with mmap; a lookup then reads
+a single byte, without loading the matrix:
+
+    python data/helpers/closure.py --output data/closure.bin
+
+    closure = TransitiveClosure.open("data/closure.bin")
+    closure.is_upstream("MATH 20A", "CSE 100")
+
+File layout (little-endian): the 32-byte header below, then num_courses rows of
+row_bytes bytes starting at MATRIX_OFFSET, then the course codes as UTF-8, one per
+line, in ID order. Bits are packed least significant first, the layout
+np.unpackbits(..., bitorder="little") expects.
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from coursedict import lookup_code
+from query import PrereqGraph, strongly_connected_components
+
+MAGIC = b"CGTC"
+FORMAT_VERSION = 1
+# magic, version, num_courses, row_bytes, codes_offset, codes_length
+HEADER = struct.Struct("<4sIIIQQ")
+MATRIX_OFFSET = 64
+
+
+def word_bits(ids):
+    """(word index, mask) of the bits of course IDs in rows of 64-bit words."""
+    return ids >> 6, np.uint64(1) << (ids & 63).astype(np.uint64)
+
+
+def closure_matrix(graph):
+    """Packed (course, upstream course) matrix of transitive prerequisites for every course ID of graph.
+
+    Rows are padded to whole 64-bit words, which the sweep ORs a word at a time.
+    """
+    num_courses = len(graph)
+    row_words = (num_courses + 63) // 64
+    prereqs = graph.prereqs
+    components = list(strongly_connected_components(prereqs, range(num_courses)))
+    component_of = np.empty(num_courses, dtype=np.intp)
+    for component, members in enumerate(components):
+        component_of[members] = component
+
+    # a component's level is one more than the deepest component it depends on,
+    # so the components of one level never depend on each other
+    levels = [[] for _ in components]
+    level_of = [0] * len(components)
+    for component, members in enumerate(components):
+        inputs = sorted({prereq for member in members for prereq in prereqs[member]})
+        if not inputs:
+            continue
+        below = [level_of[component_of[prereq]] for prereq in inputs if component_of[prereq] != component]
+        level_of[component] = 1 + max(below, default=0)
+        levels[level_of[component]].append((members, inputs))
+
+    words = np.zeros((num_courses, row_words), dtype="<u8")
+    for level in levels:
+        if not level:
+            continue
+        counts = [len(inputs) for _, inputs in level]
+        inputs = np.fromiter((prereq for _, inputs_of in level for prereq in inputs_of), dtype=np.intp)
+        starts = np.cumsum([0] + counts[:-1], dtype=np.intp)
+        reach = np.bitwise_or.reduceat(words[inputs], starts, axis=0)
+        # plus the direct prerequisites themselves; members of a cycle list each other
+        columns, masks = word_bits(inputs)
+        np.bitwise_or.at(reach, (np.repeat(np.arange(len(level)), counts), columns), masks)
+        sizes = [len(members) for members, _ in level]
+        members = np.fromiter((member for members_of, _ in level for member in members_of), dtype=np.intp)
+        words[members] = np.repeat(reach, sizes, axis=0)
+    ids = np.arange(num_courses)
+    columns, masks = word_bits(ids)
+    words[ids, columns] &= ~masks
+    return words.view(np.uint8)
+
+
+class TransitiveClosure:
+    """Upstream checks over a packed closure matrix, held in memory or mapped from a file."""
+
+    def __init__(self, codes, matrix, buffer=None):
+        self.codes = codes
+        self.ids = {code: idx for idx, code in enumerate(codes)}
+        self.matrix = matrix
+        self.buffer = buffer
+        self.row_bytes = matrix.shape[1]
+
+    @classmethod
+    def build(cls, graph):
+        return cls(list(graph.codes), closure_matrix(graph))
+
+    @classmethod
+    def open(cls, path):
+        """Map a file written by save. Only the header and the code list are read up front."""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_courses, row_bytes, codes_offset, codes_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} closure file")
+        codes = buffer[codes_offset:codes_offset + codes_length].decode("utf-8").split("\n")
+        if len(codes) != num_courses:
+            raise ValueError(f"{path} lists {len(codes)} courses, expected {num_courses}")
+        matrix = np.frombuffer(buffer, dtype=np.uint8, count=num_courses * row_bytes, offset=MATRIX_OFFSET)
+        return cls(codes, matrix.reshape(num_courses, row_bytes), buffer=buffer)
+
+    def save(self, path):
+        """Write the matrix in the mmap-able layout described in the module docstring."""
+        codes = "\n".join(self.codes).encode("utf-8")
+        codes_offset = MATRIX_OFFSET + len(self.codes) * self.row_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.codes), self.row_bytes, codes_offset, len(codes)))
+            f.write(bytes(MATRIX_OFFSET - HEADER.size))
+            f.write(self.matrix.tobytes())
+            f.write(codes)
+        return codes_offset + len(codes)
+
+    def row(self, course):
+        """The closure row of a course ID, unpacked to one bool per course ID."""
+        return np.unpackbits(self.matrix[course], count=len(self.codes), bitorder="little").view(bool)
+
+    def id_of(self, code):
+        code = lookup_code(code)
+        try:
+            return self.ids[code]
+        except KeyError:
+            raise KeyError(f"Unknown course {code!r}") from None
+
+    def is_upstream(self, upstream, course):
+        """True if upstream is a transitive prerequisite of course."""
+        a, b = self.id_of(upstream), self.id_of(course)
+        return bool(self.matrix[b, a >> 3] >> (a & 7) & 1)
+
+    def prerequisites(self, course):
+        """Every transitive prerequisite of course, as codes; the same set as PrereqGraph.transitive_prerequisites."""
+        return {self.codes[idx] for idx in np.flatnonzero(self.row(self.id_of(course)))}
+
+    def upstream_pairs(self):
+        """Number of (upstream, course) pairs in the closure."""
+        return int(np.bitwise_count(self.matrix).sum())
+
+    def close(self):
+        if self.buffer is not None:
+            # the matrix is a view of the mapping, which cannot close while it is exported
+            self.matrix = None
+            self.buffer.close()
+            self.buffer = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the transitive prerequisite closure of the catalog.")
+    parser.add_argument(
+        "--input",
+        default="data/combined.json",
+        help="Merged course artifact to build from (default: data/combined.json).",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/closure.bin",
+        help="Where to write the memory-mappable matrix (default: data/closure.bin).",
+    )
+    args = parser.parse_args()
+
+    graph = PrereqGraph.load(args.input)
+    start = time.perf_counter()
+    closure = TransitiveClosure.build(graph)
+    elapsed = time.perf_counter() - start
+    size = closure.save(args.output)
+    pairs = closure.upstream_pairs()
+    print(f"Closure of {len(graph)} courses ({pairs} upstream pairs) in {elapsed:.2f}s -> {args.output} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
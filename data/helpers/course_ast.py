@@ -0,0 +1,989 @@
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from collections import defaultdict
+import metrics
+from astclass import RootNode, ChildNode, ASTNode, roots_to_dag, write_json
+from manifest import BuildManifest, hash_json, transitive_closure
+from coursedict import build_global_course_dict, normalize_code
+from artifacts import SizeManifest, add_artifact_arguments, artifact_path, compress_file, read_artifact, write_artifact
+from metrics import RunMetrics, add_metrics_arguments
+
+# Configuration for recursion control. Expansions are memoized, so these
+# only bound how large the nested department files get.
+RECURSION_CONFIG = {
+    # Courses that always get their own files, on top of the planned splits
+    "no_recurse_courses": set(),
+    # Filled in by plan_splits: courses whose trees live in their own files
+    # and stay unexpanded leaves everywhere else
+    "split_courses": set(),
+    # Departments with limited recursion depth, e.g. {"CHIN": 1}; the split
+    # budget already bounds every file, so none are capped
+    "dept_max_depth": {},
+    # Default max depth for all other courses 
+    "default_max_depth": None,
+}
+
+# Largest expanded tree, in nodes, a root may have before plan_splits cuts it up
+DEFAULT_SPLIT_NODES = 10000
+# Average size of one node in the pretty nested output, for byte budgets
+BYTES_PER_NODE = 400
+
+# "nested" writes full RootNode trees; "dag" writes a deduplicated node table plus edge list
+OUTPUT_FORMATS = ("nested", "dag")
+
+# "direct" indexes the courses that list a course as a prerequisite; "transitive" adds everything downstream
+UNLOCK_MODES = ("none", "direct", "transitive")
+
+def build(filestream, global_course_dict, cache=None, stubs=()):
+    """Build a RootNode per course. Roots listed in stubs are left without children."""
+    if cache is None:
+        cache = ExpansionCache(global_course_dict)
+    return_list = []
+    for course in filestream:
+        course_id = normalize_code(course.get("code"))
+        prereqs = course.get("prereq_ast", [])
+        if course_id in stubs:
+            return_list.append(RootNode(course_id, []))
+            continue
+        root = RootNode(course_id, find_children(prereqs, global_course_dict, depth=0, cache=cache))
+        return_list.append(root)
+    return return_list
+
+
+def get_max_depth_for_course(course_id):
+    """Determine the max recursion depth for a given course."""
+    if course_id in RECURSION_CONFIG["no_recurse_courses"] or course_id in RECURSION_CONFIG["split_courses"]:
+        return 0  # Never recurse into this course
+    
+    dept = get_department_code(course_id)
+    if dept in RECURSION_CONFIG["dept_max_depth"]:
+        return RECURSION_CONFIG["dept_max_depth"][dept]
+    
+    return RECURSION_CONFIG["default_max_depth"]
+
+
+def should_recurse(course_id, current_depth):
+    """Check if we should recurse into a course's prerequisites."""
+    max_depth = get_max_depth_for_course(course_id)
+    
+    # None means unlimited depth
+    if max_depth is None:
+        return True
+    
+    return current_depth < max_depth
+
+
+def prereq_course_ids(prereq_nodes):
+    """List the course codes referenced directly by a prerequisite AST."""
+    ids = []
+    for child in prereq_nodes or []:
+        ctype = child.get("type")
+        if ctype == "COURSE":
+            ids.append(normalize_code(child.get("course_id")))
+        elif ctype == "OR":
+            ids.extend(normalize_code(subchild.get("course_id")) for subchild in child.get("items", []))
+    return ids
+
+
+def find_cyclic_components(course_dict):
+    """Map every course that sits on a prerequisite cycle to its strongly connected component.
+
+    Iterative Tarjan, so long prerequisite chains can't hit the recursion limit.
+    Courses outside any cycle are left out of the mapping.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = {}
+    counter = 0
+
+    for start in course_dict:
+        if start in index:
+            continue
+        work = [(start, iter(prereq_course_ids(course_dict[start].get("prereq_ast"))))]
+        index[start] = lowlink[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+
+        while work:
+            node, successors = work[-1]
+            advanced = False
+            for succ in successors:
+                if succ not in course_dict:
+                    continue
+                if succ not in index:
+                    index[succ] = lowlink[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(prereq_course_ids(course_dict[succ].get("prereq_ast")))))
+                    advanced = True
+                    break
+                if succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    members.append(member)
+                    if member == node:
+                        break
+                if len(members) > 1:
+                    component = frozenset(members)
+                    for member in members:
+                        components[member] = component
+
+    return components
+
+
+def depth_horizon():
+    """Depth past which should_recurse gives the same answer for every course."""
+    caps = [0] if RECURSION_CONFIG["no_recurse_courses"] or RECURSION_CONFIG["split_courses"] else []
+    caps.extend(RECURSION_CONFIG["dept_max_depth"].values())
+    if RECURSION_CONFIG["default_max_depth"] is not None:
+        caps.append(RECURSION_CONFIG["default_max_depth"])
+    return max(caps, default=0)
+
+
+class ExpansionCache:
+    """Memoized course expansions shared across every root and department.
+
+    A course's subtree only depends on its clamped depth and, for courses on a
+    prerequisite cycle, on which members of its own cycle are already on the
+    path. Everything else is computed once and the ChildNode is reused.
+    """
+
+    def __init__(self, course_dict):
+        self.course_dict = course_dict
+        self.components = find_cyclic_components(course_dict)
+        self.horizon = depth_horizon()
+        self.expansions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, course_id, visited, depth):
+        component = self.components.get(course_id)
+        context = component & visited if component else frozenset()
+        return (course_id, min(depth, self.horizon), context)
+
+    def expand(self, course_id, visited, depth):
+        # prevent cycles
+        if course_id in visited:
+            return ChildNode(course_id, [])
+
+        key = self.key(course_id, visited, depth)
+        node = self.expansions.get(key)
+        if node is not None:
+            self.hits += 1
+            return node
+        self.misses += 1
+
+        # Check recursion limits
+        course_data = self.course_dict.get(course_id)
+        if not should_recurse(course_id, depth) or not course_data or not course_data.get("prereq_ast"):
+            node = ChildNode(course_id, [])
+        else:
+            # look up prereqs and recursion
+            children = find_children(course_data["prereq_ast"], self.course_dict, visited | {course_id}, depth + 1, self)
+            node = ChildNode(course_id, children)
+
+        self.expansions[key] = node
+        return node
+
+
+def find_children(prereq_nodes, course_dict, visited=None, depth=0, cache=None):
+    if visited is None:
+        visited = set()
+    if cache is None:
+        cache = ExpansionCache(course_dict)
+    
+    clist = []
+    if not prereq_nodes: 
+        return []
+    
+    for child in prereq_nodes:
+        ctype = child.get("type")
+        
+        if ctype == "COURSE":
+            course_id = normalize_code(child.get("course_id"))
+            clist.append(cache.expand(course_id, visited, depth))
+
+        elif ctype == "OR":
+            sublist = []
+            for subchild in child.get("items", []):
+                course_id = normalize_code(subchild.get("course_id"))
+                sublist.append(cache.expand(course_id, visited, depth))
+
+            clist.append(ChildNode("OR", sublist))
+
+    return clist
+
+
+class SizeEstimator:
+    """Node counts of fully expanded trees, computed from the graph without building them.
+
+    Sizes are memoized the way ExpansionCache memoizes expansions: a course on a
+    prerequisite cycle is counted per set of its cycle's members already on the
+    path, since the back edge to each of them is a single leaf. Depth caps are
+    applied as they are past the depth horizon, so only they make it approximate.
+    """
+
+    def __init__(self, course_dict, components=None):
+        self.course_dict = course_dict
+        self.components = find_cyclic_components(course_dict) if components is None else components
+        self.horizon = depth_horizon()
+        self.sizes = {}
+        self.in_progress = set()
+
+    def course_size(self, course_id):
+        if course_id in self.in_progress:
+            return 1
+        component = self.components.get(course_id)
+        key = (course_id, component & self.in_progress if component else frozenset())
+        if key in self.sizes:
+            return self.sizes[key]
+        course_data = self.course_dict.get(course_id)
+        if not course_data or not should_recurse(course_id, self.horizon):
+            return 1
+        self.in_progress.add(course_id)
+        size = 1 + self.prereq_size(course_data.get("prereq_ast"))
+        self.in_progress.discard(course_id)
+        self.sizes[key] = size
+        return size
+
+    def prereq_size(self, prereq_nodes):
+        total = 0
+        for child in prereq_nodes or []:
+            ctype = child.get("type")
+            if ctype == "COURSE":
+                total += self.course_size(normalize_code(child.get("course_id")))
+            elif ctype == "OR":
+                total += 1 + sum(self.course_size(normalize_code(sub.get("course_id"))) for sub in child.get("items", []))
+        return total
+
+    def root_size(self, prereq_nodes):
+        return 1 + self.prereq_size(prereq_nodes)
+
+
+def plan_splits(course_dict, max_nodes=DEFAULT_SPLIT_NODES):
+    """Choose the courses that get their own files so no root expands past max_nodes.
+
+    Works on SizeEstimator counts, before any tree is built. Each round, every
+    root still over budget cuts the largest not-yet-split course in its
+    prerequisite closure, which then stays a leaf everywhere else. Roots that
+    cannot get under budget that way get their own file too.
+
+    The same budget then holds for whole department files: a department whose
+    roots add up to more than max_nodes moves its largest roots into their own
+    files, leaving stubs behind, until its estimated total fits. A max_nodes of
+    0 or None turns planning off, leaving only the no_recurse_courses. The
+    result is stored in RECURSION_CONFIG["split_courses"] and returned.
+    """
+    split = set(RECURSION_CONFIG["no_recurse_courses"])
+    if not max_nodes:
+        RECURSION_CONFIG["split_courses"] = split
+        return split
+    components = find_cyclic_components(course_dict)
+    while True:
+        RECURSION_CONFIG["split_courses"] = split
+        estimator = SizeEstimator(course_dict, components)
+        chosen = set()
+        for code, course_data in course_dict.items():
+            prereqs = course_data.get("prereq_ast")
+            if estimator.root_size(prereqs) <= max_nodes:
+                continue
+            candidates = transitive_closure(prereq_course_ids(prereqs), course_dict, prereq_course_ids)
+            candidates -= split | {code}
+            best = max(candidates, key=lambda course_id: (estimator.course_size(course_id), course_id), default=None)
+            if best is not None and estimator.course_size(best) > 1:
+                chosen.add(best)
+        if not chosen:
+            break
+        split = split | chosen
+
+    split = split | {
+        code for code, course_data in course_dict.items()
+        if estimator.root_size(course_data.get("prereq_ast")) > max_nodes
+    }
+
+    departments = defaultdict(list)
+    for code in course_dict:
+        departments[get_department_code(code)].append(code)
+    while True:
+        RECURSION_CONFIG["split_courses"] = split
+        estimator = SizeEstimator(course_dict, components)
+        chosen = set()
+        for codes in departments.values():
+            # a split root stays in its department file as a single stub node
+            sizes = {
+                code: 1 if code in split else estimator.root_size(course_dict[code].get("prereq_ast"))
+                for code in codes
+            }
+            total = sum(sizes.values())
+            for code in sorted(codes, key=lambda code: (sizes[code], code), reverse=True):
+                if total <= max_nodes or sizes[code] <= 1:
+                    break
+                chosen.add(code)
+                total -= sizes[code] - 1
+        if not chosen:
+            break
+        # splitting a root also shortens the trees that reach it, so re-estimate
+        split = split | chosen
+
+    RECURSION_CONFIG["split_courses"] = split
+    return split
+
+
+def contained_stubs(prereq_lists, course_dict, stubs):
+    """Courses in stubs reachable from prereq_lists without passing through another one.
+
+    These are the split-out courses a tree built from those prerequisites shows as leaves.
+    """
+    found = set()
+    seen = set()
+    stack = [code for prereqs in prereq_lists for code in prereq_course_ids(prereqs)]
+    while stack:
+        code = stack.pop()
+        if code in seen:
+            continue
+        seen.add(code)
+        if code in stubs:
+            found.add(code)
+            continue
+        course_data = course_dict.get(code)
+        if course_data:
+            stack.extend(prereq_course_ids(course_data.get("prereq_ast")))
+    return found
+
+
+def filter_courses_by_department(webreg_data, dept_code):
+    """Filter courses by department code and extract prerequisite AST."""
+    courses = []
+    for course_entry in webreg_data:
+        course = course_entry.get("course", {})
+        code = normalize_code(course.get("code", ""))
+        
+        if code.startswith(dept_code):
+            courses.append({
+                "code": code,
+                "title": course.get("title", ""),
+                "prereq_ast": course.get("prereq").get("items") if course.get("prereq") else [],
+            })
+    
+    return courses
+
+
+def get_department_code(course_code):
+    if not course_code:
+        return ""
+    
+    code = normalize_code(course_code)
+    first_part = code.split()[0]
+    
+    if '/' in first_part:
+        first_part = first_part.split('/')[0]
+    
+    return first_part
+
+
+def group_courses_by_department(webreg_data):
+    """Group course records by department code."""
+    dept_courses = defaultdict(list)
+    for course_entry in webreg_data:
+        course = course_entry.get("course", {})
+        code = normalize_code(course.get("code", ""))
+        dept_code = get_department_code(code)
+        
+        if dept_code:
+            dept_courses[dept_code].append({
+                "code": code,
+                "title": course.get("title", ""),
+                "prereq_ast": course.get("prereq").get("items") if course.get("prereq") else [],
+            })
+    return dept_courses
+
+
+def department_file(output_dir, dept_code, fmt):
+    return artifact_path(os.path.join(output_dir, f"{dept_code.lower()}_ast.json"), fmt)
+
+
+def split_file(output_dir, code, fmt):
+    """Dedicated file of a split course, e.g. data/ast/split/cogs_118a_ast.json."""
+    name = re.sub(r"[^a-z0-9]+", "_", code.lower()).strip("_")
+    return artifact_path(os.path.join(output_dir, "split", f"{name}_ast.json"), fmt)
+
+
+def write_ast_index(index_file, output_dir, departments, split_files, max_nodes):
+    """Tell consumers which file holds each department and each split-out course.
+
+    Paths are relative to output_dir.
+    """
+    def relative(path):
+        return os.path.relpath(path, output_dir).replace(os.sep, "/")
+
+    return write_artifact({
+        "split_nodes": max_nodes,
+        "departments": {dept_code: relative(path) for dept_code, path in sorted(departments.items())},
+        "split": {code: relative(path) for code, path in sorted(split_files.items())},
+    }, index_file)
+
+
+def default_artifact_format(output_format, artifact_format=None):
+    """Nested trees stay pretty-printed by default; DAG tables are minified."""
+    if artifact_format:
+        return artifact_format
+    return "minified" if output_format == "dag" else "pretty"
+
+
+def write_ast(roots, output_file, output_format="nested", single=False, artifact_format=None, compress=()):
+    """Write roots in the requested format. A single root is written bare in the nested format.
+
+    Pretty and minified nested JSON is streamed straight from the nodes; the
+    other formats go through to_dict and write_artifact. Returns
+    (written_path, sizes) like write_artifact.
+    """
+    fmt = default_artifact_format(output_format, artifact_format)
+    if output_format == "dag":
+        return write_artifact(roots_to_dag(roots), output_file, fmt, compress)
+    if fmt not in ("pretty", "minified"):
+        data = roots[0].to_dict() if single else [root.to_dict() for root in roots]
+        return write_artifact(data, output_file, fmt, compress)
+
+    output_file = artifact_path(str(output_file), fmt)
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    size = write_json(roots, output_file, indent=2 if fmt == "pretty" else None, single=single)
+    return output_file, {"bytes": size, **compress_file(output_file, compress)}
+
+
+def manifest_salt(output_format, artifact_format=None, compress=()):
+    """Everything besides the course data that changes what gets written.
+
+    The planned splits are left out: each file's fingerprint covers the split
+    courses it actually contains, so a new plan only rewrites those files.
+    """
+    return {
+        "format": output_format,
+        "artifact": [default_artifact_format(output_format, artifact_format), sorted(compress)],
+        "recursion": {key: value for key, value in RECURSION_CONFIG.items() if key != "split_courses"},
+    }
+
+
+# Per-process state for parallel file builds, set once by init_worker
+_worker = {}
+
+
+def init_worker(global_course_dict, output_format, artifact_format=None, compress=(), split_courses=(), manifest=None):
+    # forked workers inherit the planned splits; spawned ones get them here
+    RECURSION_CONFIG["split_courses"] = set(split_courses)
+    _worker["course_dict"] = global_course_dict
+    _worker["cache"] = ExpansionCache(global_course_dict)
+    _worker["format"] = output_format
+    _worker["artifact_format"] = artifact_format
+    _worker["compress"] = compress
+    _worker["manifest"] = manifest
+
+
+def department_tasks(webreg_data, output_dir, fmt):
+    """Tasks writing one file per department; returns (tasks, {dept_code: path}, total courses)."""
+    tasks = []
+    dept_files = {}
+    for dept_code, courses in sorted(group_courses_by_department(webreg_data).items()):
+        output_file = department_file(output_dir, dept_code, fmt)
+        dept_files[dept_code] = output_file
+        tasks.append((dept_code, courses, output_file, False))
+    return tasks, dept_files, sum(len(task[1]) for task in tasks)
+
+
+def split_tasks(global_course_dict, output_dir, fmt, courses):
+    """Tasks writing each split course's whole tree to its own file; returns (tasks, {code: path})."""
+    tasks = []
+    split_files = {}
+    for code in sorted(courses):
+        course_data = global_course_dict.get(code, {})
+        output_file = split_file(output_dir, code, fmt)
+        split_files[code] = output_file
+        tasks.append((code, [{"code": code, "prereq_ast": course_data.get("prereq_ast", [])}], output_file, True))
+    return tasks, split_files
+
+
+def task_fingerprint(manifest, task, course_dict):
+    """Manifest fingerprint of a file task: its roots, their closure and the split courses it shows as stubs."""
+    _, courses, _, single = task
+    split = RECURSION_CONFIG["split_courses"]
+    roots = [(course["code"], course["prereq_ast"]) for course in courses]
+    # split roots of a department are stubs themselves; the others show the splits below them
+    own = set() if single else {code for code, _ in roots if code in split}
+    stubs = own | contained_stubs([prereqs for code, prereqs in roots if code not in own], course_dict, split)
+    return manifest.fingerprint(roots, course_dict, prereq_course_ids, stubs)
+
+
+def build_ast_file(task):
+    """Pool task: fingerprint one file and, unless it is fresh, build and write it.
+
+    A task is (name, courses, output_file, single): a department's courses, or
+    a split course alone with its whole tree. Returns
+    (task, roots, written_path, fingerprint, sizes, stats); sizes and stats
+    are None for a fresh file.
+    """
+    name, courses, output_file, single = task
+    course_dict = _worker["course_dict"]
+    split = RECURSION_CONFIG["split_courses"]
+    manifest = _worker["manifest"]
+    fingerprint = None
+    if manifest is not None:
+        fingerprint = task_fingerprint(manifest, task, course_dict)
+        if manifest.is_fresh(output_file, fingerprint):
+            return task, len(courses), output_file, fingerprint, None, None
+
+    cache = _worker["cache"]
+    hits, misses = cache.hits, cache.misses
+    wall, cpu = time.perf_counter(), time.process_time()
+    if single:
+        code, prereqs = courses[0]["code"], courses[0]["prereq_ast"]
+        roots = [RootNode(code, find_children(prereqs, course_dict, visited={code}, depth=0, cache=cache))]
+    else:
+        roots = build(courses, course_dict, cache, stubs=split)
+    built = time.perf_counter()
+    written, sizes = write_ast(
+        roots, output_file, _worker["format"], single=single,
+        artifact_format=_worker["artifact_format"], compress=_worker["compress"],
+    )
+    stats = {
+        "courses": len(roots),
+        "build_s": built - wall,
+        "write_s": time.perf_counter() - built,
+        "cpu_s": time.process_time() - cpu,
+        "nodes_expanded": cache.misses - misses,
+        "cache_hits": cache.hits - hits,
+        "bytes": sizes["bytes"],
+    }
+    return task, len(roots), written, fingerprint, sizes, stats
+
+
+def task_size(estimator, task):
+    """Estimated nodes a task writes; a department's split roots are single stubs."""
+    _, courses, _, single = task
+    split = RECURSION_CONFIG["split_courses"]
+    return sum(
+        1 if course["code"] in split and not single else estimator.root_size(course["prereq_ast"])
+        for course in courses
+    )
+
+
+def run_build_pool(tasks, global_course_dict, jobs, worker_args):
+    """Build files across a process pool, largest expected trees first.
+
+    With fork the course dictionary and manifest are inherited; otherwise they
+    are pickled once per worker.
+    """
+    estimator = SizeEstimator(global_course_dict)
+    tasks = sorted(tasks, key=lambda task: task_size(estimator, task), reverse=True)
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    ctx = multiprocessing.get_context(method)
+    with ctx.Pool(jobs, initializer=init_worker, initargs=(global_course_dict, *worker_args)) as pool:
+        yield from pool.imap_unordered(build_ast_file, tasks)
+
+
+def write_ast_files(
+    tasks,
+    global_course_dict,
+    output_format="nested",
+    manifest=None,
+    jobs=1,
+    artifact_format=None,
+    compress=(),
+    size_manifest=None,
+    cache=None,
+):
+    """Run department and split file tasks. With a BuildManifest, files whose inputs are unchanged are skipped.
+
+    jobs > 1 spreads the tasks, fingerprinting included, over that many worker
+    processes; serially they share cache. Written sizes are recorded in
+    size_manifest when one is given.
+    """
+    worker_args = (output_format, artifact_format, compress, sorted(RECURSION_CONFIG["split_courses"]), manifest)
+    if jobs > 1 and len(tasks) > 1:
+        results = run_build_pool(tasks, global_course_dict, min(jobs, len(tasks)), worker_args)
+    else:
+        init_worker(global_course_dict, *worker_args)
+        if cache is not None:
+            _worker["cache"] = cache
+        results = map(build_ast_file, tasks)
+
+    for (name, _, output_file, single), num_courses, written, fingerprint, sizes, stats in results:
+        kind = "split_files" if single else "departments"
+        if manifest is not None:
+            manifest.record(output_file, fingerprint)
+        if stats is None:
+            metrics.count(f"{kind}_fresh")
+            continue
+        if size_manifest is not None:
+            size_manifest.record(written, sizes)
+        metrics.detail(kind, name, stats)
+        metrics.count(f"{kind}_built")
+        metrics.count("nodes_expanded", stats["nodes_expanded"])
+        metrics.count("cache_hits", stats["cache_hits"])
+        if single:
+            print(f"Created separate AST for {name} -> {written}")
+        else:
+            print(f"Processed {num_courses} {name} courses -> {written}")
+
+
+def process_all_departments(
+    webreg_data,
+    output_dir,
+    output_format="nested",
+    manifest=None,
+    jobs=1,
+    artifact_format=None,
+    compress=(),
+    size_manifest=None,
+):
+    """Build and write every department. With a BuildManifest, unchanged departments are skipped.
+
+    jobs > 1 spreads the departments over that many worker processes. Written
+    sizes are recorded in size_manifest when one is given.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks, dept_files, total_courses = department_tasks(
+        webreg_data, output_dir, default_artifact_format(output_format, artifact_format)
+    )
+    write_ast_files(
+        tasks, build_global_course_dict(webreg_data), output_format, manifest, jobs, artifact_format, compress, size_manifest
+    )
+    return len(dept_files), total_courses, dept_files
+
+
+def process_catalog_dag(webreg_data, output_file, artifact_format="minified", compress=(), size_manifest=None):
+    """Write every department into one DAG file, with root indices listed per department."""
+    global_course_dict = build_global_course_dict(webreg_data)
+    cache = ExpansionCache(global_course_dict)
+
+    roots = []
+    departments = {}
+    for dept_code, courses in sorted(group_courses_by_department(webreg_data).items()):
+        dept_ast = build(courses, global_course_dict, cache)
+        departments[dept_code] = (len(roots), len(roots) + len(dept_ast))
+        roots.extend(dept_ast)
+
+    data = roots_to_dag(roots)
+    data["departments"] = {
+        dept_code: data["roots"][start:end] for dept_code, (start, end) in departments.items()
+    }
+    del data["roots"]
+
+    output_file, sizes = write_artifact(data, output_file, artifact_format, compress)
+    if size_manifest is not None:
+        size_manifest.record(output_file, sizes)
+
+    print(f"Processed {len(roots)} courses from {len(departments)} departments -> {output_file}")
+    return len(departments), len(roots)
+
+
+def build_catalog_asts(webreg_data, split_nodes=DEFAULT_SPLIT_NODES):
+    """Every department's trees and every split-out tree, built in memory.
+
+    The same trees main writes to data/ast, returned as
+    ({dept_code: [RootNode]}, {split code: RootNode}) for callers that want
+    them without a file round trip. split_nodes of 0 or None keeps every tree
+    whole. Like plan_splits, this leaves the splits in RECURSION_CONFIG.
+    """
+    global_course_dict = build_global_course_dict(webreg_data)
+    split_courses = plan_splits(global_course_dict, split_nodes)
+    cache = ExpansionCache(global_course_dict)
+
+    departments = {
+        dept_code: build(courses, global_course_dict, cache, stubs=split_courses)
+        for dept_code, courses in sorted(group_courses_by_department(webreg_data).items())
+    }
+    splits = {}
+    for code in sorted(split_courses):
+        prereq_ast = global_course_dict.get(code, {}).get("prereq_ast", [])
+        splits[code] = RootNode(code, find_children(prereq_ast, global_course_dict, visited={code}, depth=0, cache=cache))
+    return departments, splits
+
+
+def unlock_edges(course_dict):
+    """Reverse prerequisite edges: course -> {dependent: "AND" | "OR"}.
+
+    A dependent is "AND" when it lists the course as a plain prerequisite and
+    "OR" when the course is only one alternative of an OR group.
+    """
+    reverse = defaultdict(dict)
+    for code, course_data in course_dict.items():
+        for child in course_data.get("prereq_ast") or []:
+            ctype = child.get("type")
+            if ctype == "COURSE":
+                reverse[normalize_code(child.get("course_id"))][code] = "AND"
+            elif ctype == "OR":
+                for subchild in child.get("items", []):
+                    reverse[normalize_code(subchild.get("course_id"))].setdefault(code, "OR")
+    return reverse
+
+
+def reachable(start, adjacency):
+    """Everything reachable from start, excluding start itself."""
+    seen = {start}
+    stack = [start]
+    while stack:
+        for succ in adjacency.get(stack.pop(), ()):
+            if succ not in seen:
+                seen.add(succ)
+                stack.append(succ)
+    seen.discard(start)
+    return seen
+
+
+def split_branches(dependents):
+    """{code: branch} as sorted {"and": [...], "or": [...]} lists."""
+    return {
+        "and": sorted(code for code, branch in dependents.items() if branch == "AND"),
+        "or": sorted(code for code, branch in dependents.items() if branch == "OR"),
+    }
+
+
+def build_unlocks_index(course_dict, transitive=False):
+    """For every course that is some course's prerequisite, the courses it unlocks.
+
+    Transitive dependents are "AND" when a chain of plain prerequisites leads to
+    them, so they always need the course, and "OR" when every chain passes
+    through an OR alternative.
+    """
+    reverse = unlock_edges(course_dict)
+    and_only = {code: [dep for dep, branch in deps.items() if branch == "AND"] for code, deps in reverse.items()}
+
+    index = {}
+    for code, direct in reverse.items():
+        entry = {"direct": split_branches(direct)}
+        if transitive:
+            required = reachable(code, and_only)
+            entry["transitive"] = split_branches({
+                dep: "AND" if dep in required else "OR" for dep in reachable(code, reverse)
+            })
+        index[code] = entry
+    return index
+
+
+def write_unlocks_index(
+    course_dict,
+    output_dir,
+    transitive=False,
+    manifest=None,
+    artifact_format="minified",
+    compress=(),
+    size_manifest=None,
+):
+    """Write the unlocks index sharded by department, plus an index.json naming each shard.
+
+    A course's entry lives in the shard of its own department, so a lookup is
+    get_department_code(code) -> shard -> entry. Shards whose content did not
+    change are left alone when a BuildManifest is given.
+    """
+    shards = defaultdict(dict)
+    for code, entry in sorted(build_unlocks_index(course_dict, transitive).items()):
+        dept_code = get_department_code(code)
+        if dept_code:
+            shards[dept_code][code] = entry
+
+    shard_files = {}
+    for dept_code, shard in sorted(shards.items()):
+        output_file = artifact_path(os.path.join(output_dir, f"{dept_code.lower()}_unlocks.json"), artifact_format)
+        shard_files[dept_code] = os.path.basename(output_file)
+        if manifest is not None:
+            fingerprint = hash_json(shard)
+            manifest.record(output_file, fingerprint)
+            if manifest.is_fresh(output_file, fingerprint):
+                continue
+        output_file, sizes = write_artifact(shard, output_file, artifact_format, compress)
+        if size_manifest is not None:
+            size_manifest.record(output_file, sizes)
+
+    index_file, sizes = write_artifact(
+        {"format": "unlocks", "transitive": transitive, "shards": shard_files},
+        os.path.join(output_dir, "index.json"),
+        "pretty",
+    )
+    if manifest is not None:
+        manifest.record(index_file, hash_json(shard_files))
+    if size_manifest is not None:
+        size_manifest.record(index_file, sizes)
+
+    print(f"Wrote unlocks for {sum(map(len, shards.values()))} courses in {len(shards)} shards -> {output_dir}/")
+    return shard_files
+
+
+def create_seperate_ast(
+    global_course_dict,
+    output_dir,
+    cache=None,
+    output_format="nested",
+    manifest=None,
+    artifact_format=None,
+    compress=(),
+    size_manifest=None,
+    courses=None,
+    jobs=1,
+):
+    """Write each split course's full tree to its own file; returns {code: path}.
+
+    courses defaults to the planned RECURSION_CONFIG["split_courses"].
+    """
+    if courses is None:
+        courses = RECURSION_CONFIG["split_courses"]
+    tasks, split_files = split_tasks(
+        global_course_dict, output_dir, default_artifact_format(output_format, artifact_format), courses
+    )
+    write_ast_files(
+        tasks, global_course_dict, output_format, manifest, jobs, artifact_format, compress, size_manifest, cache
+    )
+    return split_files
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build prerequisite ASTs for every department from combined.json."
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="nested",
+        help="Output format for the AST files (default: nested).",
+    )
+    parser.add_argument(
+        "--catalog-dag",
+        metavar="PATH",
+        help="Also write the whole catalog as a single DAG file to PATH.",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rewrite every file instead of only those whose inputs changed.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes for department and split file builds (default: 1).",
+    )
+    parser.add_argument(
+        "--input",
+        default="data/combined.json",
+        help="Merged course artifact to build from (default: data/combined.json).",
+    )
+    parser.add_argument(
+        "--unlocks",
+        choices=UNLOCK_MODES,
+        default="direct",
+        help="Reverse dependency index to write alongside the ASTs (default: direct).",
+    )
+    parser.add_argument(
+        "--unlocks-dir",
+        default="data/unlocks",
+        help="Directory for the sharded unlocks index (default: data/unlocks).",
+    )
+    parser.add_argument(
+        "--split-nodes",
+        type=int,
+        default=DEFAULT_SPLIT_NODES,
+        metavar="N",
+        help=f"Give courses their own file so no tree exceeds N nodes, 0 for none (default: {DEFAULT_SPLIT_NODES}).",
+    )
+    parser.add_argument(
+        "--split-bytes",
+        type=int,
+        metavar="B",
+        help=f"Budget in bytes instead, estimated at {BYTES_PER_NODE} bytes per node.",
+    )
+    add_artifact_arguments(parser, default=None)
+    add_metrics_arguments(parser, "ast")
+    args = parser.parse_args()
+    artifact_options = {"artifact_format": args.artifact_format, "compress": args.compress}
+    size_manifest = SizeManifest(args.size_manifest)
+    run = RunMetrics.from_args("ast", args)
+
+    with run:
+        # Load data
+        with run.stage("load"):
+            webreg_data = read_artifact(args.input)
+            global_course_dict = build_global_course_dict(webreg_data)
+            metrics.count("courses", len(global_course_dict))
+
+        print("Processing all departments from combined.json...")
+        print("-" * 50)
+
+        # Process all departments
+        output_dir = "data/ast"
+        split_nodes = args.split_bytes // BYTES_PER_NODE if args.split_bytes else args.split_nodes
+        with run.stage("plan_splits"):
+            split_courses = plan_splits(global_course_dict, split_nodes)
+            metrics.count("split_courses", len(split_courses))
+        budget = f"budget {split_nodes} nodes" if split_nodes else "splitting off"
+        print(f"{len(split_courses)} courses split into their own files ({budget})")
+        with run.stage("fingerprint"):
+            manifest = BuildManifest("data/ast_manifest.json", manifest_salt(args.format, **artifact_options))
+            if args.full:
+                manifest.previous_files = {}
+            manifest.set_courses(global_course_dict)
+            metrics.count("changed_courses", len(manifest.changed_courses()))
+        print(f"{len(manifest.changed_courses())} courses changed since the last build")
+
+        with run.stage("ast_files"):
+            # departments and split files share one pool, so the workers' caches serve both
+            fmt = default_artifact_format(args.format, args.artifact_format)
+            tasks, dept_files, total_courses = department_tasks(webreg_data, output_dir, fmt)
+            more_tasks, split_files = split_tasks(global_course_dict, output_dir, fmt, split_courses)
+            write_ast_files(
+                tasks + more_tasks,
+                global_course_dict,
+                args.format,
+                manifest,
+                args.jobs,
+                size_manifest=size_manifest,
+                **artifact_options,
+            )
+            num_depts = len(dept_files)
+        if args.unlocks != "none":
+            with run.stage("unlocks"):
+                write_unlocks_index(
+                    global_course_dict,
+                    args.unlocks_dir,
+                    transitive=args.unlocks == "transitive",
+                    manifest=manifest,
+                    artifact_format=args.artifact_format or "minified",
+                    compress=args.compress,
+                    size_manifest=size_manifest,
+                )
+        manifest.save()
+        write_ast_index("data/ast_index.json", output_dir, dept_files, split_files, split_nodes)
+        if args.catalog_dag:
+            with run.stage("catalog_dag"):
+                process_catalog_dag(
+                    webreg_data,
+                    args.catalog_dag,
+                    default_artifact_format("dag", args.artifact_format),
+                    args.compress,
+                    size_manifest,
+                )
+        size_manifest.save()
+
+    print("-" * 50)
+    print(f"Summary: Processed {num_depts} departments with {total_courses} total courses")
+    print(f"AST files saved to: {output_dir}/")
+
+
+if __name__ == "__main__":
+    main()
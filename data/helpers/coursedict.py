@@ -0,0 +1,37 @@
+"""Course codes and the code-indexed course dict every graph tool starts from."""
+import re
+
+
+def normalize_code(code):
+    """Ensure course code is formatted as 'DEPT NUMBER' with a single space."""
+    if not code:
+        return code
+    code = code.strip()
+    # Don't normalize special codes like "OR"
+    if code == "OR":
+        return code
+    # Match letters (dept) followed by optional space then the rest (number + suffix)
+    match = re.match(r'^([A-Za-z/]+)\s*(.+)$', code)
+    if match:
+        dept = match.group(1).strip()
+        number = match.group(2).strip()
+        return f"{dept} {number}"
+    return code
+
+
+def lookup_code(code):
+    """A course code as typed by a user, in catalog form: "cse100" becomes "CSE 100"."""
+    return normalize_code(code.upper()) if code else code
+
+def build_global_course_dict(webreg_data):
+    course_dict = {}
+    for course_entry in webreg_data:
+        course = course_entry.get("course", {})
+        code = normalize_code(course.get("code", ""))
+        if code:
+            course_dict[code] = {
+                "code": code,
+                "title": course.get("title", ""),
+                "prereq_ast": course.get("prereq").get("items") if course.get("prereq") else [],
+            }
+    return course_dict
@@ -0,0 +1,497 @@
+"""Versioned SQLite store of courses and major plans, the system of record behind the JSON artifacts.
+
+The stages that produce records upsert them here alongside the files they
+write: the catalog parser as source "catalog", cross_check as "combined" and
+the major scraper as plans. Rows are keyed by (source, code) and indexed by
+code and department, so one course or department is a lookup rather than a
+load of the whole artifact.
+
+Every row keeps the meta.version of its record. An ingest replaces a row only
+with a record of the same or a newer version whose content differs; an older
+record is ignored, and a newer one with the same content leaves the row (and
+its version) alone, so a rescrape that finds nothing new changes nothing.
+Rows a full snapshot no longer contains are marked removed, not deleted.
+
+Each ingest is a revision, stamped on the rows it changed. An export remembers
+the revision it was written at and is skipped while none of its rows changed,
+and pretty JSON exports copy each row's stored encoding, so only rows that
+changed are ever re-encoded.
+
+    python data/helpers/coursestore.py ingest --courses data/combined.json --source combined
+    python data/helpers/coursestore.py ingest --plans data/majors_data.json
+    python data/helpers/coursestore.py export --output data/combined.json --by-department data/departments
+    python data/helpers/coursestore.py lookup "CSE 100" --department CSE
+
+    with CourseStore("data/courses.db") as store:
+        store.course("CSE 100")
+        store.department("CSE")
+
+The stages only write the store when asked to with --store (add_store_argument);
+without a path it is data/courses.db in the repository, wherever they run from.
+"""
+from datetime import date, datetime, timezone
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+import metrics
+from artifacts import ARTIFACT_FORMATS, RecordStream, artifact_path, dumps, read_artifact
+
+ROOT = Path(__file__).resolve().parents[2]
+# relative to the repository root
+DEFAULT_STORE = "data/courses.db"
+DEFAULT_STORE_PATH = str(ROOT / DEFAULT_STORE)
+# records upserted per transaction, so stages sharing the store never wait long for each other
+BATCH_SIZE = 1000
+BUSY_TIMEOUT_S = 60
+# host parameters per IN (...) lookup, under SQLite's historical limit of 999
+MAX_PARAMS = 500
+
+# kind -> (table, key column, group column)
+KINDS = {
+    "courses": ("courses", "code", "department"),
+    "plans": ("plans", "key", "major"),
+}
+COUNTS = ("inserted", "updated", "unchanged", "stale", "removed")
+
+ROW_COLUMNS = """
+    version TEXT NOT NULL,
+    generated_at TEXT,
+    seen_version TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    record BLOB NOT NULL,
+    revision INTEGER NOT NULL,
+    removed INTEGER NOT NULL DEFAULT 0
+"""
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS ingests (
+    revision INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    inserted INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    stale INTEGER NOT NULL DEFAULT 0,
+    removed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS courses (
+    source TEXT NOT NULL,
+    code TEXT NOT NULL,
+    department TEXT NOT NULL,
+    {ROW_COLUMNS.strip()},
+    PRIMARY KEY (source, code)
+);
+CREATE INDEX IF NOT EXISTS courses_code ON courses (code);
+CREATE INDEX IF NOT EXISTS courses_department ON courses (source, department, code);
+CREATE INDEX IF NOT EXISTS courses_revision ON courses (source, revision);
+CREATE TABLE IF NOT EXISTS plans (
+    source TEXT NOT NULL,
+    key TEXT NOT NULL,
+    major TEXT NOT NULL,
+    {ROW_COLUMNS.strip()},
+    PRIMARY KEY (source, key)
+);
+CREATE INDEX IF NOT EXISTS plans_major ON plans (source, major, key);
+CREATE INDEX IF NOT EXISTS plans_revision ON plans (source, revision);
+CREATE TABLE IF NOT EXISTS exports (
+    path TEXT PRIMARY KEY,
+    selection TEXT NOT NULL,
+    fmt TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    exported_at TEXT NOT NULL
+);
+"""
+
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def department_of(code):
+    """Leading letters of a course code: "CSE" for "CSE 100"."""
+    match = re.match(r"\s*([A-Za-z]+)", code or "")
+    return match.group(1).upper() if match else ""
+
+
+def content_hash(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def format_counts(counts):
+    return ", ".join(f"{counts[name]} {name}" for name in COUNTS)
+
+
+class Ingest:
+    """One upsert of records of a kind from one source; open it with CourseStore.ingest.
+
+    Records are written in batches as they are added. With prune, rows of the
+    source that the ingest did not see, and that are no newer than the newest
+    record it did see, are marked removed when it closes without an error.
+    When a key repeats within an ingest, its first record is kept; plans are
+    keyed by their content, so only exact duplicates repeat. Records without a
+    meta block (plans) take version and generated_at.
+    """
+
+    def __init__(self, store, kind, source, prune=False, version=None, generated_at=None):
+        self.db = store.db
+        self.kind = kind
+        self.table, self.key_column, self.group_column = KINDS[kind]
+        self.source = source
+        self.prune = prune
+        self.version = version or date.today().isoformat()
+        self.generated_at = generated_at or utc_now()
+        self.revision = None
+        self.newest = None
+        self.pending = {}
+        self.keys = set()
+        self.counts = dict.fromkeys(COUNTS, 0)
+
+    def __enter__(self):
+        with self.db:
+            self.revision = self.db.execute(
+                "INSERT INTO ingests (kind, source, started_at) VALUES (?, ?, ?)", (self.kind, self.source, utc_now())
+            ).lastrowid
+            self.db.execute("CREATE TEMP TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY)")
+            self.db.execute("DELETE FROM temp.seen")
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.flush()
+        with self.db:
+            if exc[0] is None and self.prune and self.newest is not None:
+                self.counts["removed"] = self.db.execute(
+                    f"UPDATE {self.table} SET removed = 1, revision = ? WHERE source = ? AND removed = 0 "
+                    f"AND version <= ? AND {self.key_column} NOT IN (SELECT key FROM temp.seen)",
+                    (self.revision, self.source, self.newest),
+                ).rowcount
+            self.db.execute(
+                "UPDATE ingests SET inserted = ?, updated = ?, unchanged = ?, stale = ?, removed = ? WHERE revision = ?",
+                (*(self.counts[name] for name in COUNTS), self.revision),
+            )
+            self.db.execute("DELETE FROM temp.seen")
+        for name in COUNTS:
+            metrics.count(f"store_{name}", self.counts[name])
+        return False
+
+    def identify(self, record):
+        """(key, group, version, generated_at, content) of a record."""
+        if self.kind == "courses":
+            meta = record.get("meta", {})
+            code = record["course"]["code"]
+            version = meta.get("version") or self.version
+            return code, department_of(code), version, meta.get("generated_at", self.generated_at), record["course"]
+        # a major can have several plans for one college and length in years, so the
+        # key ends in the plan's content hash: it does not depend on the order plans
+        # arrive in, and a repeated identical plan is the same row
+        key = f"{record.get('code', '')}/{record.get('college', '')}/{record.get('length', '')}/{content_hash(record)[:12]}"
+        return key, record.get("code", ""), self.version, self.generated_at, record
+
+    def add(self, record):
+        key, group, version, generated_at, content = self.identify(record)
+        if key in self.keys:
+            return
+        self.keys.add(key)
+        self.pending[key] = (group, version, generated_at, content_hash(content), dumps(record, "pretty"))
+        if self.newest is None or version > self.newest:
+            self.newest = version
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    def tap(self, records, decode=None):
+        """Yield records unchanged while adding each (decode(record) if given), for stages that stream them to a file."""
+        for record in records:
+            self.add(decode(record) if decode is not None else record)
+            yield record
+
+    def flush(self):
+        """Upsert the pending records in one transaction."""
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, {}
+        table, key_column, group_column = self.table, self.key_column, self.group_column
+        keys = list(rows)
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO temp.seen VALUES (?)", [(key,) for key in keys])
+            existing = {}
+            for start in range(0, len(keys), MAX_PARAMS):
+                chunk = keys[start:start + MAX_PARAMS]
+                existing.update(
+                    (key, rest)
+                    for key, *rest in self.db.execute(
+                        f"SELECT {key_column}, version, content_hash, removed FROM {table} "
+                        f"WHERE source = ? AND {key_column} IN ({', '.join('?' * len(chunk))})",
+                        (self.source, *chunk),
+                    )
+                )
+
+            inserts, updates, seen = [], [], []
+            for key, (group, version, generated_at, digest, encoded) in rows.items():
+                current = existing.get(key)
+                values = (group, version, generated_at, version, digest, encoded, self.revision)
+                if current is None:
+                    inserts.append((self.source, key, *values))
+                    self.counts["inserted"] += 1
+                    continue
+                stored_version, stored_digest, removed = current
+                if version < stored_version:
+                    self.counts["stale"] += 1
+                elif digest == stored_digest and not removed:
+                    seen.append((version, self.source, key, version))
+                    self.counts["unchanged"] += 1
+                else:
+                    updates.append((*values, self.source, key))
+                    self.counts["inserted" if removed else "updated"] += 1
+
+            self.db.executemany(
+                f"INSERT INTO {table} (source, {key_column}, {group_column}, version, generated_at, seen_version, "
+                "content_hash, record, revision) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                inserts,
+            )
+            self.db.executemany(
+                f"UPDATE {table} SET {group_column} = ?, version = ?, generated_at = ?, seen_version = ?, "
+                f"content_hash = ?, record = ?, revision = ?, removed = 0 WHERE source = ? AND {key_column} = ?",
+                updates,
+            )
+            self.db.executemany(
+                f"UPDATE {table} SET seen_version = ? WHERE source = ? AND {key_column} = ? AND seen_version < ?",
+                seen,
+            )
+
+
+class CourseStore:
+    """A connection to the store file, created with its schema on first use."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S)
+        # readers never block the stage that is writing
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest(self, kind, source, prune=False, version=None, generated_at=None):
+        """An Ingest context for kind ("courses" or "plans") from source."""
+        return Ingest(self, kind, source, prune, version, generated_at)
+
+    def ingest_courses(self, records, source, prune=False):
+        """Upsert course entries ({"meta", "course"}); returns the counts of the ingest."""
+        with self.ingest("courses", source, prune) as batch:
+            for record in records:
+                batch.add(record)
+        return batch.counts
+
+    def ingest_plans(self, plans, source="majors", prune=False, version=None):
+        """Upsert major plans, versioned as version (default: today); returns the counts of the ingest."""
+        with self.ingest("plans", source, prune, version) as batch:
+            for plan in plans:
+                batch.add(plan)
+        return batch.counts
+
+    def _records(self, query, params):
+        return [json.loads(record) for record, in self.db.execute(query, params)]
+
+    def course(self, code, source="combined"):
+        """The stored entry of a course code as written (e.g. "CSE 100"), or None."""
+        row = self.db.execute(
+            "SELECT record FROM courses WHERE source = ? AND code = ? AND removed = 0", (source, code)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def sources(self, code):
+        """{source: entry} of a course code across every source."""
+        return {
+            source: json.loads(record)
+            for source, record in self.db.execute(
+                "SELECT source, record FROM courses WHERE code = ? AND removed = 0 ORDER BY source", (code,)
+            )
+        }
+
+    def department(self, department, source="combined"):
+        """Entries of a department's courses in code order."""
+        return self._records(
+            "SELECT record FROM courses WHERE source = ? AND department = ? AND removed = 0 ORDER BY code",
+            (source, department.upper()),
+        )
+
+    def departments(self, source="combined"):
+        return [
+            department
+            for department, in self.db.execute(
+                "SELECT DISTINCT department FROM courses WHERE source = ? AND removed = 0 ORDER BY department", (source,)
+            )
+        ]
+
+    def plans(self, major, source="majors"):
+        """Plans of a major code (e.g. "CS26") for every college."""
+        return self._records(
+            "SELECT record FROM plans WHERE source = ? AND major = ? AND removed = 0 ORDER BY key", (source, major)
+        )
+
+    def history(self, limit=10):
+        """The latest ingests, newest first, as dicts."""
+        cursor = self.db.execute("SELECT * FROM ingests ORDER BY revision DESC LIMIT ?", (limit,))
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def export(self, kind, path, source, group=None, fmt="pretty"):
+        """Write the live rows of source (only those of group, if given) as a list artifact in key order.
+
+        Returns the number of records written, or None when path was already
+        exported in fmt at the current revision of those rows and still exists.
+        """
+        table, key_column, group_column = KINDS[kind]
+        path = artifact_path(str(path), fmt)
+        where, params = "source = ?", [source]
+        if group is not None:
+            where += f" AND {group_column} = ?"
+            params.append(group)
+        selection = f"{kind}:{source}:{group or ''}"
+        # removed rows keep their revision, so a removal also moves this forward
+        revision = self.db.execute(f"SELECT MAX(revision) FROM {table} WHERE {where}", params).fetchone()[0] or 0
+        last = self.db.execute("SELECT selection, fmt, revision FROM exports WHERE path = ?", (path,)).fetchone()
+        if last == (selection, fmt, revision) and os.path.exists(path):
+            return None
+
+        with RecordStream(path, fmt) as stream:
+            query = f"SELECT record FROM {table} WHERE {where} AND removed = 0 ORDER BY {key_column}"
+            for record, in self.db.execute(query, params):
+                # rows are stored as pretty JSON, the default artifact format
+                if fmt == "pretty":
+                    stream.write_encoded(record)
+                else:
+                    stream.write(json.loads(record))
+        with self.db:
+            self.db.execute(
+                "INSERT INTO exports (path, selection, fmt, revision, count, exported_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET selection = excluded.selection, fmt = excluded.fmt, "
+                "revision = excluded.revision, count = excluded.count, exported_at = excluded.exported_at",
+                (path, selection, fmt, revision, stream.count, utc_now()),
+            )
+        return stream.count
+
+    def export_courses(self, path, source="combined", department=None, fmt="pretty"):
+        return self.export("courses", path, source, department, fmt)
+
+    def export_departments(self, directory, source="combined", fmt="pretty"):
+        """One file per department, <dept>.json in directory; returns {department: count, or None if skipped}."""
+        departments = [
+            department
+            for department, in self.db.execute(
+                "SELECT DISTINCT department FROM courses WHERE source = ? ORDER BY department", (source,)
+            )
+        ]
+        return {
+            department: self.export_courses(
+                os.path.join(directory, f"{department.lower() or 'other'}.json"), source, department, fmt
+            )
+            for department in departments
+        }
+
+    def export_plans(self, path, source="majors", fmt="pretty"):
+        return self.export("plans", path, source, None, fmt)
+
+
+def add_store_argument(parser, records):
+    """The opt-in --store option of the stages that upsert their records."""
+    parser.add_argument(
+        "--store",
+        nargs="?",
+        const=DEFAULT_STORE_PATH,
+        metavar="PATH",
+        help=f"Also upsert the {records} into a SQLite store at PATH (default path: {DEFAULT_STORE} in the repository).",
+    )
+
+
+def print_export(path, count):
+    print(f"{path}: up to date" if count is None else f"{path}: {count} records written")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest into, export from and query the SQLite course store.")
+    parser.add_argument(
+        "--store",
+        default=DEFAULT_STORE_PATH,
+        help=f"Store file (default: {DEFAULT_STORE} in the repository).",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Upsert records from artifacts.")
+    ingest.add_argument("--courses", metavar="PATH", help="Course artifact to upsert, e.g. data/combined.json.")
+    ingest.add_argument("--source", default="combined", help="Source the courses are stored under (default: combined).")
+    ingest.add_argument("--plans", metavar="PATH", help="Major plans to upsert, e.g. data/majors_data.json.")
+    ingest.add_argument("--plan-version", help="Version of the plans (default: today).")
+    ingest.add_argument(
+        "--no-prune",
+        dest="prune",
+        action="store_false",
+        help="Keep rows the artifacts no longer contain instead of marking them removed.",
+    )
+
+    export = commands.add_parser("export", help="Write artifacts whose rows changed since their last export.")
+    export.add_argument("--source", default="combined", help="Source of the exported courses (default: combined).")
+    export.add_argument("--output", metavar="PATH", help="Write all courses of the source here.")
+    export.add_argument("--by-department", metavar="DIR", help="Write one <dept>.json per department here.")
+    export.add_argument("--plans", metavar="PATH", help="Write the major plans here.")
+    export.add_argument("--artifact-format", choices=ARTIFACT_FORMATS, default="pretty", help="Encoding (default: pretty).")
+
+    lookup = commands.add_parser("lookup", help="Print stored records.")
+    lookup.add_argument("course", nargs="?", help="Course code, e.g. 'CSE 100'; shown from every source.")
+    lookup.add_argument("--department", help="List the courses of a department.")
+    lookup.add_argument("--source", default="combined", help="Source of --department (default: combined).")
+    lookup.add_argument("--major", help="Print the plans of a major code.")
+    lookup.add_argument("--history", type=int, metavar="N", help="Print the last N ingests.")
+    args = parser.parse_args()
+
+    with CourseStore(args.store) as store:
+        if args.command == "ingest":
+            if args.courses:
+                counts = store.ingest_courses(read_artifact(args.courses), args.source, args.prune)
+                print(f"{args.courses} -> {args.source}: {format_counts(counts)}")
+            if args.plans:
+                counts = store.ingest_plans(read_artifact(args.plans), prune=args.prune, version=args.plan_version)
+                print(f"{args.plans} -> plans: {format_counts(counts)}")
+        elif args.command == "export":
+            fmt = args.artifact_format
+            if args.output:
+                print_export(args.output, store.export_courses(args.output, args.source, fmt=fmt))
+            if args.by_department:
+                counts = store.export_departments(args.by_department, args.source, fmt)
+                written = {dept: count for dept, count in counts.items() if count is not None}
+                print(f"{args.by_department}: {len(written)} of {len(counts)} departments written")
+            if args.plans:
+                print_export(args.plans, store.export_plans(args.plans, fmt=fmt))
+        else:
+            if args.course:
+                for source, entry in store.sources(args.course).items():
+                    print(f"[{source}] version {entry['meta']['version']}")
+                    print(json.dumps(entry["course"], indent=2, ensure_ascii=False))
+            if args.department:
+                for entry in store.department(args.department, args.source):
+                    print(f"{entry['course']['code']:<12} {entry['course']['title']}")
+            if args.major:
+                for plan in store.plans(args.major):
+                    print(f"{plan['code']} {plan['college']}: {len(plan.get('requirements', []))} requirements")
+            if args.history:
+                for entry in store.history(args.history):
+                    print(f"r{entry['revision']} {entry['started_at']} {entry['kind']}/{entry['source']}: {format_counts(entry)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
-from pathlib import Path
-import json
+import argparse
+
+import metrics
+from artifacts import SizeManifest, add_artifact_arguments, read_artifact, write_artifact
+from coursedict import build_global_course_dict
+from coursestore import CourseStore, add_store_argument, format_counts
+from graphstore import write_graph_store
+from metrics import RunMetrics, add_metrics_arguments
+from query import PrereqGraph
 
 def load_json(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return read_artifact(filepath)
 
-def save_json(data, filepath):
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+def save_json(data, filepath, fmt="pretty", compress=()):
+    """Write data as an artifact; returns (written_path, sizes)."""
+    return write_artifact(data, filepath, fmt, compress)
 
 
 def calculate_diffs(data1_dict, data2_dict):
@@ -25,59 +31,125 @@ def calculate_diffs(data1_dict, data2_dict):
     
     return diff1, diff2, common
 
-def combine_courses(data1_dict, data2_dict, diff1, diff2, common):
+# Note added to a course whose remote ("R") variant was folded into it
+REMOTE_NOTE = "Remote course also offered"
+
+
+def is_remote_code(code):
+    # Exclude POLI courses because they squish all into one course code
+    return code.endswith("R") and "POLI" not in code
+
+
+def fold_remote_courses(merged):
+    """Sort a code-indexed map into a list, folding each remote variant into its base course.
 
+    The base course gets REMOTE_NOTE; the remote entry itself is dropped.
+    """
     combined = []
+    for code in sorted(merged):
+        if is_remote_code(code):
+            reg_item = merged.get(code[:-1])
+            if reg_item is not None:
+                reg_notes = reg_item["course"].setdefault("notes", [])
+                if REMOTE_NOTE not in reg_notes:
+                    reg_notes.append(REMOTE_NOTE)
+            continue
+        combined.append(merged[code])
+    return combined
+
+
+def merge_courses(sources):
+    """Merge any number of sources (lists of course entries or code-indexed dicts).
+
+    Sources are given in precedence order: when several contain the same code,
+    the entry from the earliest source wins.
+    """
+    merged = {}
+    for source in sources:
+        items = source.values() if isinstance(source, dict) else source
+        for item in items:
+            merged.setdefault(item["course"]["code"], item)
+    return fold_remote_courses(merged)
+
+
+def combine_courses(data1_dict, data2_dict, diff1, diff2, common):
+
+    merged = {}
     
     # Add courses only in data1
     for code in diff1:
-        combined.append(data1_dict[code])
+        merged[code] = data1_dict[code]
     
     # Add courses only in data2
     for code in diff2:
-        combined.append(data2_dict[code])
+        merged[code] = data2_dict[code]
     
     # Add common courses 
     for code in common:
-        combined.append(data1_dict[code])
-    
-    combined.sort(key=lambda x: x["course"]["code"])
-    
-    rm = find_remote_courses(combined)
-    for item in combined:
-        code = item["course"]["code"]
-        
-        if code in rm:
-            reg_code = item["course"]["code"][:-1]
-            # Fetch notes from the regular version (without the 'R') if it exists
-            reg_item = next((i for i in combined if i["course"]["code"] == reg_code), None)
-            reg_notes = reg_item["course"].get("notes", []) if reg_item else []
-            reg_notes.append("Remote course also offered")
-            item["course"]["notes"] = reg_notes
-            combined.remove(item)
+        merged[code] = data1_dict[code]
 
-    return combined
+    return fold_remote_courses(merged)
 
 def find_remote_courses(combined):
-    remote_courses = []
-    for item in combined:
-        code = item["course"]["code"]
-        if code.endswith("R") and "POLI" not in code: # Exclude POLI courses because they squis all into one course code
-            remote_courses.append(code)
-    return remote_courses
+    return [item["course"]["code"] for item in combined if is_remote_code(item["course"]["code"])]
 
 
-if __name__ == '__main__':
-    path1 = 'data/SOC_list.json'
-    path2 = 'data/catalog_data.json'
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge course sources into combined.json, folding remote variants into their base course."
+    )
+    parser.add_argument(
+        "--source",
+        dest="sources",
+        action="append",
+        metavar="PATH",
+        help="Course JSON to merge; repeat in precedence order (default: SOC list, then catalog).",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/combined.json",
+        help="Where to write the merged courses (default: data/combined.json).",
+    )
+    parser.add_argument(
+        "--graph",
+        default="data/combined.graph",
+        help="Also write the memory-mappable course graph here (default: data/combined.graph; '' skips it).",
+    )
+    add_store_argument(parser, "merged courses")
+    add_artifact_arguments(parser)
+    add_metrics_arguments(parser, "cross_check")
+    args = parser.parse_args()
 
-    data1_dict = {item["course"]["code"]: item for item in load_json(path1)}
-    data2_dict = {item["course"]["code"]: item for item in load_json(path2)}
+    paths = args.sources or ['data/SOC_list.json', 'data/catalog_data.json']
+    with RunMetrics.from_args("cross_check", args) as run:
+        with run.stage("load"):
+            sources = [load_json(path) for path in paths]
+            for path, source in zip(paths, sources):
+                metrics.detail("sources", path, {"courses": len(source)})
+        with run.stage("merge"):
+            combined = merge_courses(sources)
+            metrics.count("courses_in", sum(map(len, sources)))
+            metrics.count("courses_out", len(combined))
 
-    diff1, diff2, common = calculate_diffs(data1_dict, data2_dict)
-    combined = combine_courses(data1_dict, data2_dict, diff1, diff2, common)
+        with run.stage("write"):
+            written, sizes = save_json(combined, args.output, args.artifact_format, args.compress)
+            size_manifest = SizeManifest(args.size_manifest)
+            size_manifest.record(written, sizes)
+        if args.graph:
+            with run.stage("graph"):
+                course_dict = build_global_course_dict(combined)
+                titles = {code: course["title"] for code, course in course_dict.items()}
+                size = write_graph_store(PrereqGraph(course_dict), titles, args.graph)
+                size_manifest.record(args.graph, {"bytes": size})
+            print(f"Graph saved to {args.graph}")
+        if args.store:
+            # the merge is a full snapshot, so courses it dropped are marked removed
+            with run.stage("store"), CourseStore(args.store) as store:
+                counts = store.ingest_courses(combined, "combined", prune=True)
+            print(f"Store {args.store}: {format_counts(counts)}")
+        size_manifest.save()
+    print(f"File saved to {written}")
 
-    save_json(combined, 'data/combined.json')
-    print("File saved to data/combined.json")
-    
-    
\ No newline at end of file
+
+if __name__ == '__main__':
+    main()
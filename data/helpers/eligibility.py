@@ -0,0 +1,153 @@
+"""Batch prerequisite eligibility over the whole catalog.
+
+Every prerequisite expression is an AND of requirement groups, each group an OR
+of courses. The expressions are compiled once into flat NumPy index arrays over
+interned course IDs, and a batch of transcripts becomes a boolean taken matrix
+(one row per course, one column per student, packed 8 students to a byte). Each
+expression is then evaluated for the whole batch by two segmented reductions:
+
+    group met      = OR of the taken rows of the group's options
+    course allowed = AND of the met rows of the course's groups
+
+    engine = EligibilityEngine.load("data/combined.json")
+    engine.eligible_courses([{"completed": ["MATH 20A"], "inProgress": ["MATH 20B"]}])
+
+    python data/helpers/eligibility.py transcripts.json --in-progress
+"""
+import argparse
+import json
+
+import numpy as np
+
+from coursedict import normalize_code
+from artifacts import read_artifact, write_artifact
+from query import PrereqGraph
+
+DEFAULT_BATCH_SIZE = 4096
+
+
+def transcript_codes(transcript, in_progress=False):
+    """Course codes from a transcript: a list of codes or {"completed": [...], "inProgress": [...]}."""
+    if isinstance(transcript, dict):
+        codes = list(transcript.get("completed", []))
+        if in_progress:
+            codes += transcript.get("inProgress", [])
+    else:
+        codes = list(transcript)
+    return [normalize_code(code) for code in codes]
+
+
+def pack_students(matrix):
+    """Pack a (courses, students) boolean matrix into bytes along the student axis."""
+    return np.packbits(matrix, axis=1, bitorder="little")
+
+
+class EligibilityEngine:
+    """Prerequisite expressions of a PrereqGraph, compiled for batch evaluation.
+
+    Only catalog courses are evaluated; codes that are referenced but missing
+    from the catalog can be taken but are never reported as eligible.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        catalog = range(graph.catalog_size)
+        self.constrained = np.array([course for course in catalog if graph.groups[course]], dtype=np.intp)
+        # options of every group back to back, each group starting at group_starts[g]
+        # and each constrained course's groups starting at course_starts[c]
+        groups = [group for course in self.constrained for group in graph.groups[course]]
+        self.options = np.fromiter((option for group in groups for option in group), dtype=np.intp)
+        self.group_starts = np.cumsum([0] + [len(group) for group in groups[:-1]], dtype=np.intp)
+        self.course_starts = np.cumsum(
+            [0] + [len(graph.groups[course]) for course in self.constrained[:-1]], dtype=np.intp
+        )
+        # courses in code order, so decoded results come out sorted
+        self.report_order = np.array(sorted(catalog, key=graph.codes.__getitem__), dtype=np.intp)
+
+    @classmethod
+    def load(cls, path="data/combined.json"):
+        return cls(PrereqGraph.load(path))
+
+    def taken_matrix(self, transcripts, in_progress=False):
+        """Packed (course ID, student) matrix of the courses each transcript took; unknown codes are ignored."""
+        taken = np.zeros((len(self.graph.codes), len(transcripts)), dtype=bool)
+        ids = self.graph.ids
+        for student, transcript in enumerate(transcripts):
+            for code in transcript_codes(transcript, in_progress):
+                course = ids.get(code)
+                if course is not None:
+                    taken[course, student] = True
+        return pack_students(taken)
+
+    def evaluate(self, taken, num_students):
+        """Packed (catalog course, student) matrix of eligibility.
+
+        A course is eligible when each of its requirement groups has at least
+        one taken option; courses without prerequisites always are.
+        """
+        eligible = np.repeat(pack_students(np.ones((1, num_students), dtype=bool)), self.graph.catalog_size, axis=0)
+        if len(self.constrained):
+            met = np.bitwise_or.reduceat(taken[self.options], self.group_starts, axis=0)
+            eligible[self.constrained] = np.bitwise_and.reduceat(met, self.course_starts, axis=0)
+        return eligible
+
+    def iter_batches(self, transcripts, in_progress=False, include_taken=False, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield (batch, eligibility) for consecutive slices of transcripts.
+
+        eligibility is an unpacked (catalog course, student) boolean matrix.
+        """
+        for start in range(0, len(transcripts), batch_size):
+            batch = transcripts[start:start + batch_size]
+            taken = self.taken_matrix(batch, in_progress)
+            eligible = self.evaluate(taken, len(batch))
+            if not include_taken:
+                eligible &= ~taken[:self.graph.catalog_size]
+            yield batch, np.unpackbits(eligible, axis=1, count=len(batch), bitorder="little").view(bool)
+
+    def eligible_counts(self, transcripts, in_progress=False, include_taken=False, batch_size=DEFAULT_BATCH_SIZE):
+        """Number of courses each transcript is eligible for, without decoding the course lists."""
+        counts = []
+        for _, eligible in self.iter_batches(transcripts, in_progress, include_taken, batch_size):
+            counts.extend(eligible.sum(axis=0).tolist())
+        return counts
+
+    def eligible_courses(self, transcripts, in_progress=False, include_taken=False, batch_size=DEFAULT_BATCH_SIZE):
+        """For each transcript, the sorted course codes it is eligible for."""
+        codes = np.array(self.graph.codes, dtype=object)[self.report_order]
+        results = []
+        for batch, eligible in self.iter_batches(transcripts, in_progress, include_taken, batch_size):
+            # nonzero walks the (student, course) matrix row by row, so each
+            # student's courses come out together and in report order
+            students, courses = np.nonzero(eligible[self.report_order].T)
+            bounds = np.cumsum(np.bincount(students, minlength=len(batch)))[:-1]
+            results.extend(chunk.tolist() for chunk in np.split(codes[courses], bounds))
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the courses each transcript is eligible to take.")
+    parser.add_argument(
+        "transcripts",
+        help="JSON list of transcripts: code lists or {completed, inProgress} objects.",
+    )
+    parser.add_argument("--in-progress", action="store_true", help="Count in-progress courses as taken.")
+    parser.add_argument("--include-taken", action="store_true", help="Keep courses already taken in the result.")
+    parser.add_argument("--output", help="Write the result here instead of printing it.")
+    parser.add_argument(
+        "--input",
+        default="data/combined.json",
+        help="Merged course artifact to load (default: data/combined.json).",
+    )
+    args = parser.parse_args()
+
+    engine = EligibilityEngine.load(args.input)
+    transcripts = read_artifact(args.transcripts)
+    results = engine.eligible_courses(transcripts, args.in_progress, args.include_taken)
+    if args.output:
+        write_artifact(results, args.output)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Binary course graph in CSR layout, opened with mmap instead of parsed.
+
+Course codes are interned to integer IDs (catalog courses first, then codes
+that are only referenced). A course's prerequisites are an AND of requirement
+groups and each group an OR of options, stored as two levels of CSR arrays:
+
+    groups of course c    course_groups[c] .. course_groups[c + 1]
+    options of group g    options[group_options[g] .. group_options[g + 1]]
+
+plus the reverse edges (dependent_offsets / dependents), a string table of
+codes and titles, and the IDs in code order so a code is found by binary
+search. Opening a store reads only the header; every array is a zero-copy view
+of the mapped file (a NumPy array when NumPy can be imported, a memoryview
+otherwise), so startup does not grow with the catalog and processes opening
+the same file share its pages. The per-course lists PrereqGraph works on
+(codes, requirement groups, prerequisites, dependents) are StoreColumn views
+that decode a course the first time it is asked for.
+
+    python data/helpers/graphstore.py --input data/combined.json --output data/combined.graph
+
+    store = GraphStore.open("data/combined.graph")
+    store.requirement_groups("CSE 100")
+    graph = PrereqGraph.load("data/combined.graph")
+
+File layout (little-endian): the header below, then for each name in SECTIONS
+an (offset, length in bytes) pair, then the sections, each 8-byte aligned.
+Integer sections are uint32.
+"""
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+
+from artifacts import read_artifact
+from coursedict import build_global_course_dict, lookup_code
+
+try:
+    import numpy as np
+except ImportError:  # optional, the store reads through memoryviews without it
+    np = None
+
+MAGIC = b"CGGS"
+FORMAT_VERSION = 1
+STORE_SUFFIX = ".graph"
+# magic, version, num_courses, catalog_size, num_sections
+HEADER = struct.Struct("<4sIIII")
+SECTION = struct.Struct("<QQ")
+SECTIONS = (
+    "course_groups",
+    "group_options",
+    "options",
+    "dependent_offsets",
+    "dependents",
+    "code_offsets",
+    "title_offsets",
+    "sorted_ids",
+    "codes",
+    "titles",
+)
+BYTE_SECTIONS = {"codes", "titles"}
+
+
+def u32(values):
+    data = array("I", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def string_table(strings):
+    """(offsets as uint32 bytes, UTF-8 blob) for a list of strings."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    return u32(offsets), b"".join(encoded)
+
+
+def write_graph_store(graph, titles, path):
+    """Write a PrereqGraph (plus {code: title}) as a store; returns the file size."""
+    course_groups = [0]
+    group_options = [0]
+    options = []
+    for groups in graph.groups:
+        for group in groups:
+            options.extend(group)
+            group_options.append(len(options))
+        course_groups.append(len(group_options) - 1)
+
+    dependent_offsets = [0]
+    for courses in graph.dependents:
+        dependent_offsets.append(dependent_offsets[-1] + len(courses))
+
+    code_offsets, codes = string_table(graph.codes)
+    title_offsets, title_blob = string_table([titles.get(code, "") for code in graph.codes])
+    sorted_ids = sorted(range(len(graph.codes)), key=lambda idx: graph.codes[idx].encode("utf-8"))
+
+    sections = {
+        "course_groups": u32(course_groups),
+        "group_options": u32(group_options),
+        "options": u32(options),
+        "dependent_offsets": u32(dependent_offsets),
+        "dependents": u32(course for courses in graph.dependents for course in courses),
+        "code_offsets": code_offsets,
+        "title_offsets": title_offsets,
+        "sorted_ids": u32(sorted_ids),
+        "codes": codes,
+        "titles": title_blob,
+    }
+
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    table = []
+    for name in SECTIONS:
+        offset += -offset % 8
+        table.append((offset, len(sections[name])))
+        offset += len(sections[name])
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(graph.codes), graph.catalog_size, len(SECTIONS)))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for name, (start, _) in zip(SECTIONS, table):
+            f.write(bytes(start - f.tell()))
+            f.write(sections[name])
+        return f.tell()
+
+
+class StoreColumn(Sequence):
+    """Read-only list of one value per course ID, decoded from the store on first access."""
+
+    def __init__(self, length, decode):
+        self.length = length
+        self.decode = decode
+        self.decoded = {}
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(self.length)[index]]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("course ID out of range")
+        value = self.decoded.get(index)
+        if value is None:
+            value = self.decoded[index] = self.decode(index)
+        return value
+
+
+class StoreIds(Mapping):
+    """{code: ID} answered by the store's binary search instead of a dict of every code."""
+
+    def __init__(self, store, codes):
+        self.store = store
+        self.codes = codes
+
+    def __getitem__(self, code):
+        return self.store.id_of(code)
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class GraphStore:
+    """Read-only view of a store file; course arguments are IDs unless a method takes a code."""
+
+    def __init__(self, buffer, num_courses, catalog_size, sections):
+        self.buffer = buffer
+        self.num_courses = num_courses
+        self.catalog_size = catalog_size
+        self.sections = sections
+        for name, view in sections.items():
+            setattr(self, name, view)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_courses, catalog_size, num_sections = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or num_sections != len(SECTIONS):
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} graph store")
+
+        sections = {}
+        for idx, name in enumerate(SECTIONS):
+            start, length = SECTION.unpack_from(buffer, HEADER.size + idx * SECTION.size)
+            if name in BYTE_SECTIONS:
+                sections[name] = memoryview(buffer)[start:start + length]
+            elif np is not None:
+                sections[name] = np.frombuffer(buffer, dtype="<u4", count=length // 4, offset=start)
+            elif sys.byteorder == "little":
+                sections[name] = memoryview(buffer)[start:start + length].cast("I")
+            else:
+                data = array("I", buffer[start:start + length])
+                data.byteswap()
+                sections[name] = data
+        return cls(buffer, num_courses, catalog_size, sections)
+
+    def close(self):
+        # views must be released before the map can be closed
+        for name in self.sections:
+            if isinstance(getattr(self, name), memoryview):
+                getattr(self, name).release()
+            setattr(self, name, None)
+        self.sections = {}
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.num_courses
+
+    def _string(self, offsets, blob, course):
+        return bytes(blob[offsets[course]:offsets[course + 1]]).decode("utf-8")
+
+    def code(self, course):
+        return self._string(self.code_offsets, self.codes, course)
+
+    def title(self, course):
+        return self._string(self.title_offsets, self.titles, course)
+
+    def columns(self):
+        """(codes, ids, groups, prereqs, dependents) in PrereqGraph's shapes, as lazy views of the arrays."""
+        codes = StoreColumn(self.num_courses, self.code)
+        groups = StoreColumn(self.num_courses, lambda course: tuple(self.groups(course)))
+        prereqs = StoreColumn(
+            self.num_courses,
+            lambda course: tuple(dict.fromkeys(option for group in groups[course] for option in group)),
+        )
+        dependents = StoreColumn(self.num_courses, lambda course: tuple(self.dependents_of(course)))
+        return codes, StoreIds(self, codes), groups, prereqs, dependents
+
+    def id_of(self, code):
+        """ID of a course code in any case, by binary search; raises KeyError when absent."""
+        code = lookup_code(code)
+        key = code.encode("utf-8")
+        sorted_ids = self.sorted_ids
+        pos = bisect_left(range(self.num_courses), key, key=lambda i: self._code_bytes(sorted_ids[i]))
+        if pos < self.num_courses and self._code_bytes(sorted_ids[pos]) == key:
+            return int(sorted_ids[pos])
+        raise KeyError(f"Unknown course {code!r}")
+
+    def _code_bytes(self, course):
+        offsets = self.code_offsets
+        return bytes(self.codes[offsets[course]:offsets[course + 1]])
+
+    def groups(self, course):
+        """Requirement groups of a course ID as tuples of option IDs."""
+        options = self.options
+        group_options = self.group_options
+        return [
+            tuple(int(option) for option in options[group_options[group]:group_options[group + 1]])
+            for group in range(int(self.course_groups[course]), int(self.course_groups[course + 1]))
+        ]
+
+    def dependents_of(self, course):
+        """IDs of the courses listing course somewhere in their requirement groups."""
+        start, end = int(self.dependent_offsets[course]), int(self.dependent_offsets[course + 1])
+        return [int(dependent) for dependent in self.dependents[start:end]]
+
+    def requirement_groups(self, code):
+        """code's prerequisites as lists of alternative codes, like PrereqGraph.requirement_groups."""
+        return [[self.code(option) for option in group] for group in self.groups(self.id_of(code))]
+
+
+def main():
+    # imported here: query imports this module
+    from query import PrereqGraph
+
+    parser = argparse.ArgumentParser(description="Write the course graph as a memory-mappable CSR store.")
+    parser.add_argument(
+        "--input",
+        default="data/combined.json",
+        help="Merged course artifact to build from (default: data/combined.json).",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/combined.graph",
+        help="Where to write the store (default: data/combined.graph).",
+    )
+    args = parser.parse_args()
+
+    course_dict = build_global_course_dict(read_artifact(args.input))
+    graph = PrereqGraph(course_dict)
+    size = write_graph_store(graph, {code: course["title"] for code, course in course_dict.items()}, args.output)
+    start = time.perf_counter()
+    with GraphStore.open(args.output):
+        elapsed = time.perf_counter() - start
+    print(f"Graph of {len(graph)} courses -> {args.output} ({size} bytes, opens in {elapsed * 1e3:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
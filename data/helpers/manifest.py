@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+
+# Bump when the AST builder's output changes for the same inputs
+BUILD_VERSION = 1
+
+
+def hash_json(data):
+    """Stable, truncated sha256 of a JSON-serializable value. Sets are hashed sorted."""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=sorted)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def course_hashes(course_dict):
+    """Hash each course's prereq_ast."""
+    return {code: hash_json(course.get("prereq_ast")) for code, course in course_dict.items()}
+
+
+def transitive_closure(course_ids, course_dict, prereq_ids):
+    """Every course reachable from course_ids, including codes missing from course_dict."""
+    seen = set()
+    stack = list(course_ids)
+    while stack:
+        course_id = stack.pop()
+        if course_id in seen:
+            continue
+        seen.add(course_id)
+        course_data = course_dict.get(course_id)
+        if course_data:
+            stack.extend(prereq_ids(course_data.get("prereq_ast")))
+    return seen
+
+
+class BuildManifest:
+    """Tracks which output files are up to date with their transitive inputs.
+
+    Each file is keyed by a hash of its root courses plus the prereq_ast hash of
+    every course in their prerequisite closure, and the split-out courses it
+    shows as leaves. A file whose key matches the previous run and still exists
+    on disk can be left untouched. A changed salt discards the previous keys but
+    not the previous file list, so files a new layout no longer writes are still
+    removed.
+    """
+
+    def __init__(self, path, salt=None):
+        self.path = path
+        self.salt = hash_json([BUILD_VERSION, salt])
+        self.files = {}
+        self.courses = {}
+        self.hashes = {}
+
+        self.previous_files = {}
+        self.previous_courses = {}
+        # every file of the previous run, to clean up even when its fingerprints no longer apply
+        self.previous_outputs = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            self.previous_outputs = set(previous.get("files", {}))
+            if previous.get("salt") == self.salt:
+                self.previous_files = previous.get("files", {})
+                self.previous_courses = previous.get("courses", {})
+
+    def set_courses(self, course_dict):
+        self.hashes = course_hashes(course_dict)
+        self.courses = dict(sorted(self.hashes.items()))
+
+    def changed_courses(self):
+        """Courses added, removed or modified since the previous run."""
+        old, new = self.previous_courses, self.courses
+        return sorted(code for code in old.keys() | new.keys() if old.get(code) != new.get(code))
+
+    def fingerprint(self, roots, course_dict, prereq_ids, stubs=()):
+        """Hash a file's input set. roots is an ordered list of (code, prereq_ast).
+
+        stubs are the courses the file leaves unexpanded because they have files of their own.
+        """
+        closure = transitive_closure(
+            [code for _, prereqs in roots for code in prereq_ids(prereqs)],
+            course_dict,
+            prereq_ids,
+        )
+        return hash_json({
+            "roots": [[code, hash_json(prereqs)] for code, prereqs in roots],
+            "closure": sorted([code, self.hashes.get(code)] for code in closure),
+            "stubs": sorted(stubs),
+        })
+
+    def is_fresh(self, output_file, fingerprint):
+        key = os.path.normpath(output_file)
+        return self.previous_files.get(key) == fingerprint and os.path.exists(output_file)
+
+    def record(self, output_file, fingerprint):
+        self.files[os.path.normpath(output_file)] = fingerprint
+
+    def save(self):
+        """Write the manifest and delete files from the previous run that were not produced again."""
+        for stale in sorted(self.previous_outputs - self.files.keys()):
+            # Also drop precompressed siblings written next to the file
+            for path in (stale, stale + ".gz", stale + ".br"):
+                if os.path.exists(path):
+                    os.remove(path)
+                    print(f"Removed stale {path}")
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({
+                "salt": self.salt,
+                "courses": self.courses,
+                "files": dict(sorted(self.files.items())),
+            }, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,200 @@
+"""Per-stage timings and counters for pipeline runs.
+
+A script opens one RunMetrics for its run and wraps each stage in run.stage();
+code anywhere below it reports through the module-level count() and detail(),
+which land in the innermost open stage and do nothing when no run is active:
+
+    with RunMetrics.from_args("ast", args) as run:
+        with run.stage("departments"):
+            ...
+            metrics.count("nodes_expanded", cache.misses)
+
+Every stage records wall and CPU time (including reaped worker processes);
+stages named in --profile are run under cProfile, with the stats dumped next to
+the metrics file, and stages named in --trace-memory record their tracemalloc
+peak. On exit the run is appended as one JSON line to the metrics file, so the
+file is a history that can be graphed over time.
+"""
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+DEFAULT_METRICS_DIR = "data/metrics"
+
+# the run counters and details are reported to, set while a RunMetrics is open
+_active = None
+
+
+def count(name, n=1):
+    """Add n to a counter of the current stage."""
+    if _active is not None:
+        _active.count(name, n)
+
+
+def detail(group, key, values):
+    """Record a breakdown entry, e.g. detail("departments", "MATH", {...}), on the current stage."""
+    if _active is not None:
+        _active.detail(group, key, values)
+
+
+def record_file(path, sizes):
+    """Record the sizes of a written file on the current stage."""
+    if _active is not None:
+        _active.detail("files", os.path.normpath(path), sizes)
+
+
+def stage(name):
+    """run.stage on the active run, or a no-op context when there is none."""
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def cpu_times():
+    """(CPU seconds of this process, CPU seconds of its reaped children)."""
+    times = os.times()
+    return times.user + times.system, times.children_user + times.children_system
+
+
+class RunMetrics:
+    """Timings, counters and breakdowns for the stages of one run."""
+
+    def __init__(self, name, path=None, profile=(), trace_memory=()):
+        self.name = name
+        self.path = path if path is not None else os.path.join(DEFAULT_METRICS_DIR, f"{name}.jsonl")
+        self.profile = set(profile)
+        self.trace_memory = set(trace_memory)
+        self.stages = {}
+        self.open_stages = []
+        self.started_at = None
+        self.started = None
+
+    @classmethod
+    def from_args(cls, name, args):
+        """A run configured by the options add_metrics_arguments adds."""
+        return cls(name, args.metrics, args.profile, args.trace_memory)
+
+    def __enter__(self):
+        global _active
+        self.previous = _active
+        _active = self
+        self.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.started = (time.perf_counter(), *cpu_times())
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active = self.previous
+        if self.path:
+            self.save(failed=exc[0] is not None)
+        return False
+
+    def wants(self, selected, name):
+        return name in selected or "all" in selected
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage. Nested stages are recorded as "outer/inner"; re-entered stages accumulate."""
+        path = "/".join([*self.open_stages, name])
+        entry = self.stages.setdefault(path, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "child_cpu_s": 0.0})
+        profiler = None
+        # only one profiler can be active at a time, so nested stages are not profiled separately
+        if self.wants(self.profile, name) and not any(self.wants(self.profile, s) for s in self.open_stages):
+            profiler = cProfile.Profile()
+        tracing = self.wants(self.trace_memory, name) and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+
+        self.open_stages.append(name)
+        wall = time.perf_counter()
+        cpu, child_cpu = cpu_times()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            end_cpu, end_child_cpu = cpu_times()
+            entry["calls"] += 1
+            entry["wall_s"] += time.perf_counter() - wall
+            entry["cpu_s"] += end_cpu - cpu
+            entry["child_cpu_s"] += end_child_cpu - child_cpu
+            self.open_stages.pop()
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                entry["peak_bytes"] = max(entry.get("peak_bytes", 0), peak)
+            if profiler is not None:
+                entry["profile"] = self.dump_profile(profiler, path)
+
+    def dump_profile(self, profiler, stage_path):
+        stats_file = f"{os.path.splitext(self.path or self.name)[0]}.{stage_path.replace('/', '.')}.prof"
+        os.makedirs(os.path.dirname(stats_file) or ".", exist_ok=True)
+        profiler.dump_stats(stats_file)
+        return stats_file
+
+    def current(self):
+        """The entry counters go to: the innermost open stage, or the whole run outside any stage."""
+        path = "/".join(self.open_stages) or "run"
+        return self.stages.setdefault(path, {})
+
+    def count(self, name, n=1):
+        counters = self.current().setdefault("counters", {})
+        counters[name] = counters.get(name, 0) + n
+
+    def detail(self, group, key, values):
+        self.current().setdefault(group, {})[key] = values
+
+    def to_dict(self, failed=False):
+        wall, cpu, child_cpu = self.started
+        end_cpu, end_child_cpu = cpu_times()
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "argv": sys.argv[1:],
+            "failed": failed,
+            "wall_s": time.perf_counter() - wall,
+            "cpu_s": end_cpu - cpu,
+            "child_cpu_s": end_child_cpu - child_cpu,
+            "stages": self.stages,
+        }
+
+    def save(self, failed=False):
+        """Append this run to the metrics file as one JSON line."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_dict(failed), ensure_ascii=False) + "\n")
+
+
+def read_runs(path):
+    """Every run recorded in a metrics file, oldest first."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def add_metrics_arguments(parser, name, directory=DEFAULT_METRICS_DIR):
+    """The metrics options every pipeline script accepts."""
+    default = os.path.join(directory, f"{name}.jsonl")
+    parser.add_argument(
+        "--metrics",
+        default=default,
+        help=f"Append this run's stage metrics to this JSON lines file (default: {default}; '' disables).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        default=[],
+        metavar="STAGE",
+        help="Run STAGE under cProfile and save the stats next to the metrics file; repeat, or 'all'.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="append",
+        default=[],
+        metavar="STAGE",
+        help="Record STAGE's peak traced allocation with tracemalloc; repeat, or 'all'.",
+    )
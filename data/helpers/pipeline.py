@@ -0,0 +1,382 @@
+"""Run the data pipeline as a DAG of stages, skipping the ones that are up to date.
+
+Each stage is one of the existing scripts, declared with the files it reads and
+writes; a stage depends on every stage that writes one of its inputs. Before a
+stage runs, its inputs (data files and its own code) are fingerprinted, and it
+is skipped when the fingerprint matches the last successful run and all of its
+outputs exist. Stages whose upstream stages are done run concurrently, up to
+--jobs at a time, so the catalog, SOC and major scrapes overlap.
+
+    python data/helpers/pipeline.py                  # rebuild whatever is stale
+    python data/helpers/pipeline.py --scrape         # fetch fresh data first
+    python data/helpers/pipeline.py ast --force ast  # rerun one stage
+    python data/helpers/pipeline.py --dry-run
+
+The scrapers read the live sites, which cannot be fingerprinted: they only run
+when their code changed, their outputs are missing, or --scrape/--force says so.
+On the first run, outputs they already left behind are adopted as current.
+File hashes are cached by size and mtime in the state file, so a refresh with
+nothing to do only stats the inputs.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from manifest import hash_json
+from metrics import RunMetrics, add_metrics_arguments
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_STATE = "data/pipeline_state.json"
+PYTHON = [sys.executable]
+# major_scraper is its own Python 3.14 project
+DEFAULT_MAJOR_PYTHON = "uv run python"
+
+HELPERS = "data/helpers"
+# top-level names bound by "import a, b as c" and "from a.b import c", including indented lazy imports
+IMPORT_RE = re.compile(r"^[ \t]*(?:from[ \t]+([\w.]+)[ \t]+import\b|import[ \t]+([\w., \t]+))", re.MULTILINE)
+
+
+def imported_modules(path):
+    """Dotted names of the modules a Python file imports anywhere in its body."""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    modules = set()
+    for match in IMPORT_RE.finditer(source):
+        modules.update([match[1]] if match[1] else [part.split()[0] for part in match[2].split(",") if part.strip()])
+    return modules
+
+
+def code_inputs(*scripts):
+    """scripts plus every module of the repository they import, directly or through each other.
+
+    Read from the import statements rather than listed by hand, so a stage's
+    fingerprint follows its code as modules are added, and files nothing
+    imports (tests, for one) stay out of it. A script imports modules from its
+    own directory and reaches data/helpers by putting it on sys.path, so an
+    import is looked up in both.
+    """
+    files = [path for pattern in scripts for path in ROOT.glob(pattern) if path.is_file()]
+    roots = {path.parent for path in files} | {ROOT / HELPERS}
+    found = set(files)
+    stack = list(files)
+    while stack:
+        for module in imported_modules(stack.pop()):
+            parts = module.split(".")
+            for root in roots:
+                for path in (root.joinpath(*parts[:-1], f"{parts[-1]}.py"), root.joinpath(*parts, "__init__.py")):
+                    if path not in found and path.is_file():
+                        found.add(path)
+                        stack.append(path)
+    return [*scripts, *sorted(path.relative_to(ROOT).as_posix() for path in found - set(files))]
+
+
+class Stage:
+    """One pipeline step: a command run from cwd that turns inputs into outputs.
+
+    Paths are relative to the repository root; inputs may be glob patterns.
+    Scrape stages also read the network, so their inputs alone never make them stale.
+    """
+
+    def __init__(self, name, command, inputs, outputs, cwd=".", scrape=False):
+        self.name = name
+        self.command = command
+        self.inputs = inputs
+        self.outputs = outputs
+        self.cwd = cwd
+        self.scrape = scrape
+
+
+def default_stages(major_python=DEFAULT_MAJOR_PYTHON):
+    return [
+        Stage(
+            "catalog",
+            PYTHON + ["catalog_scraper/main.py"],
+            ["catalog_scraper/valid_codes.txt", *code_inputs("catalog_scraper/main.py")],
+            ["catalog_scraper/all_courses.csv", "data/catalog_data.json"],
+            scrape=True,
+        ),
+        Stage(
+            "soc",
+            ["sh", "-c", "go build && ./soc_scraper"],
+            ["soc_scraper/**/*.go", "soc_scraper/go.mod", "soc_scraper/go.sum"],
+            ["data/SOC_list.json"],
+            cwd="soc_scraper",
+            scrape=True,
+        ),
+        Stage(
+            "majors",
+            shlex.split(major_python) + ["main.py", "--harvest"],
+            ["major_scraper/pyproject.toml", *code_inputs("major_scraper/main.py")],
+            ["data/majors_data.json"],
+            cwd="major_scraper",
+            scrape=True,
+        ),
+        Stage(
+            "cross_check",
+            PYTHON + [f"{HELPERS}/cross_check.py"],
+            ["data/SOC_list.json", "data/catalog_data.json", *code_inputs(f"{HELPERS}/cross_check.py")],
+            ["data/combined.json", "data/combined.graph"],
+        ),
+        Stage(
+            "ast",
+            PYTHON + [f"{HELPERS}/course_ast.py"],
+            ["data/combined.json", *code_inputs(f"{HELPERS}/course_ast.py")],
+            ["data/ast", "data/ast_index.json", "data/unlocks"],
+        ),
+        Stage(
+            "closure",
+            PYTHON + [f"{HELPERS}/closure.py"],
+            ["data/combined.json", *code_inputs(f"{HELPERS}/closure.py")],
+            ["data/closure.bin"],
+        ),
+    ]
+
+
+def upstream_map(stages):
+    """{stage name: names of the stages writing its inputs}; raises ValueError on a cycle."""
+    writers = {output: stage.name for stage in stages for output in stage.outputs}
+    upstream = {
+        stage.name: sorted({writers[path] for path in stage.inputs if path in writers} - {stage.name})
+        for stage in stages
+    }
+    done = set()
+    remaining = dict(upstream)
+    while remaining:
+        ready = [name for name, deps in remaining.items() if done.issuperset(deps)]
+        if not ready:
+            raise ValueError(f"pipeline stages form a cycle: {', '.join(sorted(remaining))}")
+        done.update(ready)
+        for name in ready:
+            del remaining[name]
+    return upstream
+
+
+def with_upstream(names, upstream):
+    """names plus every stage they transitively depend on."""
+    selected = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(upstream[name])
+    return selected
+
+
+class FileHashes:
+    """sha256 of files, reused while a file's size and mtime stay the same."""
+
+    def __init__(self, cached=None):
+        self.entries = dict(cached or {})
+
+    def digest(self, path):
+        try:
+            stat = os.stat(ROOT / path)
+        except FileNotFoundError:
+            self.entries.pop(path, None)
+            return None
+        key = [stat.st_size, stat.st_mtime_ns]
+        entry = self.entries.get(path)
+        if entry and entry[:2] == key:
+            return entry[2]
+        sha = hashlib.sha256()
+        with open(ROOT / path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        self.entries[path] = [*key, sha.hexdigest()]
+        return sha.hexdigest()
+
+    def expand(self, pattern):
+        """Files matching pattern; a plain path is returned as is, existing or not."""
+        if not any(char in pattern for char in "*?["):
+            return [pattern]
+        return sorted(
+            path.relative_to(ROOT).as_posix()
+            for path in ROOT.glob(pattern)
+            if path.is_file() and "__pycache__" not in path.parts
+        )
+
+    def fingerprint(self, stage):
+        # the command is left out, so a different interpreter path does not trigger a rescrape
+        files = [path for pattern in stage.inputs for path in self.expand(pattern)]
+        return hash_json([[path, self.digest(path)] for path in files])
+
+
+def outputs_exist(stage):
+    return all((ROOT / path).exists() for path in stage.outputs)
+
+
+def run_stage(stage):
+    """Run a stage's command; returns (returncode, combined output, seconds)."""
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            stage.command, cwd=ROOT / stage.cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+    except OSError as e:
+        return 127, f"{e}\n", time.perf_counter() - start
+    return proc.returncode, proc.stdout, time.perf_counter() - start
+
+
+class Pipeline:
+    """Runs the stale stages of a stage list in dependency order, recording results in a state file."""
+
+    def __init__(self, stages, state_path=DEFAULT_STATE):
+        self.stages = {stage.name: stage for stage in stages}
+        self.upstream = upstream_map(stages)
+        self.state_path = ROOT / state_path
+        state = {}
+        if self.state_path.exists():
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        self.fingerprints = state.get("stages", {})
+        self.hashes = FileHashes(state.get("files"))
+
+    def stale_reason(self, stage, fingerprint, forced, scrape):
+        """Why stage must run, or None when it is up to date."""
+        if stage.name in forced or "all" in forced:
+            return "forced"
+        if stage.scrape and scrape:
+            return "scrape"
+        if not outputs_exist(stage):
+            return "outputs missing"
+        if self.fingerprints.get(stage.name, {}).get("fingerprint") != fingerprint:
+            return "inputs changed"
+        return None
+
+    def run(self, targets=None, forced=(), scrape=False, jobs=2, dry_run=False, log=print):
+        """Bring targets (default: every stage) up to date; returns {stage name: status}."""
+        selected = with_upstream(targets or self.stages, self.upstream)
+        status = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while len(status) < len(selected):
+                for name in sorted(selected - status.keys() - running.keys()):
+                    deps = self.upstream[name]
+                    if any(status.get(dep) in ("failed", "blocked") for dep in deps):
+                        status[name] = "blocked"
+                        log(f"[{name}] blocked by a failed upstream stage")
+                        continue
+                    if not all(dep in status for dep in deps):
+                        continue
+                    stage = self.stages[name]
+                    fingerprint = self.hashes.fingerprint(stage)
+                    reason = self.stale_reason(stage, fingerprint, forced, scrape)
+                    if reason is None:
+                        status[name] = "fresh"
+                        log(f"[{name}] up to date")
+                    elif reason == "inputs changed" and stage.scrape and name not in self.fingerprints:
+                        # first run with scraped data already in place: take it as current
+                        # rather than hitting the sites; --scrape refreshes it
+                        status[name] = "adopted"
+                        self.fingerprints[name] = {"fingerprint": fingerprint}
+                        log(f"[{name}] existing outputs adopted")
+                    elif dry_run:
+                        # downstream stages see the outputs as they are now
+                        status[name] = "would run"
+                        log(f"[{name}] would run ({reason}): {shlex.join(stage.command)}")
+                    else:
+                        log(f"[{name}] running ({reason}): {shlex.join(stage.command)}")
+                        running[name] = pool.submit(run_stage, stage)
+                if not running:
+                    continue
+
+                finished, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [name for name, future in running.items() if future in finished]:
+                    returncode, output, seconds = running.pop(name).result()
+                    stage = self.stages[name]
+                    for line in output.splitlines():
+                        log(f"[{name}] {line}")
+                    if returncode == 0 and not outputs_exist(stage):
+                        output_missing = [path for path in stage.outputs if not (ROOT / path).exists()]
+                        log(f"[{name}] did not write {', '.join(output_missing)}")
+                        returncode = 1
+                    if returncode != 0:
+                        status[name] = "failed"
+                        self.fingerprints[name] = {"failed": True, "seconds": round(seconds, 3)}
+                        log(f"[{name}] failed with exit status {returncode} after {seconds:.1f}s")
+                        continue
+                    status[name] = "ran"
+                    # inputs are hashed again: a stage may rewrite files it also reads
+                    self.fingerprints[name] = {
+                        "fingerprint": self.hashes.fingerprint(stage),
+                        "seconds": round(seconds, 3),
+                    }
+                    log(f"[{name}] done in {seconds:.1f}s")
+
+        if not dry_run:
+            self.save()
+        return status
+
+    def save(self):
+        for stage in self.stages.values():
+            for path in stage.outputs:
+                if (ROOT / path).is_file():
+                    self.hashes.digest(path)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"stages": self.fingerprints, "files": dict(sorted(self.hashes.entries.items()))}, f, indent=2
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        metavar="STAGE",
+        help="Stages to bring up to date, with everything they depend on (default: all).",
+    )
+    parser.add_argument("--scrape", action="store_true", help="Rerun the scrapers to fetch fresh data.")
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        metavar="STAGE",
+        help="Rerun STAGE even if it is up to date; repeat, or 'all'.",
+    )
+    parser.add_argument("--jobs", type=int, default=3, metavar="N", help="Stages run at once (default: 3).")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would run.")
+    parser.add_argument(
+        "--state",
+        default=DEFAULT_STATE,
+        help=f"Where fingerprints of the last runs are kept (default: {DEFAULT_STATE}).",
+    )
+    parser.add_argument(
+        "--major-python",
+        default=DEFAULT_MAJOR_PYTHON,
+        help=f"Command running the major_scraper interpreter (default: {DEFAULT_MAJOR_PYTHON!r}).",
+    )
+    add_metrics_arguments(parser, "pipeline")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(default_stages(args.major_python), args.state)
+    unknown = [name for name in args.targets + args.force if name not in pipeline.stages and name != "all"]
+    if unknown:
+        parser.error(f"unknown stage(s) {', '.join(unknown)}; stages are {', '.join(pipeline.stages)}")
+
+    with RunMetrics.from_args("pipeline", args) as run:
+        with run.stage("pipeline"):
+            status = pipeline.run(args.targets, args.force, args.scrape, args.jobs, args.dry_run)
+        for name, result in status.items():
+            run.detail("stages", name, {"status": result, **pipeline.fingerprints.get(name, {})})
+
+    counts = {}
+    for result in status.values():
+        counts[result] = counts.get(result, 0) + 1
+    print(", ".join(f"{n} {result}" for result, n in sorted(counts.items())))
+    if any(result in ("failed", "blocked") for result in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
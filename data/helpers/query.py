@@ -0,0 +1,318 @@
+"""In-process prerequisite queries over combined.json.
+
+The catalog is loaded once into integer-indexed adjacency lists, so questions
+like "every transitive prerequisite of X" are answered by a single traversal
+instead of building and walking AST trees:
+
+    graph = PrereqGraph.load("data/combined.json")
+    graph.transitive_prerequisites("MATH 20C")
+    graph.requires("CSE 100", "CSE 12")         # on some path of prerequisites
+    graph.always_requires("CSE 100", "CSE 12")  # whatever OR branch is taken
+    graph.shortest_chain("MATH 20A", "MATH 20C")
+
+    python data/helpers/query.py "CSE 100" --chain "MATH 20A"
+"""
+import argparse
+from collections import deque
+from functools import lru_cache
+
+from artifacts import read_artifact
+from coursedict import build_global_course_dict, lookup_code, normalize_code
+from graphstore import STORE_SUFFIX, GraphStore
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+def strongly_connected_components(adjacency, roots, done=()):
+    """Yield the components reachable from roots as member lists, sinks first.
+
+    Iterative Tarjan over integer adjacency lists. Nodes in done are treated as
+    already solved: they are not yielded and the search does not pass through them.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+
+    for root in roots:
+        if root in index or root in done:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adjacency[root]))]
+        while work:
+            node, successors = work[-1]
+            advanced = False
+            for succ in successors:
+                if succ in done:
+                    continue
+                if succ not in index:
+                    index[succ] = lowlink[succ] = len(index)
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(adjacency[succ])))
+                    advanced = True
+                    break
+                if succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] != index[node]:
+                continue
+            members = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                members.append(member)
+                if member == node:
+                    break
+            yield members
+
+
+class PrereqGraph:
+    """Prerequisite graph with one integer ID per course code.
+
+    Every course has a list of requirement groups: a group is a tuple of
+    alternative course IDs, one of which must be taken (a plain COURSE item is a
+    one-course group). Codes that are referenced but missing from the catalog
+    get IDs too and simply have no prerequisites.
+    """
+
+    def __init__(self, course_dict, cache_size=DEFAULT_CACHE_SIZE):
+        self.codes = []
+        self.ids = {}
+        for code in course_dict:
+            self.intern(code)
+        # IDs below catalog_size are catalog courses; the rest are only referenced
+        self.catalog_size = len(self.codes)
+
+        self.groups = [()] * len(self.codes)
+        for code, course_data in course_dict.items():
+            self.groups[self.ids[code]] = tuple(
+                group for group in map(self.requirement_group, course_data.get("prereq_ast") or []) if group
+            )
+        self.groups.extend(() for _ in range(len(self.groups), len(self.codes)))
+        self._index()
+        self._init_caches(cache_size)
+
+    def _index(self):
+        self.prereqs = [
+            tuple(dict.fromkeys(course for group in groups for course in group)) for groups in self.groups
+        ]
+        dependents = [[] for _ in self.codes]
+        for course, prereqs in enumerate(self.prereqs):
+            for prereq in prereqs:
+                dependents[prereq].append(course)
+        self.dependents = [tuple(courses) for courses in dependents]
+
+    def _init_caches(self, cache_size):
+        # hot results are cached per graph; every cached value is immutable
+        self._closure = lru_cache(maxsize=cache_size)(self._closure)
+        self._chain = lru_cache(maxsize=cache_size)(self._chain)
+        # courses always needed, filled in as queries reach them; bounded by the catalog
+        self._required = {}
+
+    @classmethod
+    def load(cls, path="data/combined.json", cache_size=DEFAULT_CACHE_SIZE):
+        """Load combined.json, or a graphstore file, which skips parsing and normalizing."""
+        if str(path).endswith(STORE_SUFFIX):
+            return cls.from_store(GraphStore.open(path), cache_size)
+        return cls(build_global_course_dict(read_artifact(path)), cache_size)
+
+    @classmethod
+    def from_store(cls, store, cache_size=DEFAULT_CACHE_SIZE):
+        """A graph answering from an open GraphStore, which must stay open while it is used.
+
+        Nothing is decoded up front: codes, groups and both adjacency lists are
+        views of the mapped arrays, filled in per course as queries reach it.
+        """
+        graph = cls.__new__(cls)
+        graph.codes, graph.ids, graph.groups, graph.prereqs, graph.dependents = store.columns()
+        graph.catalog_size = store.catalog_size
+        graph._init_caches(cache_size)
+        return graph
+
+    def intern(self, code):
+        idx = self.ids.get(code)
+        if idx is None:
+            idx = self.ids[code] = len(self.codes)
+            self.codes.append(code)
+        return idx
+
+    def requirement_group(self, item):
+        ctype = item.get("type")
+        if ctype == "COURSE":
+            return (self.intern(normalize_code(item.get("course_id"))),)
+        if ctype == "OR":
+            return tuple(dict.fromkeys(
+                self.intern(normalize_code(sub.get("course_id"))) for sub in item.get("items", [])
+            ))
+        return ()
+
+    def id_of(self, code):
+        """Integer ID of a course code in any case; raises KeyError for codes the catalog never mentions."""
+        code = lookup_code(code)
+        try:
+            return self.ids[code]
+        except KeyError:
+            raise KeyError(f"Unknown course {code!r}") from None
+
+    def __contains__(self, code):
+        return lookup_code(code) in self.ids
+
+    def __len__(self):
+        return len(self.codes)
+
+    def names(self, ids):
+        return [self.codes[idx] for idx in ids]
+
+    def prerequisites(self, code):
+        """Courses listed directly in code's prerequisites, in the order they appear."""
+        return self.names(self.prereqs[self.id_of(code)])
+
+    def requirement_groups(self, code):
+        """code's prerequisites as lists of alternatives; one course from each list is needed."""
+        return [self.names(group) for group in self.groups[self.id_of(code)]]
+
+    def _closure(self, start, reverse=False):
+        adjacency = self.dependents if reverse else self.prereqs
+        seen = {start}
+        stack = [start]
+        while stack:
+            for succ in adjacency[stack.pop()]:
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append(succ)
+        seen.discard(start)
+        return frozenset(seen)
+
+    def transitive_prerequisites(self, code):
+        """Every course reachable through any prerequisite branch of code."""
+        return set(self.names(self._closure(self.id_of(code))))
+
+    def transitive_dependents(self, code):
+        """Every course that lists code somewhere in its transitive prerequisites."""
+        return set(self.names(self._closure(self.id_of(code), True)))
+
+    def requires(self, code, other):
+        """True if other can be needed for code, i.e. it sits on some prerequisite path."""
+        return self.id_of(other) in self._closure(self.id_of(code))
+
+    def _required_by(self, course):
+        # a one-course group adds that course and everything it needs; an OR group
+        # only adds what all of its options need
+        result = set()
+        for group in self.groups[course]:
+            shared = self._required.get(group[0], frozenset()) | {group[0]}
+            for option in group[1:]:
+                shared = shared & (self._required.get(option, frozenset()) | {option})
+            result |= shared
+        result.discard(course)
+        return frozenset(result)
+
+    def _mandatory(self, start):
+        """Courses needed for start whatever OR branch is taken.
+
+        Components of the prerequisite graph reachable from start are solved sinks
+        first (iterative Tarjan); a prerequisite cycle is iterated to its least
+        fixpoint, so the answer never depends on where the cycle was entered.
+        Results are kept for every course the traversal finishes.
+        """
+        if start in self._required:
+            return self._required[start]
+
+        for members in strongly_connected_components(self.prereqs, [start], self._required):
+            if len(members) == 1 and members[0] not in self.prereqs[members[0]]:
+                self._required[members[0]] = self._required_by(members[0])
+                continue
+            for member in members:
+                self._required[member] = frozenset()
+            changed = True
+            while changed:
+                changed = False
+                for member in members:
+                    result = self._required_by(member)
+                    if result != self._required[member]:
+                        self._required[member] = result
+                        changed = True
+
+        return self._required[start]
+
+    def always_requires(self, code, other):
+        """True if other is needed for code no matter which OR alternatives are chosen."""
+        return self.id_of(other) in self._mandatory(self.id_of(code))
+
+    def required_prerequisites(self, code):
+        """The courses always_requires would answer True for."""
+        return set(self.names(self._mandatory(self.id_of(code))))
+
+    def _chain(self, start, goal):
+        parent = {start: None}
+        queue = deque([start])
+        while queue:
+            course = queue.popleft()
+            if course == goal:
+                chain = []
+                while course is not None:
+                    chain.append(course)
+                    course = parent[course]
+                return tuple(reversed(chain))
+            for succ in self.dependents[course]:
+                if succ not in parent:
+                    parent[succ] = course
+                    queue.append(succ)
+        return None
+
+    def shortest_chain(self, start, goal):
+        """Fewest courses leading from start to goal, each a direct prerequisite of the next.
+
+        Returns [start, ..., goal], or None when goal never depends on start.
+        """
+        chain = self._chain(self.id_of(start), self.id_of(goal))
+        return None if chain is None else self.names(chain)
+
+    def cache_info(self):
+        return {
+            "transitive": self._closure.cache_info(),
+            "chain": self._chain.cache_info(),
+        }
+
+    def cache_clear(self):
+        self._closure.cache_clear()
+        self._chain.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer prerequisite queries for one course.")
+    parser.add_argument("course", help="Course code, e.g. 'CSE 100'.")
+    parser.add_argument("--chain", metavar="FROM", help="Also print the shortest chain from FROM to the course.")
+    parser.add_argument(
+        "--input",
+        default="data/combined.json",
+        help="Merged course artifact to load (default: data/combined.json).",
+    )
+    args = parser.parse_args()
+
+    graph = PrereqGraph.load(args.input)
+    course = lookup_code(args.course)
+    start = lookup_code(args.chain)
+    for code in (course, start):
+        if code is not None and code not in graph:
+            parser.error(f"unknown course {code!r}")
+    print(f"Direct:     {', '.join(graph.prerequisites(course)) or '-'}")
+    print(f"Required:   {', '.join(sorted(graph.required_prerequisites(course))) or '-'}")
+    print(f"Transitive: {', '.join(sorted(graph.transitive_prerequisites(course))) or '-'}")
+    print(f"Unlocks:    {len(graph.transitive_dependents(course))} courses")
+    if start:
+        chain = graph.shortest_chain(start, course)
+        print(f"Chain:      {' -> '.join(chain) if chain else '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+# the helpers import each other by bare name, as the scripts do with data/helpers on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+VERSION = "2026-03-02"
+
+# code -> requirement groups; a tuple is an OR of its codes. ECON 1 is only referenced.
+CATALOG = {
+    "MATH 10": [],
+    "MATH 20A": ["MATH 10"],
+    "MATH 20B": ["MATH 20A"],
+    "MATH 20C": ["MATH 20B"],
+    "CSE 11": [],
+    "CSE 12": ["CSE 11"],
+    "CSE 100": ["CSE 12", ("MATH 20C", "MATH 20B")],
+    # an OR cycle: each needs the other or CHEM 6
+    "PHYS 1": [("PHYS 2", "CHEM 6")],
+    "PHYS 2": [("PHYS 1", "CHEM 6")],
+    "CHEM 6": [],
+    # an AND cycle: each always needs the other
+    "BILD 1": ["BILD 2", "ECON 1"],
+    "BILD 2": ["BILD 1"],
+}
+
+
+def course_item(code):
+    return {"type": "COURSE", "course_id": code.replace(" ", "")}
+
+
+def course_record(code, groups, title=None, version=VERSION):
+    """A combined.json entry for code with the given requirement groups."""
+    items = [
+        {"type": "OR", "items": [course_item(option) for option in group]}
+        if isinstance(group, tuple) else course_item(group)
+        for group in groups
+    ]
+    course = {"code": code, "title": title or f"Topics in {code}"}
+    if items:
+        course["prereq"] = {"type": "AND", "items": items}
+    return {"meta": {"version": version, "generated_at": f"{version}T00:00:00Z"}, "course": course}
+
+
+@pytest.fixture
+def records():
+    return [course_record(code, groups) for code, groups in CATALOG.items()]
+
+
+@pytest.fixture
+def graph(records):
+    from coursedict import build_global_course_dict
+    from query import PrereqGraph
+
+    return PrereqGraph(build_global_course_dict(records))
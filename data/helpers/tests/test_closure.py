@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from closure import TransitiveClosure
+from eligibility import EligibilityEngine
+
+
+def test_closure_matches_transitive_prerequisites(graph, tmp_path):
+    closure = TransitiveClosure.build(graph)
+    path = tmp_path / "closure.bin"
+    closure.save(path)
+    mapped = TransitiveClosure.open(path)
+    try:
+        for code in graph.codes:
+            assert closure.prerequisites(code) == graph.transitive_prerequisites(code)
+            assert mapped.prerequisites(code) == graph.transitive_prerequisites(code)
+        # a cycle member is upstream of the other, but not of itself
+        assert mapped.is_upstream("PHYS 2", "PHYS 1")
+        assert not mapped.is_upstream("PHYS 1", "PHYS 1")
+        assert not mapped.is_upstream("CSE 100", "MATH 10")
+        assert mapped.is_upstream("math10", "cse100")
+        assert mapped.upstream_pairs() == sum(len(graph.transitive_prerequisites(code)) for code in graph.codes)
+    finally:
+        mapped.close()
+
+
+def test_eligibility_checks_every_group(graph):
+    engine = EligibilityEngine(graph)
+    transcripts = [
+        [],
+        ["CSE 11", "CSE 12", "MATH 20B"],
+        {"completed": ["CSE 12"], "inProgress": ["MATH 20C"]},
+        ["CHEM 6"],
+    ]
+    no_prereqs = ["CHEM 6", "CSE 11", "MATH 10"]
+    assert engine.eligible_courses(transcripts) == [
+        no_prereqs,
+        ["CHEM 6", "CSE 100", "MATH 10", "MATH 20C"],
+        ["CHEM 6", "CSE 11", "MATH 10"],
+        ["CSE 11", "MATH 10", "PHYS 1", "PHYS 2"],
+    ]
+    assert engine.eligible_courses(transcripts, in_progress=True)[2] == ["CHEM 6", "CSE 100", "CSE 11", "MATH 10"]
+    assert engine.eligible_counts(transcripts, batch_size=3) == [3, 4, 3, 4]
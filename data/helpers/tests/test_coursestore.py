@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from coursestore import CourseStore
+
+PLAN_A = {"code": "CS26", "college": "RE", "length": 4, "courses": ["CSE 11", "CSE 12"]}
+PLAN_B = {"code": "CS26", "college": "RE", "length": 4, "courses": ["CSE 8A", "CSE 8B", "CSE 12"]}
+
+
+def counts(inserted=0, updated=0, unchanged=0, stale=0, removed=0):
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged, "stale": stale, "removed": removed}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with CourseStore(tmp_path / "courses.db") as store:
+        yield store
+
+
+def retitled(record, title, version=None):
+    record = json.loads(json.dumps(record))
+    record["course"]["title"] = title
+    if version:
+        record["meta"]["version"] = version
+    return record
+
+
+def test_upsert_counts(store, records):
+    assert store.ingest_courses(records, "combined") == counts(inserted=len(records))
+    assert store.ingest_courses(records, "combined") == counts(unchanged=len(records))
+
+    changed = retitled(records[0], "Precalculus")
+    assert store.ingest_courses([changed], "combined") == counts(updated=1)
+    assert store.course("MATH 10")["course"]["title"] == "Precalculus"
+
+    # an older record never replaces a newer row
+    older = retitled(records[0], "Old title", version="2025-01-01")
+    assert store.ingest_courses([older], "combined") == counts(stale=1)
+    assert store.course("MATH 10")["course"]["title"] == "Precalculus"
+
+
+def test_prune_marks_unseen_rows_removed(store, records):
+    store.ingest_courses(records, "combined")
+    assert store.ingest_courses(records[1:], "combined", prune=True) == counts(unchanged=len(records) - 1, removed=1)
+    assert store.course("MATH 10") is None
+    assert "MATH" in store.departments()
+    # the other source is untouched
+    store.ingest_courses(records[:1], "catalog")
+    assert store.ingest_courses(records[1:], "combined", prune=True) == counts(unchanged=len(records) - 1)
+    assert store.course("MATH 10", source="catalog") is not None
+
+
+def test_export_is_skipped_until_its_rows_change(store, records, tmp_path):
+    path = tmp_path / "combined.json"
+    store.ingest_courses(records, "combined")
+    assert store.export_courses(path) == len(records)
+    assert [record["course"]["code"] for record in json.loads(path.read_text())] == sorted(
+        record["course"]["code"] for record in records
+    )
+    assert store.export_courses(path) is None
+
+    store.ingest_courses(records, "combined")
+    assert store.export_courses(path) is None
+    # a change in another department leaves that department's export alone
+    department = tmp_path / "departments"
+    assert store.export_departments(department)["CSE"] == 3
+    store.ingest_courses([retitled(records[0], "Precalculus")], "combined")
+    written = store.export_departments(department)
+    assert written["MATH"] == 4
+    assert all(count is None for name, count in written.items() if name != "MATH")
+    assert store.export_courses(path) == len(records)
+
+
+def test_plans_are_keyed_by_content(store):
+    assert store.ingest_plans([PLAN_A, PLAN_A]) == counts(inserted=1)
+    assert store.ingest_plans([PLAN_A, PLAN_B], prune=True) == counts(inserted=1, unchanged=1)
+    assert store.ingest_plans([PLAN_B, PLAN_A], prune=True) == counts(unchanged=2)
+    assert len(store.plans("CS26")) == 2
+    assert store.ingest_plans([PLAN_B], prune=True) == counts(unchanged=1, removed=1)
+    assert store.plans("CS26") == [PLAN_B]
@@ -0,0 +1,54 @@
+from coursedict import build_global_course_dict
+from graphstore import write_graph_store
+from query import PrereqGraph
+
+
+def test_always_requires_follows_every_or_branch(graph):
+    # MATH 20C needs MATH 20B, so either branch of CSE 100 takes MATH 20B
+    assert graph.required_prerequisites("CSE 100") == {"CSE 12", "CSE 11", "MATH 20B", "MATH 20A", "MATH 10"}
+    assert graph.requires("CSE 100", "MATH 20C")
+    assert not graph.always_requires("CSE 100", "MATH 20C")
+
+
+def test_or_cycle_requires_nothing(records):
+    # the least fixpoint: CHEM 6 alone satisfies either course, whichever is asked first
+    for first, second in (("PHYS 1", "PHYS 2"), ("PHYS 2", "PHYS 1")):
+        graph = PrereqGraph(build_global_course_dict(records))
+        assert graph.required_prerequisites(first) == set()
+        assert graph.required_prerequisites(second) == set()
+        assert graph.requires(first, second)
+        assert not graph.always_requires(first, second)
+
+
+def test_and_cycle_requires_its_members(graph):
+    assert graph.required_prerequisites("BILD 2") == {"BILD 1", "ECON 1"}
+    assert graph.required_prerequisites("BILD 1") == {"BILD 2", "ECON 1"}
+    assert graph.transitive_prerequisites("BILD 1") == {"BILD 2", "ECON 1"}
+
+
+def test_shortest_chain(graph):
+    assert graph.shortest_chain("MATH 10", "CSE 100") == ["MATH 10", "MATH 20A", "MATH 20B", "CSE 100"]
+    assert graph.shortest_chain("CSE 100", "MATH 10") is None
+
+
+def test_codes_are_looked_up_in_any_case(graph):
+    assert "cse100" in graph
+    assert graph.shortest_chain("math20a", "Math 20C") == ["MATH 20A", "MATH 20B", "MATH 20C"]
+
+
+def test_store_answers_like_json_graph(graph, tmp_path):
+    path = tmp_path / "combined.graph"
+    write_graph_store(graph, {}, path)
+    store_graph = PrereqGraph.load(path)
+
+    assert len(store_graph) == len(graph)
+    assert store_graph.catalog_size == graph.catalog_size
+    for code in graph.codes:
+        assert store_graph.requirement_groups(code) == graph.requirement_groups(code)
+        assert store_graph.transitive_prerequisites(code) == graph.transitive_prerequisites(code)
+        assert store_graph.transitive_dependents(code) == graph.transitive_dependents(code)
+        assert store_graph.required_prerequisites(code) == graph.required_prerequisites(code)
+        assert store_graph.shortest_chain("MATH 10", code) == graph.shortest_chain("MATH 10", code)
+    assert "ECON 1" in store_graph
+    assert store_graph.prerequisites("cse100") == ["CSE 12", "MATH 20C", "MATH 20B"]
+    assert "ECON 2" not in store_graph
@@ -1,12 +1,13 @@
+import asyncio
 import majorclass as mj
 import httpx
 import majorclass as mj
 
 class Client():
-    def __init__(self, year: int):
+    def __init__(self, year: int, baseurl: str = "https://plans.ucsd.edu/controller.php"):
         self.year=year
         self.htpc=httpx.Client()
-        self.baseurl="https://plans.ucsd.edu/controller.php"
+        self.baseurl=baseurl
     
     # get all basic metadata (we want to run this at least once)
     def get_controls(self) -> mj.SearchControlResponse:
@@ -25,3 +26,57 @@ class Client():
         rps=self.htpc.get(f"{self.baseurl}?action=LoadPlans&college={college.code}&year={self.year}&major={major.major_code}")
         res=mj.LoadPlansResponse.model_validate_json(rps.text)
         return res
+
+
+# responses worth retrying; everything else is returned (and validated) as is
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsyncClient():
+    def __init__(self, year: int, concurrency: int = 8, retries: int = 3, backoff: float = 0.5,
+                 baseurl: str = "https://plans.ucsd.edu/controller.php"):
+        self.year=year
+        self.baseurl=baseurl
+        self.retries=retries
+        self.backoff=backoff
+        # one pooled client; the semaphore keeps at most `concurrency` requests in flight
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        self.htpc=httpx.AsyncClient(limits=limits, timeout=30.0)
+        self.semaphore=asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.htpc.aclose()
+
+    # GET with retries on transport errors and 429/5xx, backing off exponentially
+    async def _get(self, params: dict) -> str:
+        for attempt in range(self.retries+1):
+            async with self.semaphore:
+                try:
+                    rps=await self.htpc.get(self.baseurl, params=params)
+                except httpx.TransportError:
+                    if attempt==self.retries:
+                        raise
+                else:
+                    if rps.status_code not in RETRY_STATUS_CODES:
+                        return rps.text
+                    if attempt==self.retries:
+                        rps.raise_for_status()
+            await asyncio.sleep(self.backoff*2**attempt)
+
+    async def get_controls(self) -> mj.SearchControlResponse:
+        text=await self._get({"action": "LoadSearchControls"})
+        return mj.SearchControlResponse.model_validate_json(text)
+
+    async def get_majors(self, department: mj.Department, college: mj.College)->list[mj.Major]:
+        text=await self._get({"action": "LoadMajors", "year": self.year, "college": college.code, "department": department.code})
+        return mj.LoadMajorsResponse.model_validate_json(text).root
+
+    async def get_plan(self, college: mj.College, major: mj.Major)->mj.LoadPlansResponse:
+        text=await self._get({"action": "LoadPlans", "college": college.code, "year": self.year, "major": major.major_code})
+        return mj.LoadPlansResponse.model_validate_json(text)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+
+import client as c
+import majorclass as mj
+from pydantic import TypeAdapter
+
+plan_adapter = TypeAdapter(list[mj.Plan])
+
+
+# checkpoint: one JSON line per finished major, {"major_code": ..., "plans": [...]}
+def load_checkpoint(path: str) -> dict[str, list[mj.Plan]]:
+    done={}
+    if not os.path.exists(path):
+        return done
+    with open(path,"r") as f:
+        for line in f:
+            line=line.strip()
+            if not line:
+                continue
+            try:
+                entry=json.loads(line)
+            except json.JSONDecodeError:
+                # a run killed mid-write leaves a partial last line; that major is fetched again
+                continue
+            done[entry["major_code"]]=plan_adapter.validate_python(entry["plans"])
+    return done
+
+
+def ends_mid_line(path: str) -> bool:
+    if not os.path.exists(path) or os.path.getsize(path)==0:
+        return False
+    with open(path,"rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1)!=b"\n"
+
+
+async def discover_majors(cl: c.AsyncClient, deps: list[mj.Department], clg: mj.College) -> list[mj.Major]:
+    per_dep=await asyncio.gather(*(cl.get_majors(dep,clg) for dep in deps))
+    return [mjr for majors in per_dep for mjr in majors]
+
+
+async def harvest_plans(year: int, checkpoint: str, concurrency: int = 8, retries: int = 3, backoff: float = 0.5,
+                        baseurl: str = "https://plans.ucsd.edu/controller.php") -> list[mj.Plan]:
+    """Fetch every plan for the first college, resuming from `checkpoint`.
+
+    Each major is appended to the checkpoint as soon as its plans arrive, so an
+    interrupted run only refetches what it had not finished. Plans come back in
+    discovery order, as the sequential crawl produced them.
+    """
+    async with c.AsyncClient(year, concurrency=concurrency, retries=retries, backoff=backoff, baseurl=baseurl) as cl:
+        ctrl=await cl.get_controls()
+        clg=ctrl.colleges[0]
+
+        print("Discovering majors")
+        majors=await discover_majors(cl, ctrl.departments, clg)
+        print(f"{len(majors)} majors discovered")
+
+        done=load_checkpoint(checkpoint)
+        todo={mjr.major_code: mjr for mjr in majors if mjr.major_code not in done}
+        print(f"{len(done)} majors already harvested, {len(todo)} to go")
+
+        partial=ends_mid_line(checkpoint)
+        with open(checkpoint,"a") as f:
+            # finish a partial last line, so the next entry starts on a line of its own
+            if partial:
+                f.write("\n")
+            async def fetch(mjr: mj.Major):
+                plan_set=(await cl.get_plan(clg,mjr)).root
+                entry={"major_code": mjr.major_code, "plans": plan_adapter.dump_python(plan_set, mode="json")}
+                f.write(json.dumps(entry)+"\n")
+                f.flush()
+                done[mjr.major_code]=plan_set
+                print(mjr.major_code)
+
+            # let every request finish (and checkpoint) before surfacing the first failure
+            results=await asyncio.gather(*(fetch(mjr) for mjr in todo.values()), return_exceptions=True)
+            for res in results:
+                if isinstance(res, BaseException):
+                    raise res
+
+    plans=[]
+    for mjr in majors:
+        plans+=done[mjr.major_code]
+    print(f"{len(plans)} plans discovered")
+    return plans
+
+
+def harvest(year: int, output: str = "intermediate.json", checkpoint: str = "intermediate.checkpoint.jsonl", **kwargs):
+    plans=asyncio.run(harvest_plans(year, checkpoint, **kwargs))
+
+    print("dumping intermediate file to disk")
+    dump=plan_adapter.dump_json(plans, indent=4)
+    with open(output,"w") as f:
+        f.write(dump.decode('utf-8'))
+    return plans
@@ -1,53 +1,63 @@
+import argparse
+import json
+import sys
+from pathlib import Path
 import course
 import client as c
+import harvest as hv
 import majorclass as mj
-from pydantic import TypeAdapter
+import stream
 import regex as re
+# run metrics are shared with the data/helpers stages
+sys.path.append(str(Path(__file__).resolve().parent.parent/"data"/"helpers"))
+import metrics
+import coursestore
 def main():
-    """
-    cl=c.Client(2024)
-    ctrl=cl.get_controls()
+    parser=argparse.ArgumentParser(description="Harvest and filter UCSD major plans.")
+    parser.add_argument("--harvest", action="store_true", help="Crawl plans.ucsd.edu into intermediate.json first.")
+    parser.add_argument("--year", type=int, default=2024, help="Catalog year to harvest.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight while harvesting.")
+    parser.add_argument("--checkpoint", default="intermediate.checkpoint.jsonl",
+                        help="Per-major progress file; an interrupted harvest resumes from it.")
+    parser.add_argument("--base-url", default="https://plans.ucsd.edu/controller.php",
+                        help="Plans controller endpoint (point at a local fake for testing).")
+    parser.add_argument("--input", default="intermediate.json", help="Harvested plans to process.")
+    parser.add_argument("--output", default="../data/majors_data.json", help="Where to write the filtered plans.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for validating and filtering plans (large multi-year datasets).")
+    coursestore.add_store_argument(parser, "plans")
+    metrics.add_metrics_arguments(parser, "major_scraper", directory="../data/metrics")
+    args=parser.parse_args()
 
-    deps=ctrl.departments
-    clg=ctrl.colleges[0]
+    with metrics.RunMetrics.from_args("major_scraper", args) as run:
+        if args.harvest:
+            with run.stage("harvest"):
+                plans=hv.harvest(args.year, output=args.input, checkpoint=args.checkpoint,
+                                 concurrency=args.concurrency, baseurl=args.base_url)
+                metrics.count("plans_harvested", len(plans))
+                metrics.record_file(args.input, {"bytes": Path(args.input).stat().st_size})
 
-    print("Discovering majors")
-    majors=[]
-    for dep in deps:
-        majors=majors+cl.get_majors(dep,clg)
-    print(f"{len(majors)} majors discovered")
+        # plans are read, validated, filtered and written one at a time, so memory
+        # does not grow with the dataset
+        print("Processing plans")
+        with run.stage("process"):
+            raw_plans=stream.iter_json_array(args.input)
+            processed=stream.map_ordered(handle_plan, raw_plans, jobs=args.jobs)
+            if args.store:
+                # the processed plans are a full snapshot, so plans that disappeared are marked removed
+                with coursestore.CourseStore(args.store) as store, store.ingest("plans", "majors", prune=True) as batch:
+                    count=stream.write_json_array(batch.tap(processed, json.loads), args.output, indent=4)
+            else:
+                count=stream.write_json_array(processed, args.output, indent=4)
+            metrics.count("plans_processed", count)
+            metrics.record_file(args.output, {"bytes": Path(args.output).stat().st_size})
+    print(f"{count} plans written to {args.output}")
 
-    print("Discovering plans")
-    plans=[]
-    for mjr in majors:
-        print(mjr.major_code)
-        plan_set=cl.get_plan(clg,mjr).root
-        plans+=plan_set
-    print(f"{len(plans)} plans discovered")
 
-    print("dumping intermediate file to disk")
-    plan_adapter = TypeAdapter(list[mj.Plan])
-    dump=plan_adapter.dump_json(plans, indent=4)
-    with open("intermediate.json","w") as f:
-        f.write(dump.decode('utf-8'))
-    """
-
-    plan_adapter = TypeAdapter(list[mj.Plan])
-    f=open("intermediate.json","r")
-    plans=plan_adapter.validate_json(f.read())
-
-
-    # phase 1 filtering
-    print("Processing plans")
-    processed=list(map(process_plans, plans))
-    # phase 2 filtering
-    processed=list(map(filter_plans, processed))
-
-    print("Dumping processed file to disk")
-    plan_adapter = TypeAdapter(list[course.Plan])
-    dump=plan_adapter.dump_json(processed, indent=4)
-    with open("../data/majors_data.json","w") as f:
-        f.write(dump.decode('utf-8'))
+# validate one raw plan and run both filter phases; returns the plan as indented JSON
+def handle_plan(raw: dict) -> str:
+    plan=mj.Plan.model_validate(raw)
+    return filter_plans(process_plans(plan)).model_dump_json(indent=4)
 
 
 def sanitize_course_name(s: str)->str:
@@ -91,32 +101,25 @@ def process_plans(plan: mj.Plan):
             )
 
 # phase 2 filter
+FILTER_PHRASES=[
+        "ahi",
+        "ge",
+        "ccer",
+        "elective",
+        "language",
+        "dei",
+        "concentration",
+        "major",
+        "programming",
+        "te",
+        "subject domain",
+        ]
+# one precompiled alternation instead of a substring scan per phrase. phrases match
+# at the start of a word, so "te" drops "TE" and "technical elective" but not "LTEN 21"
+FILTER_RE=re.compile(r"\b(?:"+"|".join(map(re.escape, FILTER_PHRASES))+")")
+
 def filter_plans(plan: course.Plan):
-    # this isn't what it looks like!
-    # rf"{word}"
-    filter_phrases=[
-            "ahi",
-            "ge",
-            "ccer",
-            "elective",
-            "language",
-            "dei",
-            "concentration",
-            "major"
-            "programming"
-            "te"
-            "subject domain"
-            ]
-    new_children:list[course.CourseNode]=[]
-    for c in plan.requirements[0].children:
-        name=c.code.lower()
-        add=True
-        for p in filter_phrases:
-            if p in name or p==name:
-                add=False
-        if add:
-            new_children.append(c)
-    plan.requirements[0].children=new_children
+    plan.requirements[0].children=[c for c in plan.requirements[0].children if not FILTER_RE.search(c.code.lower())]
     return plan
 
 if __name__ == "__main__":
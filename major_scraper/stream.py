@@ -0,0 +1,105 @@
+import collections
+import itertools
+import json
+import multiprocessing
+from typing import Any, Callable, Iterable, Iterator
+
+
+# yields the elements of a top-level JSON array one at a time, holding at most one
+# element (plus a read chunk) in memory. elements must be objects or arrays, which
+# cannot be mistaken for complete values when a chunk cuts them short.
+def iter_json_array(path: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    decoder=json.JSONDecoder()
+    with open(path,"r",encoding="utf-8") as f:
+        buf=""
+        pos=0
+        eof=False
+        need_sep=False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            more=f.read(chunk_size)
+            eof=not more
+            buf=buf[pos:]+more
+            pos=0
+            return not eof
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos<len(buf) and buf[pos] in " \t\r\n":
+                    pos+=1
+                if pos<len(buf) or not fill():
+                    return
+
+        skip_ws()
+        if pos>=len(buf) or buf[pos]!="[":
+            raise ValueError(f"{path}: expected a JSON array")
+        pos+=1
+        while True:
+            skip_ws()
+            if pos>=len(buf):
+                raise ValueError(f"{path}: unterminated JSON array")
+            if buf[pos]=="]":
+                return
+            if need_sep:
+                if buf[pos]!=",":
+                    raise ValueError(f"{path}: expected ',' between array elements")
+                pos+=1
+                need_sep=False
+                skip_ws()
+            try:
+                item,end=decoder.raw_decode(buf,pos)
+            except json.JSONDecodeError:
+                # element runs past the buffered text; read on and retry it
+                if not fill():
+                    raise
+                continue
+            need_sep=True
+            pos=end
+            yield item
+
+
+# writes already-encoded JSON elements as one array, laid out like
+# TypeAdapter(list[...]).dump_json(items, indent=indent)
+def write_json_array(items: Iterable[str], path: str, indent: int = 4) -> int:
+    pad="\n"+" "*indent
+    count=0
+    with open(path,"w",encoding="utf-8") as f:
+        for item in items:
+            f.write(","+pad if count else "["+pad)
+            # encoded JSON never holds a raw newline, so re-indenting line by line is safe
+            f.write(item.replace("\n",pad))
+            count+=1
+        f.write("\n]" if count else "[]")
+    return count
+
+
+def _run_batch(func: Callable, batch: tuple) -> list:
+    return [func(item) for item in batch]
+
+
+# tuples of up to size items; itertools.batched, which needs Python 3.12
+def batched(items: Iterable, size: int) -> Iterator[tuple]:
+    it=iter(items)
+    while batch:=tuple(itertools.islice(it, size)):
+        yield batch
+
+
+# map func over items in order. with jobs>1 the work runs in a process pool, fed in
+# batches with at most 2*jobs batches in flight so memory stays flat however long
+# the input is. func must be picklable, i.e. a module-level function.
+def map_ordered(func: Callable, items: Iterable, jobs: int = 1, batch_size: int = 64) -> Iterator:
+    if jobs<=1:
+        yield from map(func, items)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        pending=collections.deque()
+        for batch in batched(items, batch_size):
+            pending.append(pool.apply_async(_run_batch, (func, batch)))
+            if len(pending)>=2*jobs:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
@@ -0,0 +1,68 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+import sys
+import threading
+import time
+
+import pytest
+
+# the harvester needs the major_scraper environment (pydantic); skip elsewhere
+pytest.importorskip("pydantic")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class StubController:
+    """Local stand-in for plans.ucsd.edu/controller.php, answering from scripted responses.
+
+    Responses are keyed by the request's query parameters; each request takes
+    the next scripted (status, body, delay) and the last one keeps answering.
+    Every request is recorded as its parameter dict.
+    """
+
+    def __init__(self):
+        self.routes={}
+        self.requests=[]
+        self.lock=threading.Lock()
+        stub=self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params=dict(parse_qsl(urlsplit(self.path).query))
+                with stub.lock:
+                    stub.requests.append(params)
+                    script=stub.routes.get(frozenset(params.items()), [(404, "", 0)])
+                    status, body, delay=script.pop(0) if len(script)>1 else script[0]
+                time.sleep(delay)
+                data=body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd=ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread=threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}/controller.php"
+
+    def route(self, params: dict, *responses):
+        """Script the responses to params; each is (status, body[, delay seconds])."""
+        self.routes[frozenset((k, str(v)) for k, v in params.items())]=[tuple(r)+(0,)*(3-len(r)) for r in responses]
+
+    def count(self, **params) -> int:
+        return sum(1 for req in self.requests if all(req.get(k)==str(v) for k, v in params.items()))
+
+
+@pytest.fixture
+def stub_controller():
+    server=StubController()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import harvest as hv
+
+YEAR=2024
+COLLEGE={"code": "RE", "name": "Revelle"}
+DEPARTMENTS=["BIO", "CSE"]
+MAJORS={"BIO": ["BI34", "BI35"], "CSE": ["CS26", "CS27"]}
+
+
+def plan(major_code: str) -> dict:
+    course={"course_id": 1, "plan_id": 7, "course_name": "CSE 11", "units": "4", "course_type": "DEPARTMENT",
+            "year_taken": 1, "quarter_taken": 1, "ge_major_overlap": False}
+    return {"planId": 7, "courses": [[[course]]], "college_code": COLLEGE["code"], "college_name": COLLEGE["name"],
+            "major_code": major_code, "department": major_code[:2], "start_year": YEAR,
+            "major_title": f"Major {major_code}", "plan_length": 4}
+
+
+def controls() -> str:
+    deps=[{"code": code, "description": code, "name": code} for code in DEPARTMENTS]
+    return json.dumps({"years": [YEAR], "departments": deps, "colleges": [COLLEGE]})
+
+
+def plans_params(major_code: str) -> dict:
+    return {"action": "LoadPlans", "college": COLLEGE["code"], "year": YEAR, "major": major_code}
+
+
+def script_catalog(stub, delays=None):
+    """Script a catalog of DEPARTMENTS x MAJORS; delays maps a major code to its plan response delay."""
+    stub.route({"action": "LoadSearchControls"}, (200, controls()))
+    for dep, codes in MAJORS.items():
+        majors=[{"major": code, "major_code": code} for code in codes]
+        stub.route({"action": "LoadMajors", "year": YEAR, "college": COLLEGE["code"], "department": dep},
+                   (200, json.dumps(majors)))
+        for code in codes:
+            stub.route(plans_params(code), (200, json.dumps([plan(code)]), (delays or {}).get(code, 0)))
+
+
+def run_harvest(stub, checkpoint, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return asyncio.run(hv.harvest_plans(YEAR, str(checkpoint), baseurl=stub.url, **kwargs))
+
+
+def checkpointed(checkpoint) -> list[str]:
+    return [json.loads(line)["major_code"] for line in checkpoint.read_text().splitlines() if line.strip()]
+
+
+def test_plans_come_back_in_discovery_order(stub_controller, tmp_path):
+    # the first majors answer last, so completion order is reversed
+    script_catalog(stub_controller, delays={"BI34": 0.15, "BI35": 0.1, "CS26": 0.05})
+    checkpoint=tmp_path/"checkpoint.jsonl"
+
+    plans=run_harvest(stub_controller, checkpoint, concurrency=4)
+    assert [p.major_code for p in plans]==["BI34", "BI35", "CS26", "CS27"]
+    assert checkpointed(checkpoint)==["CS27", "CS26", "BI35", "BI34"]
+
+
+def test_retries_503_with_backoff(stub_controller, tmp_path):
+    script_catalog(stub_controller)
+    stub_controller.route(plans_params("CS26"), (503, "busy"), (503, "busy"), (200, json.dumps([plan("CS26")])))
+
+    plans=run_harvest(stub_controller, tmp_path/"checkpoint.jsonl", retries=3)
+    assert [p.major_code for p in plans]==["BI34", "BI35", "CS26", "CS27"]
+    assert stub_controller.count(action="LoadPlans", major="CS26")==3
+
+
+def test_failure_surfaces_after_other_majors_checkpoint(stub_controller, tmp_path):
+    script_catalog(stub_controller)
+    stub_controller.route(plans_params("CS26"), (503, "busy"))
+    checkpoint=tmp_path/"checkpoint.jsonl"
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run_harvest(stub_controller, checkpoint, retries=2)
+    assert stub_controller.count(action="LoadPlans", major="CS26")==3
+    assert sorted(checkpointed(checkpoint))==["BI34", "BI35", "CS27"]
+
+
+def test_resumes_from_checkpoint(stub_controller, tmp_path):
+    script_catalog(stub_controller)
+    checkpoint=tmp_path/"checkpoint.jsonl"
+    entry={"major_code": "BI34", "plans": [plan("BI34")]}
+    # a run killed mid-write leaves a partial last line, which is ignored
+    checkpoint.write_text(json.dumps(entry)+"\n"+'{"major_code": "BI3')
+
+    plans=run_harvest(stub_controller, checkpoint)
+    assert [p.major_code for p in plans]==["BI34", "BI35", "CS26", "CS27"]
+    assert stub_controller.count(action="LoadPlans", major="BI34")==0
+    assert stub_controller.count(action="LoadPlans")==3
+    # the majors fetched after the partial line are readable by the next resume
+    assert sorted(hv.load_checkpoint(str(checkpoint)))==["BI34", "BI35", "CS26", "CS27"]
@@ -14,17 +14,28 @@ import { findRootNode } from './astGraphUtils';
 
 // Lazy glob: returns a map of path → () => Promise<module>
 const astModules = import.meta.glob('../../data/ast/*.json');
+const splitModules = import.meta.glob('../../data/ast/split/*.json');
+
+// ── Courses split into their own AST file ──────────────────────────────────
+// course_ast.py plans these from estimated tree sizes and lists them in
+// data/ast_index.json: { departments: { MATH: "math_ast.json" }, split: { "COGS 118A": "split/cogs_118a_ast.json" } }
+// Their entries in department files are stubs without children.
+const astIndex = Object.values(import.meta.glob('../../data/ast_index.json', { eager: true, import: 'default' }))[0];
+
+// Trees built before the index existed keep their split files next to the
+// department files, named after the course: "cogs_118a_ast.json" → "COGS 118A"
+const LEGACY_SPLIT_FILE = /^([a-z]+)_(\d\w*)_ast\.json$/;
+const fileName = (path) => path.split('/').pop();
 
-// ── Special-case courses that have their own dedicated AST file ────────────
 // Format: "COURSE CODE" (uppercase, with space) → glob path
-const SPECIAL_CASES = {
-    'COGS 118A': '../../data/ast/cogs_118a_ast.json',
-    'COGS 118B': '../../data/ast/cogs_118b_ast.json',
-    'PHYS 4A': '../../data/ast/phys_4a_ast.json',
-    'PHYS 4B': '../../data/ast/phys_4b_ast.json',
-    'PHYS 4C': '../../data/ast/phys_4c_ast.json',
-    'PHYS 4D': '../../data/ast/phys_4d_ast.json',
-};
+const SPECIAL_CASES = astIndex
+    ? Object.fromEntries(Object.entries(astIndex.split).map(([code, file]) => [code, `../../data/ast/${file}`]))
+    : Object.fromEntries(
+        Object.keys(astModules).flatMap((path) => {
+            const match = fileName(path).match(LEGACY_SPLIT_FILE);
+            return match ? [[`${match[1]} ${match[2]}`.toUpperCase(), path]] : [];
+        }),
+    );
 
 /** Set of course codes that have dedicated AST files (always expandable in graphs). */
 export const SPECIAL_CASE_CODES = new Set(Object.keys(SPECIAL_CASES));
@@ -32,9 +43,12 @@ export const SPECIAL_CASE_CODES = new Set(Object.keys(SPECIAL_CASES));
 // Cache for special-case roots (keyed by course code)
 const specialCache = {};
 
+// Department files are every top-level file except legacy split files
+const departmentPaths = Object.keys(astModules).filter((path) => !LEGACY_SPLIT_FILE.test(fileName(path)));
+
 // Extract department prefixes from file names for the course list.
 // File names look like "../../data/ast/math_ast.json" → prefix "MATH"
-const departmentPrefixes = Object.keys(astModules).map((path) => {
+const departmentPrefixes = departmentPaths.map((path) => {
     const filename = path.split('/').pop();                 // "math_ast.json"
     const prefix = filename.replace('_ast.json', '');       // "math"
     return prefix.toUpperCase();                            // "MATH"
@@ -42,7 +56,7 @@ const departmentPrefixes = Object.keys(astModules).map((path) => {
 
 // Map: uppercase department prefix → glob path
 const prefixToPath = {};
-Object.keys(astModules).forEach((path) => {
+departmentPaths.forEach((path) => {
     const filename = path.split('/').pop();
     const prefix = filename.replace('_ast.json', '').toUpperCase();
     prefixToPath[prefix] = path;
@@ -51,6 +65,30 @@ Object.keys(astModules).forEach((path) => {
 // Cache: prefix → parsed array (so we only load each file once)
 const cache = {};
 
+/**
+ * Turn a file's contents into an array of root nodes.
+ *
+ * Files are either the nested format (an array of roots, or a single root for
+ * special cases) or the deduplicated DAG format written by `course_ast.py --format dag`:
+ *   { format: "dag", roots: [i, ...], nodes: [{ code, type }, ...], edges: [[parent, child], ...] }
+ * Children always precede their parents in `nodes`, so one forward pass rebuilds
+ * the tree with shared subtrees as shared objects.
+ */
+function toRoots(data) {
+    if (Array.isArray(data)) return data;
+    if (!data) return [];
+    if (data.format !== 'dag') return [data];
+
+    const childIds = data.nodes.map(() => []);
+    data.edges.forEach(([parent, child]) => childIds[parent].push(child));
+
+    const built = [];
+    data.nodes.forEach((node, i) => {
+        built[i] = { code: node.code, type: node.type, children: childIds[i].map((c) => built[c]) };
+    });
+    return data.roots.map((i) => built[i]);
+}
+
 /**
  * Return the list of department prefixes (e.g. ["MATH", "CSE", "PHYS", ...]).
  */
@@ -70,7 +108,7 @@ export async function loadDepartment(prefix) {
 
     const mod = await astModules[path]();
     const data = mod.default || mod;
-    cache[upper] = Array.isArray(data) ? data : [];
+    cache[upper] = toRoots(data);
     return cache[upper];
 }
 
@@ -102,12 +140,12 @@ export async function loadAstNodeForCourse(courseCode) {
     const specialPath = SPECIAL_CASES[canonical];
     if (specialPath) {
         if (specialCache[canonical]) return specialCache[canonical];
-        const loader = astModules[specialPath];
+        const loader = splitModules[specialPath] || astModules[specialPath];
         if (!loader) return null;
         const mod = await loader();
         const data = mod.default || mod;
-        // Special AST files are a single root object (not an array)
-        const root = Array.isArray(data) ? data[0] : data;
+        // Special AST files hold a single root
+        const root = toRoots(data)[0];
         specialCache[canonical] = root || null;
         return specialCache[canonical];
     }
@@ -123,15 +161,36 @@ export async function loadAstNodeForCourse(courseCode) {
  */
 export async function loadAllDepartments() {
     const allData = [];
-    const paths = Object.keys(astModules);
-    for (const path of paths) {
+    for (const path of departmentPaths) {
         const prefix = path.split('/').pop().replace('_ast.json', '').toUpperCase();
         if (!cache[prefix]) {
             const mod = await astModules[path]();
             const data = mod.default || mod;
-            cache[prefix] = Array.isArray(data) ? data : [];
+            cache[prefix] = toRoots(data);
         }
         allData.push(...cache[prefix]);
     }
     return allData;
 }
+
+// ── Reverse dependencies ("unlocks") written by course_ast.py --unlocks ───────────
+// One shard per department: { "MATH 20C": { direct: { and: [...], or: [...] }, transitive?: {...} } }
+const unlockModules = import.meta.glob('../../data/unlocks/*_unlocks.json');
+const unlockCache = {};
+
+/**
+ * Return the courses that a course unlocks, or null if nothing lists it as a
+ * prerequisite.  Only the course's own department shard is loaded.
+ */
+export async function loadUnlocksForCourse(courseCode) {
+    const canonical = courseCode.trim().toUpperCase().replace(/^([A-Z]+)(\d)/, '$1 $2');
+    const prefix = canonical.split(/\s+/)[0].split('/')[0];
+
+    if (!unlockCache[prefix]) {
+        const loader = unlockModules[`../../data/unlocks/${prefix.toLowerCase()}_unlocks.json`];
+        if (!loader) return null;
+        const mod = await loader();
+        unlockCache[prefix] = mod.default || mod;
+    }
+    return unlockCache[prefix][canonical] || null;
+}